@@ -0,0 +1,96 @@
+# coding=utf-8
+"""
+Unit tests for trade_trader.notify.dingtalk module.
+"""
+import pytest
+
+
+def _make_alert(level, title='连接断开', message='CTP连接断开'):
+    from trade_trader.notify import Alert, AlertType
+
+    return Alert(type=AlertType.CTP_CONNECTION, level=level, title=title, message=message)
+
+
+@pytest.fixture
+def sent_payloads():
+    return []
+
+
+@pytest.fixture
+def dingtalk(sent_payloads):
+    """DingTalkNotifier whose HTTP send is captured instead of performed."""
+    from trade_trader.notify.dingtalk import DingTalkNotifier
+
+    notifier = DingTalkNotifier(webhook='https://oapi.dingtalk.com/robot/send?access_token=test')
+    notifier._send = lambda data: sent_payloads.append(data) or True
+    return notifier
+
+
+@pytest.mark.unit
+class TestBatchingDingTalkNotifier:
+    """Tests for BatchingDingTalkNotifier."""
+
+    def test_flush_now_merges_buffered_alerts(self, dingtalk, sent_payloads):
+        """Buffered alerts are sent as one markdown card, highest level first."""
+        from trade_trader.notify import AlertLevel
+        from trade_trader.notify.dingtalk import BatchingDingTalkNotifier
+
+        batching = BatchingDingTalkNotifier(dingtalk, flush_interval=60, max_batch=10)
+        assert batching.send_alert(_make_alert(AlertLevel.WARNING)) is True
+        assert batching.send_alert(_make_alert(AlertLevel.CRITICAL)) is True
+        assert sent_payloads == []
+
+        assert batching.flush_now() is True
+        assert len(sent_payloads) == 1
+        text = sent_payloads[0]['markdown']['text']
+        assert text.index('critical') < text.index('warning')
+        assert batching.flush_now() is False
+
+    def test_max_batch_triggers_send(self, dingtalk, sent_payloads):
+        """Reaching max_batch sends immediately."""
+        from trade_trader.notify import AlertLevel
+        from trade_trader.notify.dingtalk import BatchingDingTalkNotifier
+
+        batching = BatchingDingTalkNotifier(dingtalk, flush_interval=60, max_batch=2)
+        batching.send_alert(_make_alert(AlertLevel.ERROR))
+        batching.send_alert(_make_alert(AlertLevel.ERROR))
+        assert len(sent_payloads) == 1
+
+    def test_info_alert_not_buffered(self, dingtalk):
+        """INFO alerts are dropped like DingTalkNotifier.send_alert."""
+        from trade_trader.notify import AlertLevel
+        from trade_trader.notify.dingtalk import BatchingDingTalkNotifier
+
+        batching = BatchingDingTalkNotifier(dingtalk, flush_interval=60)
+        assert batching.send_alert(_make_alert(AlertLevel.INFO)) is False
+        assert batching.flush_now() is False
+
+
+@pytest.mark.unit
+class TestDingTalkDedupe:
+    """Tests for DingTalkNotifier duplicate alert suppression."""
+
+    def test_duplicate_suppressed_within_window(self, dingtalk, sent_payloads):
+        """Identical alerts inside the window are counted, not sent."""
+        from trade_trader.notify import AlertLevel
+
+        assert dingtalk.send_alert(_make_alert(AlertLevel.ERROR)) is True
+        assert dingtalk.send_alert(_make_alert(AlertLevel.ERROR)) is True
+        assert len(sent_payloads) == 1
+
+        dingtalk.send_alert(_make_alert(AlertLevel.ERROR, message='其他错误'))
+        assert len(sent_payloads) == 2
+
+    def test_repeat_count_after_window(self, dingtalk, sent_payloads):
+        """The first send after the window reports the collapsed count."""
+        from trade_trader.notify import AlertLevel
+
+        dingtalk.send_alert(_make_alert(AlertLevel.ERROR))
+        dingtalk.send_alert(_make_alert(AlertLevel.ERROR))
+        dingtalk.send_alert(_make_alert(AlertLevel.ERROR))
+        for entry in dingtalk._dedupe.values():
+            entry[1] -= dingtalk.dedupe_window
+
+        dingtalk.send_alert(_make_alert(AlertLevel.ERROR))
+        assert len(sent_payloads) == 2
+        assert '(×3)' in sent_payloads[1]['markdown']['text']
@@ -0,0 +1,86 @@
+# coding=utf-8
+"""
+Unit tests for trade_trader.risk.stop_engine.StopEngine.
+"""
+import random
+from decimal import Decimal
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from panel.models import DirectionType
+
+
+def _position_model(rows):
+    """Position stand-in answering filter(id__in=...).values(...) from rows"""
+    def filter_(id__in):
+        queryset = MagicMock()
+        queryset.values.side_effect = lambda *fields: [
+            {f: rows[i][f] for f in fields} for i in id__in if i in rows
+        ]
+        return queryset
+
+    model = MagicMock()
+    model.objects.filter.side_effect = filter_
+    return model
+
+
+@pytest.mark.unit
+class TestStopEngine:
+    """Tests for StopEngine trigger checks."""
+
+    def test_vectorized_matches_scalar(self):
+        """Test the array check triggers the same stops as the per-order check."""
+        from trade_trader.risk import stop_engine
+
+        rng = random.Random(7)
+        codes = ['cu2501', 'rb2501', 'ag2502', 'IF2501']
+        base = {code: Decimal(rng.randint(3000, 9000)) for code in codes}
+        rows = {}
+        for pid in range(1, stop_engine.StopEngine.VECTORIZE_MIN_STOPS + 201):
+            code = codes[pid % len(codes)]
+            rows[pid] = {
+                'id': pid,
+                'code': code,
+                'direction': DirectionType.LONG if pid % 2 else DirectionType.SHORT,
+                'position': 1,
+                'avg_open_price': base[code],
+            }
+
+        def build(vectorize):
+            engine = stop_engine.StopEngine(MagicMock(id=1, name='test'), MagicMock())
+            engine.float_compare = True
+            if not vectorize:
+                engine.VECTORIZE_MIN_STOPS = len(rows) + 1
+            for pid, row in rows.items():
+                sign = -1 if row['direction'] == DirectionType.LONG else 1
+                match pid % 3:
+                    case 0:
+                        offset = Decimal(rng.randint(10, 200))
+                        engine.register_stop_loss(pid, stop_type=stop_engine.StopType.FIXED_PRICE,
+                                                  stop_price=row['avg_open_price'] + sign * offset)
+                    case 1:
+                        engine.register_trailing_stop(pid, distance=Decimal(rng.randint(20, 150)))
+                    case 2:
+                        engine.register_trailing_stop(pid, distance_pct=rng.choice([0.01, 0.02, 0.03]))
+            return engine
+
+        with patch.object(stop_engine, 'Position', _position_model(rows)):
+            state = rng.getstate()
+            scalar = build(vectorize=False)
+            rng.setstate(state)
+            vectorized = build(vectorize=True)
+
+            prices = dict(base)
+            for _ in range(60):
+                for code in codes:
+                    prices[code] += Decimal(rng.randint(-60, 60))
+                ticks = {code: prices[code] for code in rng.sample(codes, rng.randint(1, len(codes)))}
+                expected = {t['position_id']: t['stop_price'] for t in scalar.check_and_trigger(ticks)}
+                actual = {t['position_id']: t['stop_price'] for t in vectorized.check_and_trigger(ticks)}
+                assert actual == expected
+
+        triggered = {pid for pid, s in scalar.stop_orders.items() if s.triggered}
+        assert triggered == {pid for pid, s in vectorized.stop_orders.items() if s.triggered}
+        kinds = {(pid % 3, rows[pid]['direction']) for pid in triggered}
+        assert len(kinds) == 6
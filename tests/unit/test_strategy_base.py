@@ -3,7 +3,7 @@
 Unit tests for trade_trader.strategy.BaseModule class.
 """
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 
 @pytest.mark.unit
@@ -61,6 +61,40 @@ class TestBaseModule:
                 await module.uninstall()
                 assert module.initialized is False
 
+    def test_msg_reader_dispatches_batched_messages(self):
+        """Test _msg_reader decodes buffered pmessages and stops on punsubscribe."""
+        import asyncio
+        from trade_trader.strategy import BaseModule
+
+        received = []
+
+        class ConcreteModule(BaseModule):
+            async def process_tick(self, channel, data):
+                received.append((channel, data))
+
+        messages = [{'type': 'psubscribe', 'pattern': None, 'channel': b'MSG:*', 'data': 1}]
+        messages += [
+            {'type': 'pmessage', 'pattern': b'MSG:*', 'channel': f'MSG:{i}'.encode(), 'data': b'{"seq": %d}' % i}
+            for i in range(3)
+        ]
+        messages.append({'type': 'punsubscribe', 'pattern': None, 'channel': b'MSG:*', 'data': 0})
+
+        async def get_message(timeout=0.0):
+            return messages.pop(0) if messages else None
+
+        module = ConcreteModule()
+        module.channel_router = {'MSG:*': module.process_tick}
+        module.sub_client = MagicMock()
+        module.sub_client.get_message = get_message
+
+        async def run_reader():
+            await module._msg_reader()
+            await asyncio.sleep(0)
+
+        module.io_loop.run_until_complete(run_reader())
+
+        assert received == [(f'MSG:{i}', {'seq': i}) for i in range(3)]
+
     def test_get_next_calculates_correct_time(self):
         """Test _get_next calculates the next scheduled time correctly."""
         from unittest.mock import MagicMock
@@ -88,6 +122,35 @@ class TestBaseModule:
         # result = 100.0 + 60.0 = 160.0
         assert result == 160.0
 
+    def test_recalibrate_clock_shifts_scheduled_fire_times(self):
+        """Test _recalibrate_clock moves queued and next fire times when the wall clock drifts."""
+        from collections import deque
+
+        import numpy as np
+
+        from trade_trader.strategy import BaseModule
+
+        class ConcreteModule(BaseModule):
+            async def process_tick(self, channel, data):
+                pass
+
+        module = ConcreteModule()
+        module.time = 1000.0
+        module.loop_time = 100.0
+        module.crontab_router['test'] = {'func': MagicMock(), 'pending': deque([160.0, 220.0])}
+        module._cron_keys = ['test']
+        module._cron_next = np.array([150.0])
+
+        # 墙上时钟比事件循环时钟多走了 30 秒
+        with patch('trade_trader.strategy.time.time', return_value=1030.0), \
+                patch.object(module.io_loop, 'time', return_value=100.0):
+            module._recalibrate_clock()
+        module._clock_handle.cancel()
+        module._cron_handle.cancel()
+
+        assert module._cron_next.tolist() == [120.0]
+        assert list(module.crontab_router['test']['pending']) == [130.0, 190.0]
+
 
 @pytest.mark.unit
 class TestCallbackDecorator:
@@ -0,0 +1,37 @@
+# coding=utf-8
+"""
+Unit tests for trade_trader.strategy.manager.StrategyManager.
+"""
+import sys
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+@pytest.mark.unit
+class TestStrategyManager:
+    """Tests for StrategyManager lifecycle."""
+
+    @pytest.mark.asyncio
+    async def test_stop_all_persists_stopped_status(self):
+        """Test stop_all writes the stopped status before returning."""
+        # brother2 pulls in the CTP trading stack, which the manager only needs for start_strategy
+        with patch.dict(sys.modules, {'trade_trader.strategy.brother2': MagicMock()}):
+            from trade_trader.strategy import manager as manager_module
+        StrategyManager = manager_module.StrategyManager
+
+        with patch.object(StrategyManager, '_load_instances'):
+            manager = StrategyManager(MagicMock())
+        manager.strategies[1] = MagicMock(stop=AsyncMock())
+        manager.configs[1] = MagicMock()
+        manager.status[1] = MagicMock()
+
+        with patch.object(manager_module, 'StrategyInstance') as instance_model:
+            count = await manager.stop_all()
+
+        assert count == 1
+        assert manager._flush_handle is None
+        instance_model.objects.filter.assert_called_once_with(id=1)
+        fields = instance_model.objects.filter.return_value.update.call_args.kwargs
+        assert fields['status'] == 'stopped'
+        assert 'stop_time' in fields
@@ -23,6 +23,7 @@ os.environ["DJANGO_SETTINGS_MODULE"] = "dashboard.settings"
 os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
 django.setup()
 import redis  # noqa: E402
+import asyncio  # noqa: E402
 import logging  # noqa: E402
 from logging import handlers  # noqa: E402
 from trade_trader.strategy.brother2 import TradeStrategy  # noqa: E402
@@ -43,6 +44,12 @@ class RedislHandler(logging.StreamHandler):
 
 
 if __name__ == '__main__':
+    # 有 uvloop 时使用 uvloop 事件循环，需在创建策略模块 (及其事件循环) 之前设置
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     os.path.exists(app_dir.user_log_dir) or os.makedirs(app_dir.user_log_dir)
     log_file = os.path.join(app_dir.user_log_dir, 'trader.log')
     file_handler = handlers.RotatingFileHandler(log_file, encoding='utf-8', maxBytes=1024*1024, backupCount=1)
@@ -11,7 +11,7 @@
 from typing import Dict, List, Optional, Callable, Any
 from datetime import datetime, timedelta
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import logging
 
@@ -61,6 +61,8 @@ class Alert:
     metadata: Dict[str, Any] = None
     sent: bool = False
     sent_methods: List[str] = None
+    # 各通知渠道共享的渲染结果缓存
+    _render_cache: Dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if self.timestamp is None:
@@ -70,6 +72,14 @@ class Alert:
         if self.sent_methods is None:
             self.sent_methods = []
 
+    @property
+    def timestamp_str(self) -> str:
+        """格式化后的告警时间 (缓存)"""
+        ts_str = self._render_cache.get('ts_str')
+        if ts_str is None:
+            ts_str = self._render_cache['ts_str'] = self.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+        return ts_str
+
     def to_dict(self) -> Dict:
         return {
             'type': self.type.value,
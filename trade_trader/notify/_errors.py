@@ -0,0 +1,36 @@
+# coding=utf-8
+"""
+发送异常日志 - Notify Send Errors
+
+各通知渠道共用的发送异常记录。渠道不可用时每条消息都会失败，
+窗口内只记录一次完整堆栈，其余只记录异常本身。
+"""
+import logging
+import time
+
+
+class SendErrorLogger:
+    """按时间窗口限制堆栈输出的发送异常记录器"""
+
+    __slots__ = ('_logger', '_message', '_min_interval', '_last_traceback_ts')
+
+    def __init__(self, logger: logging.Logger, message: str, min_interval: float = 60.0):
+        """
+        Args:
+            logger: 记录日志的 logger
+            message: 日志前缀，如 "邮件发送失败"
+            min_interval: 两次完整堆栈之间的最小间隔 (秒)
+        """
+        self._logger = logger
+        self._message = message
+        self._min_interval = min_interval
+        self._last_traceback_ts = float('-inf')
+
+    def __call__(self, e: Exception):
+        """记录发送异常，连续失败时不重复格式化堆栈"""
+        now = time.monotonic()
+        if now - self._last_traceback_ts > self._min_interval:
+            self._last_traceback_ts = now
+            self._logger.error("%s: %r", self._message, e, exc_info=True)
+        else:
+            self._logger.error("%s: %r", self._message, e)
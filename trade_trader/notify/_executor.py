@@ -0,0 +1,11 @@
+# coding=utf-8
+"""
+通知线程池 - Notify Executor
+
+所有通知渠道共用的后台线程池，用于把消息渲染和网络发送移出调用线程。
+线程数有上限，避免突发告警耗尽 HTTP/SMTP 连接。
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+NOTIFY_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='notify')
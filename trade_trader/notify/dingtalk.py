@@ -14,25 +14,63 @@ import hashlib
 import hmac
 import base64
 import time
+import threading
+from concurrent.futures import Future
+from types import MappingProxyType
 from urllib.parse import quote
 
 import aiohttp
 import requests
 
+try:
+    import orjson
+
+    def _dumps(data: Dict) -> bytes:
+        return orjson.dumps(data)
+except ImportError:
+    import json
+
+    def _dumps(data: Dict) -> bytes:
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
 from trade_trader.notify import Alert, AlertLevel
+from trade_trader.notify._executor import NOTIFY_EXECUTOR
+from trade_trader.notify._errors import SendErrorLogger
 from trade_trader.utils.read_config import config
 
 
 logger = logging.getLogger('DingTalkNotifier')
 
-
-class DingTalkNotifier:
+# 告警级别 -> 标题前缀
+_LEVEL_EMOJI = MappingProxyType({
+    AlertLevel.WARNING: "⚠️",
+    AlertLevel.ERROR: "❌",
+    AlertLevel.CRITICAL: "🚨",
+})
+_DEFAULT_EMOJI = "ℹ️"
+
+# 告警Markdown模板
+_ALERT_MD = (
+    "## {title}\n\n"
+    "**级别**: {level}\n"
+    "**时间**: {ts}\n"
+    "**来源**: {source}\n\n"
+    "### 详情\n\n"
+    "{message}\n\n"
+    "---\n"
+    "*本消息由 Trade-Trader 自动发送*"
+)
+
+# 合并消息中各级别的排列顺序 (高级别在前)
+_LEVEL_ORDER = (AlertLevel.CRITICAL, AlertLevel.ERROR, AlertLevel.WARNING)
+
+
+class _DingTalkBase:
     """
-    钉钉通知器
+    钉钉通知器基类
 
-    使用钉钉机器人发送通知消息
-
-    文档: https://open.dingtalk.com/document/robots/custom-robot-access
+    同步/异步通知器共用的纯Python逻辑：URL签名、消息体构建、告警级别映射。
+    子类只需实现各自的发送方法。
     """
 
     # 消息类型
@@ -51,12 +89,13 @@ class DingTalkNotifier:
         """
         self.webhook = webhook or config.get('DINGTALK', 'webhook', fallback='')
         self.secret = secret or config.get('DINGTALK', 'secret', fallback='')
+        self._secret_enc = self.secret.encode('utf-8')
 
         # 是否启用
         self.enabled = bool(self.webhook)
 
-        if not self.enabled:
-            logger.info("钉钉通知未启用")
+        # 发送异常时，窗口内只记录一次完整堆栈
+        self._log_send_exception = SendErrorLogger(logger, "钉钉消息发送异常")
 
     def _get_sign_url(self) -> str:
         """
@@ -68,15 +107,148 @@ class DingTalkNotifier:
             return self.webhook
 
         timestamp = str(round(time.time() * 1000))
-        secret_enc = self.secret.encode('utf-8')
-        string_to_sign = f'{timestamp}\n{self.secret}'
-        string_to_sign_enc = string_to_sign.encode('utf-8')
+        string_to_sign_enc = f'{timestamp}\n{self.secret}'.encode('utf-8')
 
-        hmac_code = hmac.new(secret_enc, string_to_sign_enc, digestmod=hashlib.sha256).digest()
+        hmac_code = hmac.new(self._secret_enc, string_to_sign_enc, digestmod=hashlib.sha256).digest()
         sign = quote(base64.b64encode(hmac_code))
 
         return f"{self.webhook}&timestamp={timestamp}&sign={sign}"
 
+    def _build_text_payload(
+        self,
+        content: str,
+        at_mobiles: Optional[List[str]] = None,
+        at_all: bool = False
+    ) -> Dict:
+        """构建文本消息体"""
+        data = {
+            "msgtype": self.MSG_TYPE_TEXT,
+            "text": {
+                "content": content
+            }
+        }
+
+        if at_mobiles or at_all:
+            data["at"] = {
+                "atMobiles": at_mobiles or [],
+                "isAtAll": at_all
+            }
+
+        return data
+
+    def _build_markdown_payload(self, title: str, text: str) -> Dict:
+        """构建Markdown消息体"""
+        return {
+            "msgtype": self.MSG_TYPE_MARKDOWN,
+            "markdown": {
+                "title": title,
+                "text": text
+            }
+        }
+
+    def _build_alert_payload(self, alert: Alert, repeat: int = 1) -> Optional[Dict]:
+        """
+        构建告警消息体
+
+        Args:
+            alert: 告警对象
+            repeat: 合并的重复次数，大于1时在详情后追加 (×N)
+
+        Returns:
+            Optional[Dict]: INFO级别告警不发送，返回None
+        """
+        # 根据告警级别决定是否发送
+        if alert.level == AlertLevel.INFO:
+            return None
+
+        if repeat == 1:
+            cached = alert._render_cache.get('dingtalk_md')
+            if cached is not None:
+                return cached
+
+        message = f"{alert.message} (×{repeat})" if repeat > 1 else alert.message
+        text = _ALERT_MD.format_map({
+            "title": alert.title,
+            "level": alert.level.value,
+            "ts": alert.timestamp_str,
+            "source": alert.source or '系统',
+            "message": message,
+        })
+        title = _LEVEL_EMOJI.get(alert.level, _DEFAULT_EMOJI) + " " + alert.title
+
+        data = self._build_markdown_payload(title, text)
+        if repeat == 1:
+            alert._render_cache['dingtalk_md'] = data
+        return data
+
+    def _build_batch_payload(self, alerts: List[Alert]) -> Dict:
+        """
+        将多条告警合并为一条Markdown消息体
+
+        按级别分节，高级别在前；标题使用最高级别的前缀。
+        """
+        by_level: Dict[AlertLevel, List[Alert]] = {}
+        for alert in alerts:
+            by_level.setdefault(alert.level, []).append(alert)
+
+        levels = [level for level in _LEVEL_ORDER if level in by_level]
+        levels.extend(level for level in by_level if level not in _LEVEL_ORDER)
+
+        title = f"{_LEVEL_EMOJI.get(levels[0], _DEFAULT_EMOJI)} {len(alerts)}条告警"
+        parts = []
+        for level in levels:
+            items = by_level[level]
+            parts.append(f"## {_LEVEL_EMOJI.get(level, _DEFAULT_EMOJI)} {level.value} ({len(items)})\n")
+            for alert in items:
+                parts.append(
+                    f"**{alert.title}** "
+                    f"({alert.timestamp_str}, {alert.source or '系统'})\n\n"
+                    f"{alert.message}\n"
+                )
+        parts.append("---\n*本消息由 Trade-Trader 自动发送*")
+
+        return self._build_markdown_payload(title, "\n".join(parts))
+
+
+class DingTalkNotifier(_DingTalkBase):
+    """
+    钉钉通知器
+
+    使用钉钉机器人发送通知消息
+
+    文档: https://open.dingtalk.com/document/robots/custom-robot-access
+    """
+
+    # 去重表最大条目数，超过后清理过期条目
+    DEDUPE_MAX_ENTRIES = 256
+
+    def __init__(
+        self,
+        webhook: Optional[str] = None,
+        secret: Optional[str] = None,
+        dedupe_window: float = 60.0
+    ):
+        """
+        初始化钉钉通知器
+
+        Args:
+            webhook: 钉钉机器人webhook地址
+            secret: 钉钉机器人加签密钥
+            dedupe_window: 相同告警的抑制窗口 (秒)，0表示不去重
+        """
+        super().__init__(webhook, secret)
+
+        # 告警指纹 -> [窗口内被抑制次数, 上次发送时间(monotonic)]
+        self.dedupe_window = dedupe_window
+        self._dedupe: Dict[bytes, List] = {}
+        self._dedupe_lock = threading.Lock()
+
+        # 复用HTTP连接
+        self._session = requests.Session()
+
+        if not self.enabled:
+            logger.info("钉钉通知未启用")
+
     def send_text(self, content: str, at_mobiles: Optional[List[str]] = None, at_all: bool = False) -> bool:
         """
         发送文本消息
@@ -92,20 +264,7 @@ class DingTalkNotifier:
         if not self.enabled:
             return False
 
-        data = {
-            "msgtype": self.MSG_TYPE_TEXT,
-            "text": {
-                "content": content
-            }
-        }
-
-        if at_mobiles or at_all:
-            data["at"] = {
-                "atMobiles": at_mobiles or [],
-                "isAtAll": at_all
-            }
-
-        return self._send(data)
+        return self._send(self._build_text_payload(content, at_mobiles, at_all))
 
     def send_link(self, text: str, title: str, url: str, pic_url: Optional[str] = None) -> bool:
         """
@@ -151,15 +310,7 @@ class DingTalkNotifier:
         if not self.enabled:
             return False
 
-        data = {
-            "msgtype": self.MSG_TYPE_MARKDOWN,
-            "markdown": {
-                "title": title,
-                "text": text
-            }
-        }
-
-        return self._send(data)
+        return self._send(self._build_markdown_payload(title, text))
 
     def send_action_card(
         self,
@@ -210,34 +361,65 @@ class DingTalkNotifier:
         if not self.enabled:
             return False
 
-        # 根据告警级别决定是否发送
         if alert.level == AlertLevel.INFO:
             return False
 
-        # 构建Markdown消息
-        level_emoji = {
-            AlertLevel.WARNING: "⚠️",
-            AlertLevel.ERROR: "❌",
-            AlertLevel.CRITICAL: "🚨",
-        }.get(alert.level, "ℹ️")
+        repeat = self._check_duplicate(alert)
+        if not repeat:
+            return True
+
+        return self._send(self._build_alert_payload(alert, repeat))
 
-        title = f"{level_emoji} {alert.title}"
-        text = f"""
-## {alert.title}
+    def _check_duplicate(self, alert: Alert) -> int:
+        """
+        告警去重
 
-**级别**: {alert.level.value}
-**时间**: {alert.timestamp.strftime('%Y-%m-%d %H:%M:%S')}
-**来源**: {alert.source or '系统'}
+        窗口内重复的告警只计数不发送；窗口过后再次出现时，
+        返回需要合并显示的次数 (含本次)。
 
-### 详情
+        Returns:
+            int: 0表示本次被抑制，否则为本次消息代表的告警次数
+        """
+        if self.dedupe_window <= 0:
+            return 1
+
+        fingerprint = hashlib.blake2b(
+            f"{alert.level.value}|{alert.title}|{alert.message}|{alert.source}".encode('utf-8'),
+            digest_size=16
+        ).digest()
+        now = time.monotonic()
+
+        with self._dedupe_lock:
+            entry = self._dedupe.get(fingerprint)
+            if entry is not None and now - entry[1] < self.dedupe_window:
+                entry[0] += 1
+                logger.debug(f"钉钉告警去重: {alert.title}")
+                return 0
+
+            repeat = entry[0] + 1 if entry is not None else 1
+            self._dedupe[fingerprint] = [0, now]
+
+            if len(self._dedupe) > self.DEDUPE_MAX_ENTRIES:
+                self._dedupe = {
+                    k: v for k, v in self._dedupe.items()
+                    if now - v[1] < self.dedupe_window
+                }
+
+        return repeat
+
+    def send_alert_bg(self, alert: Alert) -> Future:
+        """
+        在后台线程池中发送告警消息
 
-{alert.message}
+        渲染和HTTP请求都在通知线程池中完成，调用方立即返回，适合交易热路径。
 
----
-*本消息由 Trade-Trader 自动发送*
-"""
+        Args:
+            alert: 告警对象
 
-        return self.send_markdown(title, text)
+        Returns:
+            Future: 结果为是否成功发送
+        """
+        return NOTIFY_EXECUTOR.submit(self.send_alert, alert)
 
     def _send(self, data: Dict) -> bool:
         """
@@ -250,11 +432,12 @@ class DingTalkNotifier:
             bool: 是否成功发送
         """
         url = self._get_sign_url()
+        body = _dumps(data)
 
         try:
-            response = requests.post(
+            response = self._session.post(
                 url,
-                json=data,
+                data=body,
                 headers={'Content-Type': 'application/json'},
                 timeout=10
             )
@@ -268,23 +451,17 @@ class DingTalkNotifier:
                 return False
 
         except Exception as e:
-            logger.error(f"钉钉消息发送异常: {repr(e)}", exc_info=True)
+            self._log_send_exception(e)
             return False
 
 
-class AsyncDingTalkNotifier:
+class AsyncDingTalkNotifier(_DingTalkBase):
     """
     异步钉钉通知器
 
     使用aiohttp发送消息，适合异步环境
     """
 
-    def __init__(self, webhook: Optional[str] = None, secret: Optional[str] = None):
-        """初始化异步钉钉通知器"""
-        self.webhook = webhook or config.get('DINGTALK', 'webhook', fallback='')
-        self.secret = secret or config.get('DINGTALK', 'secret', fallback='')
-        self.enabled = bool(self.webhook)
-
     async def send_text_async(
         self,
         content: str,
@@ -295,62 +472,37 @@ class AsyncDingTalkNotifier:
         if not self.enabled:
             return False
 
-        data = {
-            "msgtype": DingTalkNotifier.MSG_TYPE_TEXT,
-            "text": {"content": content}
-        }
-
-        if at_mobiles or at_all:
-            data["at"] = {
-                "atMobiles": at_mobiles or [],
-                "isAtAll": at_all
-            }
-
-        return await self._send_async(data)
+        return await self._send_async(self._build_text_payload(content, at_mobiles, at_all))
 
     async def send_alert_async(self, alert: Alert) -> bool:
         """异步发送告警消息"""
         if not self.enabled:
             return False
 
-        if alert.level == AlertLevel.INFO:
+        data = self._build_alert_payload(alert)
+        if data is None:
             return False
 
-        level_emoji = {
-            AlertLevel.WARNING: "⚠️",
-            AlertLevel.ERROR: "❌",
-            AlertLevel.CRITICAL: "🚨",
-        }.get(alert.level, "ℹ️")
-
-        title = f"{level_emoji} {alert.title}"
-        text = f"## {alert.title}\n\n**级别**: {alert.level.value}\n**时间**: {alert.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n\n{alert.message}"
-
-        return await self.send_markdown_async(title, text)
+        return await self._send_async(data)
 
     async def send_markdown_async(self, title: str, text: str) -> bool:
         """异步发送Markdown消息"""
         if not self.enabled:
             return False
 
-        data = {
-            "msgtype": DingTalkNotifier.MSG_TYPE_MARKDOWN,
-            "markdown": {
-                "title": title,
-                "text": text
-            }
-        }
-
-        return await self._send_async(data)
+        return await self._send_async(self._build_markdown_payload(title, text))
 
     async def _send_async(self, data: Dict) -> bool:
         """异步发送消息"""
         url = self._get_sign_url()
 
+        body = _dumps(data)
+
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.post(
                     url,
-                    json=data,
+                    data=body,
                     headers={'Content-Type': 'application/json'},
                     timeout=aiohttp.ClientTimeout(total=10)
                 ) as response:
@@ -363,34 +515,113 @@ class AsyncDingTalkNotifier:
                         return False
 
         except Exception as e:
-            logger.error(f"钉钉消息发送异常: {repr(e)}", exc_info=True)
+            self._log_send_exception(e)
             return False
 
-    def _get_sign_url(self) -> str:
-        """获取带签名的URL"""
-        if not self.secret:
-            return self.webhook
 
-        import base64
-        from urllib.parse import quote
+class BatchingDingTalkNotifier:
+    """
+    合并发送的钉钉通知器
 
-        timestamp = str(round(time.time() * 1000))
-        secret_enc = self.secret.encode('utf-8')
-        string_to_sign = f'{timestamp}\n{self.secret}'
-        string_to_sign_enc = string_to_sign.encode('utf-8')
+    在 flush_interval 秒内或累计 max_batch 条告警后，把缓冲的告警合并成一条
+    Markdown消息发送，突发告警时避免逐条请求触发钉钉的webhook限流。
+    """
 
-        hmac_code = hmac.new(secret_enc, string_to_sign_enc, digestmod=hashlib.sha256).digest()
-        sign = quote(base64.b64encode(hmac_code))
+    def __init__(
+        self,
+        notifier: Optional[DingTalkNotifier] = None,
+        flush_interval: float = 0.5,
+        max_batch: int = 10
+    ):
+        """
+        初始化合并发送通知器
 
-        return f"{self.webhook}&timestamp={timestamp}&sign={sign}"
+        Args:
+            notifier: 实际发送消息的钉钉通知器，默认按配置创建
+            flush_interval: 缓冲时间窗口 (秒)
+            max_batch: 单条消息最多合并的告警数
+        """
+        self.notifier = notifier or DingTalkNotifier()
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self._buffer: List[Alert] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.notifier.enabled
+
+    def send_alert(self, alert: Alert) -> bool:
+        """
+        缓冲告警消息
+
+        缓冲区满时立即合并发送，否则等待时间窗口结束后发送。
+
+        Args:
+            alert: 告警对象
+
+        Returns:
+            bool: 是否已接收 (缓冲区满时为实际发送结果)
+        """
+        if not self.enabled or alert.level == AlertLevel.INFO:
+            return False
+
+        with self._lock:
+            self._buffer.append(alert)
+            if len(self._buffer) >= self.max_batch:
+                batch = self._take_batch()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.flush_interval, self._flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+        if batch:
+            return self._send_batch(batch)
+        return True
+
+    def flush_now(self) -> bool:
+        """
+        立即发送缓冲区中的告警 (用于退出前清理)
+
+        Returns:
+            bool: 是否成功发送，缓冲区为空时返回False
+        """
+        with self._lock:
+            batch = self._take_batch()
+        if not batch:
+            return False
+        return self._send_batch(batch)
+
+    def _flush(self):
+        """定时器回调"""
+        self.flush_now()
+
+    def _take_batch(self) -> List[Alert]:
+        """取出缓冲区并取消定时器，调用方需持有锁"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._buffer = self._buffer, []
+        return batch
+
+    def _send_batch(self, alerts: List[Alert]) -> bool:
+        """发送一批告警"""
+        if len(alerts) == 1:
+            return self.notifier.send_alert(alerts[0])
+        return self.notifier._send(self.notifier._build_batch_payload(alerts))
 
 
 def create_dingtalk_notifier(
     webhook: Optional[str] = None,
-    secret: Optional[str] = None
+    secret: Optional[str] = None,
+    dedupe_window: float = 60.0
 ) -> DingTalkNotifier:
     """创建钉钉通知器"""
-    return DingTalkNotifier(webhook, secret)
+    return DingTalkNotifier(webhook, secret, dedupe_window)
 
 
 def create_async_dingtalk_notifier(
@@ -399,3 +630,13 @@ def create_async_dingtalk_notifier(
 ) -> AsyncDingTalkNotifier:
     """创建异步钉钉通知器"""
     return AsyncDingTalkNotifier(webhook, secret)
+
+
+def create_batching_dingtalk_notifier(
+    webhook: Optional[str] = None,
+    secret: Optional[str] = None,
+    flush_interval: float = 0.5,
+    max_batch: int = 10
+) -> BatchingDingTalkNotifier:
+    """创建合并发送的钉钉通知器"""
+    return BatchingDingTalkNotifier(DingTalkNotifier(webhook, secret), flush_interval, max_batch)
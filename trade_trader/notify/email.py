@@ -9,14 +9,18 @@
 """
 from typing import List, Optional
 from datetime import datetime
+from concurrent.futures import Future
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import formataddr
 import smtplib
+import time
 from jinja2 import Template
 
 from trade_trader.notify import Alert, AlertLevel
+from trade_trader.notify._executor import NOTIFY_EXECUTOR
+from trade_trader.notify._errors import SendErrorLogger
 from trade_trader.utils.read_config import config
 
 
@@ -84,44 +88,37 @@ class EmailNotifier:
         <h2>账户概览</h2>
         <table>
             <tr><th>项目</th><th>值</th></tr>
-            <tr><td>静态权益</td><td>{{ balance:,.2f }}</td></tr>
-            <tr><td>可用资金</td><td>{{ available:,.2f }}</td></tr>
-            <tr><td>占用保证金</td><td>{{ margin:,.2f }}</td></tr>
-            <tr><td>持仓盈亏</td><td class="{{ 'positive' if position_profit >= 0 else 'negative' }}">{{ position_profit:,.2f }}</td></tr>
+            <tr><td>静态权益</td><td>{{ balance }}</td></tr>
+            <tr><td>可用资金</td><td>{{ available }}</td></tr>
+            <tr><td>占用保证金</td><td>{{ margin }}</td></tr>
+            <tr><td>持仓盈亏</td><td class="{{ position_profit_cls }}">{{ position_profit }}</td></tr>
         </table>
 
         <h2>今日交易</h2>
         <table>
             <tr><th>合约</th><th>方向</th><th>开仓价</th><th>平仓价</th><th>手数</th><th>盈亏</th></tr>
-            {% for trade in trades %}
-            <tr>
-                <td>{{ trade.code }}</td>
-                <td>{{ trade.direction }}</td>
-                <td>{{ trade.entry_price }}</td>
-                <td>{{ trade.exit_price or '-' }}</td>
-                <td>{{ trade.volume }}</td>
-                <td class="{{ 'positive' if trade.profit >= 0 else 'negative' }}">{{ trade.profit or '-' }}</td>
-            </tr>
-            {% endfor %}
+            {{ trades_html|safe }}
         </table>
 
         <h2>当前持仓</h2>
         <table>
             <tr><th>合约</th><th>方向</th><th>持仓</th><th>均价</th><th>浮动盈亏</th></tr>
-            {% for pos in positions %}
-            <tr>
-                <td>{{ pos.code }}</td>
-                <td>{{ pos.direction }}</td>
-                <td>{{ pos.position }}</td>
-                <td>{{ pos.avg_price }}</td>
-                <td class="{{ 'positive' if pos.profit >= 0 else 'negative' }}">{{ pos.profit }}</td>
-            </tr>
-            {% endfor %}
+            {{ positions_html|safe }}
         </table>
     </body>
     </html>
     """
 
+    # 日报表格行，直接用 str.format 生成，避免Jinja逐格渲染
+    _TRADE_ROW_FMT = (
+        '<tr><td>{code}</td><td>{direction}</td><td>{entry_price}</td><td>{exit_price}</td>'
+        '<td>{volume}</td><td class="{cls}">{profit}</td></tr>'
+    )
+    _POSITION_ROW_FMT = (
+        '<tr><td>{code}</td><td>{direction}</td><td>{position}</td><td>{avg_price}</td>'
+        '<td class="{cls}">{profit}</td></tr>'
+    )
+
     def __init__(self):
         """初始化邮件通知器"""
         # 从配置读取SMTP设置
@@ -141,6 +138,9 @@ class EmailNotifier:
         # 是否启用
         self.enabled = config.getboolean('EMAIL', 'enabled', fallback=False)
 
+        # 发送异常时，窗口内只记录一次完整堆栈
+        self._log_send_exception = SendErrorLogger(logger, "邮件发送失败")
+
         if not self.enabled:
             logger.info("邮件通知未启用")
         elif not self.smtp_user:
@@ -166,15 +166,17 @@ class EmailNotifier:
             return False
 
         # 渲染邮件内容
-        template = Template(self.ALERT_TEMPLATE)
-        content = template.render(
-            level=alert.level.value,
-            title=alert.title,
-            message=alert.message,
-            timestamp=alert.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            source=alert.source,
-            metadata=alert.metadata
-        )
+        content = alert._render_cache.get('email_html')
+        if content is None:
+            template = Template(self.ALERT_TEMPLATE)
+            content = alert._render_cache['email_html'] = template.render(
+                level=alert.level.value,
+                title=alert.title,
+                message=alert.message,
+                timestamp=alert.timestamp_str,
+                source=alert.source,
+                metadata=alert.metadata
+            )
 
         subject = f"[{alert.level.value.upper()}] {alert.title}"
 
@@ -184,6 +186,20 @@ class EmailNotifier:
             html_content=content
         )
 
+    def send_alert_bg(self, alert: Alert) -> Future:
+        """
+        在后台线程池中发送告警邮件
+
+        模板渲染和SMTP发送都在通知线程池中完成，调用方立即返回。
+
+        Args:
+            alert: 告警对象
+
+        Returns:
+            Future: 结果为是否成功发送
+        """
+        return NOTIFY_EXECUTOR.submit(self.send_alert, alert)
+
     def send_daily_report(
         self,
         date: datetime.date,
@@ -212,15 +228,40 @@ class EmailNotifier:
         if not self.enabled:
             return False
 
+        trades_html = ''.join([
+            self._TRADE_ROW_FMT.format(
+                code=t['code'],
+                direction=t['direction'],
+                entry_price=t['entry_price'],
+                exit_price=t.get('exit_price') or '-',
+                volume=t['volume'],
+                cls='positive' if (t.get('profit') or 0) >= 0 else 'negative',
+                profit=t.get('profit') or '-',
+            )
+            for t in trades
+        ])
+        positions_html = ''.join([
+            self._POSITION_ROW_FMT.format(
+                code=p['code'],
+                direction=p['direction'],
+                position=p['position'],
+                avg_price=p['avg_price'],
+                cls='positive' if p['profit'] >= 0 else 'negative',
+                profit=p['profit'],
+            )
+            for p in positions
+        ])
+
         template = Template(self.DAILY_REPORT_TEMPLATE)
         content = template.render(
             date=date.strftime('%Y-%m-%d'),
-            balance=balance,
-            available=available,
-            margin=margin,
-            position_profit=position_profit,
-            trades=trades,
-            positions=positions
+            balance=f"{balance:,.2f}",
+            available=f"{available:,.2f}",
+            margin=f"{margin:,.2f}",
+            position_profit=f"{position_profit:,.2f}",
+            position_profit_cls='positive' if position_profit >= 0 else 'negative',
+            trades_html=trades_html,
+            positions_html=positions_html
         )
 
         subject = f"交易日报 {date.strftime('%Y-%m-%d')}"
@@ -287,7 +328,7 @@ class EmailNotifier:
             return True
 
         except Exception as e:
-            logger.error(f"邮件发送失败: {repr(e)}", exc_info=True)
+            self._log_send_exception(e)
             return False
 
     def send_text(
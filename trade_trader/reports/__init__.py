@@ -8,25 +8,42 @@
 - 月报
 - 交易分析
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from collections import OrderedDict
 from decimal import Decimal
 from datetime import timedelta, date
+from functools import wraps
 import logging
+import os
+import pickle
+import threading
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from django.utils import timezone
-from django.db.models import Sum, Q, Avg
+from django.db.models import Sum, Q, Avg, Count, Value, Max, F, FloatField
+from django.db.models.functions import Cast, Coalesce, NullIf, TruncDate
 
 from panel.models import (
     Broker, Strategy, Trade, Account, Position,
     Performance,
 )
+from trade_trader.utils.read_config import app_dir
 
 
 logger = logging.getLogger('ReportGenerator')
 
+# 合约代码为空时回退到品种代码 (与 `obj.code or obj.instrument.product_code` 一致)
+_EFFECTIVE_CODE = Coalesce(NullIf('code', Value('')), 'instrument__product_code')
+
+
+def _as_float(field_name: str) -> Coalesce:
+    """在SQL中把Decimal字段转为浮点数，空值视为0"""
+    return Coalesce(Cast(field_name, FloatField()), Value(0.0))
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DailyReport:
     """日报数据"""
     date: date
@@ -57,7 +74,7 @@ class DailyReport:
     by_instrument: Dict[str, Dict] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TradeAnalysis:
     """交易分析"""
     period_start: date
@@ -85,6 +102,228 @@ class TradeAnalysis:
     equity_curve: List[Dict] = field(default_factory=list)
 
 
+class ReportCache:
+    """
+    报表缓存
+
+    两级缓存：进程内LRU + 磁盘pickle。已结束周期的报表不会再变化，
+    命中时跳过全部汇总查询。每条缓存附带该周期交易的指纹
+    (记录数/最大ID/盈亏合计/手续费合计)，指纹变化即视为失效。
+    报表以pickle字节保存，每次读取都反序列化出新对象，调用方修改返回值不影响缓存。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 256):
+        """
+        初始化报表缓存
+
+        Args:
+            cache_dir: 磁盘缓存目录 (None=用户缓存目录下的reports)
+            max_entries: 内存缓存最大条目数
+        """
+        self.cache_dir = cache_dir or os.path.join(app_dir.user_cache_dir, 'reports')
+        self.max_entries = max_entries
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: Tuple) -> str:
+        broker_id, report_type, date_key = key
+        return os.path.join(self.cache_dir, str(broker_id), report_type, f'{date_key}.pkl')
+
+    def get(self, key: Tuple, fingerprint: Tuple) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: (broker_id, report_type, date_key)
+            fingerprint: 当前周期的交易指纹
+
+        Returns:
+            Optional[Any]: 指纹一致时返回缓存的报表，否则None
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    entry = pickle.load(f)
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                logger.warning(f"读取报表缓存失败 {key}: {repr(e)}")
+                return None
+            self._remember(key, entry)
+        cached_fingerprint, blob = entry
+        if cached_fingerprint != fingerprint or not isinstance(blob, bytes):
+            return None
+        return pickle.loads(blob)
+
+    def set(self, key: Tuple, fingerprint: Tuple, report: Any):
+        """
+        写入缓存
+
+        Args:
+            key: (broker_id, report_type, date_key)
+            fingerprint: 当前周期的交易指纹
+            report: 报表数据
+        """
+        entry = (fingerprint, pickle.dumps(report, protocol=pickle.HIGHEST_PROTOCOL))
+        self._remember(key, entry)
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"写入报表缓存失败 {key}: {repr(e)}")
+
+    def _remember(self, key: Tuple, entry: Tuple):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """清空内存缓存"""
+        with self._lock:
+            self._memory.clear()
+
+
+_report_cache = ReportCache()
+
+
+def _pnl_class(value) -> str:
+    """盈亏对应的CSS类"""
+    return 'positive' if value >= 0 else 'negative'
+
+
+# 日报HTML模板 (str.format_map占位符)
+_DAILY_HTML_HEAD = """
+        <html>
+        <head>
+            <title>交易日报 {date}</title>
+            <style>
+                body {{ font-family: Arial, sans-serif; margin: 20px; }}
+                table {{ border-collapse: collapse; width: 100%; margin: 20px 0; }}
+                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
+                th {{ background-color: #f2f2f2; }}
+                .positive {{ color: green; }}
+                .negative {{ color: red; }}
+                .section {{ margin: 30px 0; }}
+                h1 {{ color: #333; }}
+                h2 {{ color: #666; }}
+            </style>
+        </head>
+        <body>
+            <h1>交易日报 - {date}</h1>
+            <p>账户: {broker_name}</p>
+
+            <div class="section">
+                <h2>账户概览</h2>
+                <table>
+                    <tr><th>项目</th><th>值</th></tr>
+                    <tr><td>静态权益</td><td>{balance}</td></tr>
+                    <tr><td>可用资金</td><td>{available}</td></tr>
+                    <tr><td>占用保证金</td><td>{margin}</td></tr>
+                    <tr><td>持仓盈亏</td><td class="{position_profit_cls}">{position_profit}</td></tr>
+                    <tr><td>总资产</td><td>{total_asset}</td></tr>
+                </table>
+            </div>
+
+            <div class="section">
+                <h2>今日交易</h2>
+                <table>
+                    <tr><th>项目</th><th>值</th></tr>
+                    <tr><td>交易次数</td><td>{trade_count}</td></tr>
+                    <tr><td>成交手数</td><td>{trade_volume}</td></tr>
+                    <tr><td>手续费</td><td>{trade_commission}</td></tr>
+                    <tr><td>平仓盈亏</td><td class="{close_profit_cls}">{close_profit}</td></tr>
+                </table>
+            </div>
+
+            <div class="section">
+                <h2>当前持仓</h2>
+                <table>
+                    <tr><th>合约</th><th>方向</th><th>手数</th><th>均价</th><th>浮动盈亏</th></tr>
+        """
+
+_DAILY_HTML_TAIL = """
+                </table>
+            </div>
+        </body>
+        </html>
+        """
+
+# 日报HTML持仓行
+_POS_ROW_HTML = """
+                    <tr>
+                        <td>{code}</td>
+                        <td>{direction}</td>
+                        <td>{volume}</td>
+                        <td>{avg_price}</td>
+                        <td class="{cls}">{profit}</td>
+                    </tr>
+            """
+
+
+def _month_range(month: date) -> Tuple[date, date]:
+    """返回月份的第一天和最后一天"""
+    month_start = month.replace(day=1)
+    # 获取下月第一天减一天
+    if month.month == 12:
+        next_month = month.replace(year=month.year + 1, month=1, day=1)
+    else:
+        next_month = month.replace(month=month.month + 1, day=1)
+    return month_start, next_month - timedelta(days=1)
+
+
+def _cached_report(report_type: str, period: Callable[[date], Tuple[date, date]], snapshot: bool = False,
+                   performance: bool = False):
+    """
+    报表缓存装饰器
+
+    只缓存已结束的周期；当期 (含今日) 的报表每次重新生成。
+
+    Args:
+        report_type: 报表类型 (daily, weekly, monthly)
+        period: 由报表日期参数计算周期 (开始, 结束)
+        snapshot: 报表是否包含账户资金和持仓，是则资金或持仓更新后缓存也失效
+        performance: 报表是否包含绩效记录，是则周期内绩效记录增加后缓存也失效
+    """
+    def decorator(func):
+        def generate(self, *args, **kwargs):
+            if snapshot:
+                # 含资金的报表每次生成都重新查询账户，不沿用之前取到的数据
+                self.refresh_account()
+            return func(self, *args, **kwargs)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            day = args[0] if args else next(iter(kwargs.values()), None)
+            if day is None or not self.use_cache or not isinstance(day, date):
+                return generate(self, *args, **kwargs)
+
+            period_start, period_end = period(day)
+            if period_end >= timezone.localtime().date():
+                return generate(self, *args, **kwargs)
+
+            key = (self.broker.id, report_type, period_start.isoformat())
+            fingerprint = self._period_fingerprint(period_start, period_end)
+            if snapshot:
+                fingerprint += self._snapshot_fingerprint()
+            if performance:
+                fingerprint += self._performance_fingerprint(period_start, period_end)
+            report = _report_cache.get(key, fingerprint)
+            if report is None:
+                report = generate(self, *args, **kwargs)
+                _report_cache.set(key, fingerprint, report)
+            return report
+        return wrapper
+    return decorator
+
+
 class ReportGenerator:
     """
     报表生成器
@@ -96,16 +335,63 @@ class ReportGenerator:
     4. 交易分析
     """
 
-    def __init__(self, broker: Broker):
+    def __init__(self, broker: Broker, use_cache: bool = True):
         """
         初始化报表生成器
 
         Args:
             broker: 券商/账户对象
+            use_cache: 是否缓存已结束周期的报表
         """
         self.broker = broker
+        self.use_cache = use_cache
         self.strategies = Strategy.objects.filter(broker=broker)
-
+        self._account: Optional[Account] = None
+
+    @property
+    def account(self) -> Account:
+        """账户资金 (首次访问时查询，之后复用)"""
+        if self._account is None:
+            account = Account.objects.select_related('broker').filter(broker=self.broker).first()
+            if not account:
+                # 如果没有Account记录，尝试从Broker获取
+                account = Account(
+                    broker=self.broker,
+                    balance=self.broker.current or Decimal('0'),
+                    available=self.broker.cash or Decimal('0'),
+                    margin=self.broker.margin or Decimal('0'),
+                )
+            self._account = account
+        return self._account
+
+    def refresh_account(self):
+        """丢弃缓存的账户资金，下次访问时重新查询"""
+        self._account = None
+
+    def _period_fingerprint(self, period_start: date, period_end: date) -> Tuple:
+        """周期内交易的指纹，用于判断报表缓存是否失效"""
+        stats = Trade.objects.filter(broker=self.broker).filter(
+            Q(open_time__date__range=(period_start, period_end)) |
+            Q(close_time__date__range=(period_start, period_end))
+        ).aggregate(n=Count('id'), last=Max('id'), profit=Sum('profit'), cost=Sum('cost'))
+        return stats['n'], stats['last'], stats['profit'], stats['cost']
+
+    def _performance_fingerprint(self, period_start: date, period_end: date) -> Tuple:
+        """周期内绩效记录的指纹 (记录数/最后日期)，用于判断含收益曲线的报表缓存是否失效"""
+        stats = Performance.objects.filter(broker=self.broker, day__range=(period_start, period_end)).aggregate(
+            n=Count('id'), last=Max('day'))
+        return stats['n'], stats['last']
+
+    def _snapshot_fingerprint(self) -> Tuple:
+        """账户资金和持仓的最后更新时间，用于判断含资金/持仓的报表缓存是否失效"""
+        # 直接查询更新时间，不经过 account 属性 (其值在生成器内会被复用)
+        account_updated = Account.objects.filter(broker=self.broker).values_list(
+            'update_time', flat=True).first()
+        positions_updated = Position.objects.filter(broker=self.broker).aggregate(
+            last=Max('update_time'))['last']
+        return account_updated, positions_updated
+
+    @_cached_report('daily', lambda d: (d, d), snapshot=True)
     def generate_daily_report(self, report_date: Optional[date] = None) -> DailyReport:
         """
         生成日报
@@ -120,15 +406,7 @@ class ReportGenerator:
             report_date = timezone.localtime().date()
 
         # 获取账户信息
-        account = Account.objects.filter(broker=self.broker).first()
-        if not account:
-            # 如果没有Account记录，尝试从Broker获取
-            account = Account(
-                broker=self.broker,
-                balance=self.broker.current or Decimal('0'),
-                available=self.broker.cash or Decimal('0'),
-                margin=self.broker.margin or Decimal('0'),
-            )
+        account = self.account
 
         # 今日交易
         today_trades = Trade.objects.filter(
@@ -137,50 +415,37 @@ class ReportGenerator:
             Q(open_time__date=report_date) | Q(close_time__date=report_date)
         )
 
-        trade_count = today_trades.count()
-        trade_volume = sum([t.shares or 0 for t in today_trades])
-        trade_commission = sum([t.cost or 0 for t in today_trades])
+        agg = today_trades.aggregate(
+            n=Count('id'),
+            v=Sum('shares'),
+            c=Sum('cost'),
+            p=Sum('profit'),
+        )
+        trade_count = agg['n']
+        trade_volume = agg['v'] or 0
+        trade_commission = agg['c'] or Decimal('0')
 
         # 今日盈亏
-        close_profit = today_trades.aggregate(Sum('profit'))['profit__sum'] or Decimal('0')
+        close_profit = agg['p'] or Decimal('0')
 
         # 持仓
-        positions = Position.objects.filter(
-            broker=self.broker,
-            position__gt=0
-        )
-
-        long_positions = []
-        short_positions = []
-
-        for pos in positions:
-            pos_data = {
-                'code': pos.code or pos.instrument.product_code,
-                'direction': pos.direction,
-                'volume': pos.position,
-                'avg_price': pos.avg_open_price,
-                'profit': float(pos.position_profit or 0),
-            }
-            if pos.direction == '0':  # LONG
-                long_positions.append(pos_data)
-            else:
-                short_positions.append(pos_data)
+        long_positions, short_positions = self._position_snapshot()
 
         # 按品种统计
-        by_instrument = {}
-        for trade in today_trades:
-            code = trade.code or trade.instrument.product_code
-            if code not in by_instrument:
-                by_instrument[code] = {
-                    'volume': 0,
-                    'profit': Decimal('0'),
-                    'commission': Decimal('0'),
-                }
-            by_instrument[code]['volume'] += trade.shares or 0
-            if trade.profit:
-                by_instrument[code]['profit'] += trade.profit
-            if trade.cost:
-                by_instrument[code]['commission'] += trade.cost
+        by_instrument = {
+            row['effective_code']: {
+                'volume': row['volume'] or 0,
+                'profit': row['profit'] or Decimal('0'),
+                'commission': row['commission'] or Decimal('0'),
+            }
+            for row in today_trades.annotate(
+                effective_code=_EFFECTIVE_CODE
+            ).values('effective_code').annotate(
+                volume=Sum('shares'),
+                profit=Sum('profit'),
+                commission=Sum('cost'),
+            ).order_by('effective_code')
+        }
 
         return DailyReport(
             date=report_date,
@@ -195,12 +460,121 @@ class ReportGenerator:
             trade_commission=trade_commission,
             close_profit=close_profit,
             total_profit=close_profit,
-            position_count=positions.count(),
+            position_count=len(long_positions) + len(short_positions),
             long_positions=long_positions,
             short_positions=short_positions,
             by_instrument=by_instrument
         )
 
+    def generate_daily_reports(self, start_date: date, end_date: date) -> List[DailyReport]:
+        """
+        批量生成日报
+
+        整个区间的交易只做两次分组查询 (按开仓日、按平仓日)，
+        账户和持仓快照只取一次，适合补生成多日日报。
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            List[DailyReport]: 按日期排列的日报，每天一份
+        """
+        self.refresh_account()
+        account = self.account
+        long_positions, short_positions = self._position_snapshot()
+
+        trades = Trade.objects.filter(broker=self.broker).annotate(
+            od=TruncDate('open_time'),
+            cd=TruncDate('close_time'),
+            effective_code=_EFFECTIVE_CODE,
+        )
+        sums = dict(n=Count('id'), volume=Sum('shares'), commission=Sum('cost'), profit=Sum('profit'))
+
+        # 按开仓日汇总
+        opened = trades.filter(
+            open_time__date__range=(start_date, end_date)
+        ).values('od', 'effective_code').annotate(**sums).order_by()
+
+        # 按平仓日汇总 (同日开平的交易已计入开仓日)
+        closed = trades.filter(
+            close_time__date__range=(start_date, end_date)
+        ).exclude(cd=F('od')).values('cd', 'effective_code').annotate(**sums).order_by()
+
+        # 日期 -> 品种 -> [交易数, 手数, 手续费, 盈亏]
+        buckets: Dict[date, Dict[str, List]] = {}
+        for day_key, rows in (('od', opened), ('cd', closed)):
+            for row in rows:
+                stats = buckets.setdefault(row[day_key], {}).setdefault(
+                    row['effective_code'], [0, 0, Decimal('0'), Decimal('0')])
+                stats[0] += row['n']
+                stats[1] += row['volume'] or 0
+                stats[2] += row['commission'] or Decimal('0')
+                stats[3] += row['profit'] or Decimal('0')
+
+        reports = []
+        day = start_date
+        while day <= end_date:
+            by_code = buckets.get(day, {})
+            close_profit = sum((v[3] for v in by_code.values()), Decimal('0'))
+            reports.append(DailyReport(
+                date=day,
+                broker_name=self.broker.name,
+                balance=account.balance,
+                available=account.available,
+                margin=account.margin,
+                position_profit=account.position_profit,
+                total_asset=account.balance + account.position_profit,
+                trade_count=sum(v[0] for v in by_code.values()),
+                trade_volume=sum(v[1] for v in by_code.values()),
+                trade_commission=sum((v[2] for v in by_code.values()), Decimal('0')),
+                close_profit=close_profit,
+                total_profit=close_profit,
+                position_count=len(long_positions) + len(short_positions),
+                long_positions=list(long_positions),
+                short_positions=list(short_positions),
+                by_instrument={
+                    code: {'volume': v[1], 'profit': v[3], 'commission': v[2]}
+                    for code, v in sorted(by_code.items())
+                }
+            ))
+            day += timedelta(days=1)
+
+        return reports
+
+    def _position_snapshot(self) -> Tuple[List[Dict], List[Dict]]:
+        """
+        当前持仓快照
+
+        Returns:
+            Tuple[List[Dict], List[Dict]]: (多头持仓, 空头持仓)
+        """
+        positions = Position.objects.filter(
+            broker=self.broker,
+            position__gt=0
+        ).annotate(effective_code=_EFFECTIVE_CODE).values_list(
+            'effective_code', 'direction', 'position', 'avg_open_price', 'position_profit'
+        )
+
+        long_positions = []
+        short_positions = []
+
+        for code, direction, volume, avg_price, profit in positions:
+            pos_data = {
+                'code': code,
+                'direction': direction,
+                'volume': volume,
+                'avg_price': avg_price,
+                'profit': float(profit or 0),
+            }
+            if direction == '0':  # LONG
+                long_positions.append(pos_data)
+            else:
+                short_positions.append(pos_data)
+
+        return long_positions, short_positions
+
+    @_cached_report('weekly', lambda d: (d - timedelta(days=6), d))
     def generate_weekly_report(self, week_end: Optional[date] = None) -> Dict[str, Any]:
         """
         生成周报
@@ -227,15 +601,14 @@ class ReportGenerator:
         total_profit = week_trades.aggregate(Sum('profit'))['profit__sum'] or Decimal('0')
 
         # 按日统计
-        daily_pnl = {}
-        current = week_start
-        while current <= week_end:
-            day_pnl = Trade.objects.filter(
-                broker=self.broker,
-                close_time__date=current
-            ).aggregate(Sum('profit'))['profit__sum'] or Decimal('0')
-            daily_pnl[current.isoformat()] = float(day_pnl)
-            current += timedelta(days=1)
+        pnl_by_day = {
+            row['d']: float(row['pnl'] or 0)
+            for row in week_trades.annotate(
+                d=TruncDate('close_time')
+            ).values('d').annotate(pnl=Sum('profit')).order_by()
+        }
+        dates = [week_start + timedelta(days=i) for i in range(7)]
+        daily_pnl = {d.isoformat(): pnl_by_day.get(d, 0.0) for d in dates}
 
         # 本周新开仓
         new_trades = Trade.objects.filter(
@@ -244,38 +617,33 @@ class ReportGenerator:
             open_time__date__lte=week_end
         )
 
-        # 按品种统计
-        instrument_stats = {}
-        for trade in week_trades:
-            code = trade.code or trade.instrument.product_code
-            if code not in instrument_stats:
-                instrument_stats[code] = {
-                    'trades': 0,
-                    'volume': 0,
-                    'profit': Decimal('0'),
-                }
-            instrument_stats[code]['trades'] += 1
-            instrument_stats[code]['volume'] += trade.shares or 0
-            if trade.profit:
-                instrument_stats[code]['profit'] += trade.profit
+        # 按品种统计 (各品种交易次数之和即本周交易总数)
+        instrument_stats = list(week_trades.annotate(
+            effective_code=_EFFECTIVE_CODE
+        ).values('effective_code').annotate(
+            trades=Count('id'),
+            volume=Sum('shares'),
+            profit=Sum('profit'),
+        ).order_by('effective_code'))
 
         return {
             'week_start': week_start.isoformat(),
             'week_end': week_end.isoformat(),
             'total_profit': float(total_profit),
             'daily_pnl': daily_pnl,
-            'trade_count': week_trades.count(),
+            'trade_count': sum(row['trades'] for row in instrument_stats),
             'new_trades': new_trades.count(),
             'instrument_stats': {
-                k: {
-                    'trades': v['trades'],
-                    'volume': v['volume'],
-                    'profit': float(v['profit'])
+                row['effective_code']: {
+                    'trades': row['trades'],
+                    'volume': row['volume'] or 0,
+                    'profit': float(row['profit'] or 0)
                 }
-                for k, v in instrument_stats.items()
+                for row in instrument_stats
             }
         }
 
+    @_cached_report('monthly', _month_range, performance=True)
     def generate_monthly_report(self, month: Optional[date] = None) -> Dict[str, Any]:
         """
         生成月报
@@ -291,13 +659,7 @@ class ReportGenerator:
 
         # 获取本月第一天和最后一天
         if isinstance(month, date):
-            month_start = month.replace(day=1)
-            # 获取下月第一天减一天
-            if month.month == 12:
-                next_month = month.replace(year=month.year + 1, month=1, day=1)
-            else:
-                next_month = month.replace(month=month.month + 1, day=1)
-            month_end = next_month - timedelta(days=1)
+            month_start, month_end = _month_range(month)
         else:
             month_start = month
             month_end = month
@@ -310,32 +672,34 @@ class ReportGenerator:
             close_time__isnull=False
         )
 
-        total_profit = month_trades.aggregate(Sum('profit'))['profit__sum'] or Decimal('0')
+        stats = self._aggregate_trade_stats(month_trades)
+        total_profit = stats['net'] or Decimal('0')
 
         # 月度收益
         perf_records = Performance.objects.filter(
             broker=self.broker,
             day__gte=month_start,
             day__lte=month_end
-        ).order_by('day')
+        ).order_by('day').values_list(
+            'day',
+            _as_float('NAV'),
+            _as_float('accumulated'),
+            _as_float('capital'),
+        )
 
-        equity_curve = []
-        for perf in perf_records:
-            equity_curve.append({
-                'date': perf.day.isoformat(),
-                'nav': float(perf.NAV or 0),
-                'accumulated': float(perf.accumulated or 0),
-                'capital': float(perf.capital or 0),
-            })
+        equity_curve = [
+            {'date': day.isoformat(), 'nav': nav, 'accumulated': accumulated, 'capital': capital}
+            for day, nav, accumulated, capital in perf_records
+        ]
 
         # 统计
-        total_trades = month_trades.count()
-        winning_trades = month_trades.filter(profit__gt=0).count()
-        losing_trades = month_trades.filter(profit__lt=0).count()
+        total_trades = stats['total']
+        winning_trades = stats['wins']
+        losing_trades = stats['losses']
         win_rate = winning_trades / total_trades if total_trades > 0 else 0
 
-        gross_profit = month_trades.filter(profit__gt=0).aggregate(Sum('profit'))['profit__sum'] or Decimal('0')
-        gross_loss = abs(month_trades.filter(profit__lt=0).aggregate(Sum('profit'))['profit__sum'] or Decimal('0'))
+        gross_profit = stats['gross_profit'] or Decimal('0')
+        gross_loss = abs(stats['gross_loss'] or Decimal('0'))
         profit_factor = float(gross_profit / gross_loss) if gross_loss > 0 else 0
 
         return {
@@ -376,39 +740,37 @@ class ReportGenerator:
         )
 
         # 基本统计
-        total_trades = trades.count()
-        winning_trades = trades.filter(profit__gt=0).count()
-        losing_trades = trades.filter(profit__lt=0).count()
+        stats = self._aggregate_trade_stats(trades)
+        total_trades = stats['total']
+        winning_trades = stats['wins']
+        losing_trades = stats['losses']
         win_rate = winning_trades / total_trades if total_trades > 0 else 0
 
         # 盈亏统计
-        total_profit = trades.filter(profit__gt=0).aggregate(Sum('profit'))['profit__sum'] or Decimal('0')
-        total_loss = abs(trades.filter(profit__lt=0).aggregate(Sum('profit'))['profit__sum'] or Decimal('0'))
+        total_profit = stats['gross_profit'] or Decimal('0')
+        total_loss = abs(stats['gross_loss'] or Decimal('0'))
         net_profit = total_profit - total_loss
 
-        avg_profit = trades.filter(profit__gt=0).aggregate(Avg('profit'))['profit__avg'] or Decimal('0')
-        avg_loss = trades.filter(profit__lt=0).aggregate(Avg('profit'))['profit__avg'] or Decimal('0')
+        avg_profit = stats['avg_profit'] or Decimal('0')
+        avg_loss = stats['avg_loss'] or Decimal('0')
 
         profit_factor = float(total_profit / total_loss) if total_loss > 0 else 0
 
-        # 收益曲线
+        # 收益曲线 (数据库按日汇总，Python单次累加)
         equity_curve = []
-        cumulative_pnl = Decimal('0')
-
-        # 按日期分组
-        daily_pnl = {}
-        for trade in trades.order_by('close_time'):
-            close_date = trade.close_time.date()
-            if close_date not in daily_pnl:
-                daily_pnl[close_date] = Decimal('0')
-            if trade.profit:
-                daily_pnl[close_date] += trade.profit
-
-        for date_key, pnl in sorted(daily_pnl.items()):
+        cumulative_pnl = 0.0
+
+        daily_pnl = trades.annotate(
+            d=TruncDate('close_time')
+        ).values('d').annotate(
+            pnl=Coalesce(Sum(Cast('profit', FloatField())), Value(0.0))
+        ).values_list('d', 'pnl').order_by('d')
+
+        for day, pnl in daily_pnl:
             cumulative_pnl += pnl
             equity_curve.append({
-                'date': date_key.isoformat(),
-                'equity': float(cumulative_pnl)
+                'date': day.isoformat(),
+                'equity': cumulative_pnl
             })
 
         # 最大回撤
@@ -432,28 +794,43 @@ class ReportGenerator:
             equity_curve=equity_curve
         )
 
+    def _aggregate_trade_stats(self, trades) -> Dict[str, Any]:
+        """
+        一次查询汇总交易的胜负次数与盈亏
+
+        Args:
+            trades: Trade查询集
+
+        Returns:
+            Dict: total/wins/losses/net/gross_profit/gross_loss/avg_profit/avg_loss
+        """
+        win, loss = Q(profit__gt=0), Q(profit__lt=0)
+        return trades.aggregate(
+            total=Count('id'),
+            wins=Count('id', filter=win),
+            losses=Count('id', filter=loss),
+            net=Sum('profit'),
+            gross_profit=Sum('profit', filter=win),
+            gross_loss=Sum('profit', filter=loss),
+            avg_profit=Avg('profit', filter=win),
+            avg_loss=Avg('profit', filter=loss),
+        )
+
     def _calculate_max_drawdown_from_curve(self, equity_curve: List[Dict]) -> Dict:
         """从权益曲线计算最大回撤"""
         if not equity_curve:
             return {'amount': 0, 'pct': 0}
 
-        max_equity = 0
-        max_dd = 0
-        max_dd_pct = 0
-
-        for point in equity_curve:
-            equity = point['equity']
-            if equity > max_equity:
-                max_equity = equity
+        eq = np.fromiter((p['equity'] for p in equity_curve), dtype=np.float64, count=len(equity_curve))
 
-            drawdown = max_equity - equity
-            if drawdown > max_dd:
-                max_dd = drawdown
+        # 峰值从0起算
+        peaks = np.maximum(np.maximum.accumulate(eq), 0.0)
+        dd = peaks - eq
+        max_dd = max(float(dd.max()), 0.0)
 
-            if max_equity > 0:
-                dd_pct = drawdown / max_equity
-                if dd_pct > max_dd_pct:
-                    max_dd_pct = dd_pct
+        mask = peaks > 0
+        pct = np.where(mask, dd / np.where(mask, peaks, 1.0), 0.0)
+        max_dd_pct = max(float(pct.max()), 0.0)
 
         return {'amount': max_dd, 'pct': max_dd_pct}
 
@@ -543,87 +920,38 @@ class ReportGenerator:
 
     def _format_daily_html(self, report: DailyReport) -> str:
         """格式化日报HTML"""
-        html = f"""
-        <html>
-        <head>
-            <title>交易日报 {report.date}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                table {{ border-collapse: collapse; width: 100%; margin: 20px 0; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                .positive {{ color: green; }}
-                .negative {{ color: red; }}
-                .section {{ margin: 30px 0; }}
-                h1 {{ color: #333; }}
-                h2 {{ color: #666; }}
-            </style>
-        </head>
-        <body>
-            <h1>交易日报 - {report.date}</h1>
-            <p>账户: {report.broker_name}</p>
-
-            <div class="section">
-                <h2>账户概览</h2>
-                <table>
-                    <tr><th>项目</th><th>值</th></tr>
-                    <tr><td>静态权益</td><td>{report.balance:,.2f}</td></tr>
-                    <tr><td>可用资金</td><td>{report.available:,.2f}</td></tr>
-                    <tr><td>占用保证金</td><td>{report.margin:,.2f}</td></tr>
-                    <tr><td>持仓盈亏</td><td class="{'positive' if report.position_profit >= 0 else 'negative'}">{report.position_profit:,.2f}</td></tr>
-                    <tr><td>总资产</td><td>{report.total_asset:,.2f}</td></tr>
-                </table>
-            </div>
-
-            <div class="section">
-                <h2>今日交易</h2>
-                <table>
-                    <tr><th>项目</th><th>值</th></tr>
-                    <tr><td>交易次数</td><td>{report.trade_count}</td></tr>
-                    <tr><td>成交手数</td><td>{report.trade_volume}</td></tr>
-                    <tr><td>手续费</td><td>{report.trade_commission:,.2f}</td></tr>
-                    <tr><td>平仓盈亏</td><td class="{'positive' if report.close_profit >= 0 else 'negative'}">{report.close_profit:,.2f}</td></tr>
-                </table>
-            </div>
-
-            <div class="section">
-                <h2>当前持仓</h2>
-                <table>
-                    <tr><th>合约</th><th>方向</th><th>手数</th><th>均价</th><th>浮动盈亏</th></tr>
-        """
-
-        for pos in report.long_positions:
-            html += f"""
-                    <tr>
-                        <td>{pos['code']}</td>
-                        <td>多</td>
-                        <td>{pos['volume']}</td>
-                        <td>{pos['avg_price']}</td>
-                        <td class="{'positive' if pos['profit'] >= 0 else 'negative'}">{pos['profit']:,.2f}</td>
-                    </tr>
-            """
-
-        for pos in report.short_positions:
-            html += f"""
-                    <tr>
-                        <td>{pos['code']}</td>
-                        <td>空</td>
-                        <td>{pos['volume']}</td>
-                        <td>{pos['avg_price']}</td>
-                        <td class="{'positive' if pos['profit'] >= 0 else 'negative'}">{pos['profit']:,.2f}</td>
-                    </tr>
-            """
-
-        html += """
-                </table>
-            </div>
-        </body>
-        </html>
-        """
-
-        return html
-
-
-def create_report_generator(broker: Broker) -> ReportGenerator:
+        parts = [_DAILY_HTML_HEAD.format_map({
+            'date': report.date,
+            'broker_name': report.broker_name,
+            'balance': f"{report.balance:,.2f}",
+            'available': f"{report.available:,.2f}",
+            'margin': f"{report.margin:,.2f}",
+            'position_profit_cls': _pnl_class(report.position_profit),
+            'position_profit': f"{report.position_profit:,.2f}",
+            'total_asset': f"{report.total_asset:,.2f}",
+            'trade_count': report.trade_count,
+            'trade_volume': report.trade_volume,
+            'trade_commission': f"{report.trade_commission:,.2f}",
+            'close_profit_cls': _pnl_class(report.close_profit),
+            'close_profit': f"{report.close_profit:,.2f}",
+        })]
+
+        for direction, positions in (('多', report.long_positions), ('空', report.short_positions)):
+            for pos in positions:
+                parts.append(_POS_ROW_HTML.format_map({
+                    'code': pos['code'],
+                    'direction': direction,
+                    'volume': pos['volume'],
+                    'avg_price': pos['avg_price'],
+                    'cls': _pnl_class(pos['profit']),
+                    'profit': f"{pos['profit']:,.2f}",
+                }))
+
+        parts.append(_DAILY_HTML_TAIL)
+
+        return "".join(parts)
+
+
+def create_report_generator(broker: Broker, use_cache: bool = True) -> ReportGenerator:
     """创建报表生成器"""
-    return ReportGenerator(broker)
+    return ReportGenerator(broker, use_cache)
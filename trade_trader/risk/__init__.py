@@ -7,13 +7,17 @@
 - StopEngine: 止损止盈引擎
 - RiskMonitor: 风险监控
 """
-from typing import Optional
+from typing import Optional, Tuple
 from decimal import Decimal
+from dataclasses import dataclass
 import logging
 import datetime
+import threading
+import time
 
+import redis.asyncio as aioredis
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Sum, OuterRef, Subquery
 
 from panel.models import (
     Instrument, Position, Broker, Account,
@@ -24,10 +28,16 @@ from trade_trader.utils.read_config import config
 
 logger = logging.getLogger('RiskEngine')
 
+# 可交易时段位图，下标为 weekday * 24 + hour (简化处理：排除周末；非夜盘合约仅允许日盘 8:00-15:00)
+_DAY_SESSION_MASK = bytes(1 if weekday < 5 and 8 <= hour < 15 else 0 for weekday in range(7) for hour in range(24))
+_NIGHT_SESSION_MASK = bytes(1 if weekday < 5 else 0 for weekday in range(7) for hour in range(24))
+
 
 class RiskCheckResult:
     """风控检查结果"""
 
+    __slots__ = ('passed', 'message', 'code')
+
     def __init__(self, passed: bool, message: str = "", code: str = ""):
         self.passed = passed
         self.message = message
@@ -40,6 +50,168 @@ class RiskCheckResult:
         return f"RiskCheckResult(passed={self.passed}, message='{self.message}', code='{self.code}')"
 
 
+@dataclass(slots=True, frozen=True)
+class _InstrumentView:
+    """
+    风控所需的合约属性快照
+
+    每笔报单构造一次，后续各项检查直接读取字段。合约模型没有的属性
+    由已有字段推算 (交易状态看是否有主力合约，每手保证金由合约乘数和保证金率计算)，
+    无法推算时由对应检查拒单，不放行。
+    """
+    code: str
+    is_trading: bool
+    night_trade: bool
+    margin_per_hand: Optional[Decimal]
+    volume_multiple: Optional[int]
+    margin_rate: Optional[Decimal]
+    max_position: Optional[int]
+    max_market_order_volume: Optional[int]
+    up_limit: Optional[Decimal]
+    down_limit: Optional[Decimal]
+
+    @classmethod
+    def from_instrument(cls, instrument: Instrument) -> '_InstrumentView':
+        get_up_limit = getattr(instrument, 'get_up_limit', None)
+        get_down_limit = getattr(instrument, 'get_down_limit', None)
+        is_trading = getattr(instrument, 'is_trading', None)
+        if is_trading is None:
+            # 没有主力合约的品种无法下单
+            is_trading = bool(instrument.main_code)
+        return cls(
+            code=getattr(instrument, 'code', None) or instrument.main_code or instrument.product_code,
+            is_trading=is_trading,
+            night_trade=instrument.night_trade,
+            margin_per_hand=getattr(instrument, 'margin_per_hand', None),
+            volume_multiple=instrument.volume_multiple,
+            margin_rate=instrument.margin_rate,
+            max_position=getattr(instrument, 'max_position', None),
+            max_market_order_volume=getattr(instrument, 'max_market_order_volume', None),
+            up_limit=get_up_limit() if get_up_limit else None,
+            down_limit=get_down_limit() if get_down_limit else None,
+        )
+
+    def margin_for(self, price: Decimal) -> Optional[Decimal]:
+        """
+        按报单价格计算每手保证金
+
+        Args:
+            price: 报单价格
+
+        Returns:
+            Optional[Decimal]: 每手保证金，缺少合约乘数或保证金率时为 None
+        """
+        if self.margin_per_hand is not None:
+            return self.margin_per_hand
+        if not self.volume_multiple or self.margin_rate is None:
+            return None
+        return price * self.volume_multiple * self.margin_rate
+
+
+class _ShardedBuckets:
+    """
+    分片令牌桶表
+
+    按合约代码哈希分到 16 个分片，每个分片一把锁，
+    不同合约的下单可以并行判断，互不争用同一把锁。
+    """
+    SHARD_COUNT = 16
+
+    __slots__ = ('_shards', '_locks')
+
+    def __init__(self):
+        self._shards: list[dict[str, tuple[float, float]]] = [{} for _ in range(self.SHARD_COUNT)]
+        self._locks = [threading.Lock() for _ in range(self.SHARD_COUNT)]
+
+    def acquire(self, key: str, capacity: float, now: float) -> bool:
+        """
+        尝试从 key 对应的令牌桶取一个令牌
+
+        Args:
+            key: 合约代码
+            capacity: 桶容量 (每分钟令牌数)
+            now: 当前单调时钟时间 (秒)
+
+        Returns:
+            bool: 是否取到令牌
+        """
+        index = hash(key) & (self.SHARD_COUNT - 1)
+        shard = self._shards[index]
+        with self._locks[index]:
+            tokens, last = shard.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * capacity / 60.0)
+            if tokens < 1:
+                shard[key] = (tokens, now)
+                return False
+            shard[key] = (tokens - 1, now)
+            return True
+
+    def clear(self) -> None:
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+
+
+class _RedisBuckets:
+    """
+    Redis 令牌桶表
+
+    令牌桶状态保存在 Redis 哈希 RATE:{namespace}:{code} (tokens, last_ts)，
+    补充和扣减在一个 Lua 脚本中原子完成，一次往返；同一账户的多个进程共享同一限额，
+    不同账户的令牌桶按 namespace 隔开。
+    接口与 _ShardedBuckets 一致但方法为协程，使用事件循环里的 redis.asyncio 客户端，
+    时间取 Redis 服务器时钟。
+    """
+    KEY_PREFIX = 'RATE:'
+
+    # KEYS[1]: 令牌桶键; ARGV[1]: 桶容量 (每分钟令牌数)
+    ACQUIRE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'last_ts')
+local tokens = tonumber(state[1]) or capacity
+local last = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - last) * capacity / 60)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'last_ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return allowed
+"""
+
+    __slots__ = ('_client', '_acquire', '_prefix')
+
+    def __init__(self, client: aioredis.Redis, namespace: str):
+        self._client = client
+        self._prefix = f"{self.KEY_PREFIX}{namespace}:"
+        # register_script 使用 EVALSHA，脚本未缓存时自动回退到 EVAL
+        self._acquire = client.register_script(self.ACQUIRE_SCRIPT)
+
+    async def acquire(self, key: str, capacity: float, now: float) -> bool:
+        """
+        尝试从 key 对应的令牌桶取一个令牌
+
+        Args:
+            key: 合约代码
+            capacity: 桶容量 (每分钟令牌数)
+            now: 本地时钟时间 (未使用，以 Redis 服务器时间为准)
+
+        Returns:
+            bool: 是否取到令牌
+        """
+        return int(await self._acquire(keys=[f"{self._prefix}{key}"], args=[capacity])) == 1
+
+    async def clear(self) -> None:
+        # 只清理本账户的令牌桶，其他账户的限额不受影响
+        keys = [key async for key in self._client.scan_iter(match=f"{self._prefix}*")]
+        if keys:
+            await self._client.delete(*keys)
+
+
 class RiskEngine:
     """
     风控引擎 - 在报单前进行风险检查
@@ -62,12 +234,13 @@ class RiskEngine:
     ERR_RATE_LIMIT = "RISK_006"
     ERR_TRADING_TIME = "RISK_007"
 
-    def __init__(self, broker: Broker):
+    def __init__(self, broker: Broker, redis_client: Optional[aioredis.Redis] = None):
         """
         初始化风控引擎
 
         Args:
             broker: 券商/账户对象
+            redis_client: 共用的 Redis 客户端 (可选，频率限制放在 Redis 时使用，默认按配置新建)
         """
         self.broker = broker
         self.config = config
@@ -85,11 +258,28 @@ class RiskEngine:
         self.price_limit_buffer = self.config.getfloat(
             'RISK', 'price_limit_buffer', fallback=0.001
         )  # 涨跌停板缓冲比例
+        self._price_limit_buffer = Decimal(str(self.price_limit_buffer))
+        # 交易时间判断使用的时区，初始化时取一次
+        self._tz = timezone.get_current_timezone()
+
+        # 频率限制令牌桶: code -> (剩余令牌, 上次补充时间)，多进程部署时放到 Redis 共享
+        self._shared_buckets = self.config.get('RISK', 'rate_limit_backend', fallback='local') == 'redis'
+        if self._shared_buckets:
+            if redis_client is None:
+                redis_client = aioredis.Redis(
+                    host=self.config.get('REDIS', 'host', fallback='localhost'),
+                    port=self.config.getint('REDIS', 'port', fallback=6379),
+                    db=self.config.getint('REDIS', 'db', fallback=0),
+                    decode_responses=True
+                )
+            self._buckets = _RedisBuckets(redis_client, namespace=str(broker.id))
+        else:
+            self._buckets = _ShardedBuckets()
 
-        # 订单计数器
-        self._order_count: dict[str, list[datetime.datetime]] = {}
+        # 持仓缓存: (账户ID, 合约ID, 方向) -> 持仓手数，由成交回报增量维护
+        self._pos_cache: dict[tuple[int, int, int], int] = {}
 
-    def check_order_before_submit(
+    async def check_order_before_submit(
         self,
         instrument: Instrument,
         direction: DirectionType,
@@ -112,208 +302,184 @@ class RiskEngine:
         Returns:
             RiskCheckResult: 检查结果
         """
-        if account is None:
-            account = Account.objects.filter(broker=self.broker).first()
-            if account is None:
-                return RiskCheckResult(False, "未找到账户信息", self.ERR_MARGIN_INSUFFICIENT)
+        # 按开销从低到高排列，首个不通过即返回；涉及数据库的检查放在最后
 
-        # 1. 检查合约状态
-        result = self._check_instrument_status(instrument)
-        if not result:
-            return result
+        # 1. 合约存在、订单数量为正
+        if instrument is None:
+            return _FAIL_NO_INSTRUMENT
+        if volume <= 0:
+            return RiskCheckResult(False, f"订单数量必须大于0，当前: {volume}", self.ERR_ORDER_SIZE)
 
-        # 2. 检查交易时间
-        result = self._check_trading_time(instrument)
-        if not result:
-            return result
+        # 2. 合约状态
+        view = _InstrumentView.from_instrument(instrument)
+        if not view.is_trading:
+            return RiskCheckResult(False, f"合约 {view.code} 不可交易", self.ERR_INSTRUMENT_STATUS)
+
+        # 3. 交易时间
+        now = datetime.datetime.now(self._tz)
+        weekday = now.weekday()
+        mask = _NIGHT_SESSION_MASK if view.night_trade else _DAY_SESSION_MASK
+        if not mask[weekday * 24 + now.hour]:
+            return _FAIL_WEEKEND if weekday >= 5 else _FAIL_TRADING_HOURS
+
+        # 4. 订单数量不超过合约单笔最大手数
+        max_volume = view.max_market_order_volume
+        if max_volume is None:
+            max_volume = 500
+        if volume > max_volume:
+            return RiskCheckResult(
+                False,
+                f"订单数量 {volume} 超过合约最大限制 {max_volume}",
+                self.ERR_ORDER_SIZE
+            )
 
-        # 3. 检查价格限制
-        result = self._check_price_limit(instrument, direction, price)
-        if not result:
-            return result
+        # 5. 价格限制：防止涨停板买入、跌停板卖出 (无法获取涨跌停价时跳过)
+        if view.up_limit is not None and view.down_limit is not None:
+            buffer = price * self._price_limit_buffer
+            if direction == DirectionType.LONG:
+                if price >= view.up_limit - buffer:
+                    return RiskCheckResult(
+                        False,
+                        f"买入价格 {price} 接近或超过涨停板 {view.up_limit}",
+                        self.ERR_PRICE_LIMIT
+                    )
+            elif price <= view.down_limit + buffer:
+                return RiskCheckResult(
+                    False,
+                    f"卖出价格 {price} 接近或低于跌停板 {view.down_limit}",
+                    self.ERR_PRICE_LIMIT
+                )
 
-        # 4. 检查订单数量
-        result = self._check_order_size(instrument, volume)
-        if not result:
-            return result
+        # 6. 账户及持仓 (一次查询)
+        account, current_position = self._prefetch_context(account, instrument, direction)
+        if account is None:
+            return _FAIL_NO_ACCOUNT
 
-        # 5. 检查持仓限额 (仅开仓)
+        # 7. 持仓限额与保证金充足性 (仅开仓)
         if offset == OffsetFlag.Open:
-            result = self._check_position_limit(account, instrument, direction, volume, price)
+            result = self._check_position_limit(view, volume, current_position)
             if not result:
                 return result
 
-            # 6. 检查保证金充足性 (仅开仓)
-            result = self._check_margin_sufficient(account, instrument, volume, price)
+            # 算不出每手保证金时拒单，不按零保证金放行
+            margin_per_hand = view.margin_for(price)
+            if margin_per_hand is None:
+                return RiskCheckResult(False, f"合约 {view.code} 缺少保证金参数", self.ERR_MARGIN_INSUFFICIENT)
+            result = self._check_margin_sufficient(account, volume, margin_per_hand)
             if not result:
                 return result
 
-        # 7. 检查频率限制
-        result = self._check_rate_limit(instrument.code)
-        if not result:
-            return result
-
-        logger.debug(f"风控检查通过: {instrument.code} {direction.label} {volume}手 @{price}")
-        return RiskCheckResult(True, "风控检查通过")
-
-    def _check_instrument_status(self, instrument: Instrument) -> RiskCheckResult:
-        """
-        检查合约状态
-
-        检查合约是否存在、是否已下市、是否在交易中
-        """
-        if instrument is None:
-            return RiskCheckResult(False, "合约不存在", self.ERR_INSTRUMENT_STATUS)
-
-        if not instrument.is_trading:
-            return RiskCheckResult(False, f"合约 {instrument.code} 不可交易", self.ERR_INSTRUMENT_STATUS)
-
-        return RiskCheckResult(True)
-
-    def _check_trading_time(self, instrument: Instrument) -> RiskCheckResult:
-        """
-        检查交易时间
-
-        检查当前是否在合约的交易时间段内
-        """
-        now = timezone.localtime()
-
-        # 获取合约的交易时间段 (需要从Instrument或配置读取)
-        # 这里简化处理，假设合约在正常交易时间
-        # 实际应该根据合约的trading_time字段判断
-
-        # 非交易时间检查：周末
-        if now.weekday() >= 5:  # 周六、周日
-            return RiskCheckResult(False, "周末非交易时间", self.ERR_TRADING_TIME)
-
-        # 简单检查：排除深夜时段 (具体应根据合约交易时间设置)
-        hour = now.hour
-        if instrument.night_trade:
-            # 夜盘合约，允许夜盘交易
-            pass
-        else:
-            # 非夜盘合约，正常日盘时间 (9:00-15:00)
-            if hour < 8 or hour >= 15:
-                return RiskCheckResult(False, "非交易时间段", self.ERR_TRADING_TIME)
+        # 8. 频率限制 (通过其余检查后才消耗令牌)
+        allowed = self._buckets.acquire(view.code, float(self.max_order_per_minute), time.monotonic())
+        if self._shared_buckets:
+            allowed = await allowed
+        if not allowed:
+            return RiskCheckResult(
+                False,
+                f"下单频率过高: 超过每分钟 {self.max_order_per_minute} 次限制",
+                self.ERR_RATE_LIMIT
+            )
 
-        return RiskCheckResult(True)
+        logger.debug(
+            f"风控检查通过: {view.code} {DirectionType.values.get(direction, direction)} {volume}手 @{price}"
+        )
+        return _OK
 
-    def _check_price_limit(
+    def _prefetch_context(
         self,
+        account: Optional[Account],
         instrument: Instrument,
-        direction: DirectionType,
-        price: Decimal
-    ) -> RiskCheckResult:
+        direction: DirectionType
+    ) -> Tuple[Optional[Account], int]:
         """
-        检查价格限制
-
-        防止涨停板买入、跌停板卖出
-        """
-        # 获取最新的涨跌停价格
-        # 这里简化处理，实际应从Redis或数据库获取
-        up_limit = instrument.get_up_limit() if hasattr(instrument, 'get_up_limit') else None
-        down_limit = instrument.get_down_limit() if hasattr(instrument, 'get_down_limit') else None
-
-        if up_limit is None or down_limit is None:
-            # 无法获取涨跌停价格，跳过检查
-            return RiskCheckResult(True)
+        一次查询加载账户及当前合约同方向持仓
 
-        # 添加缓冲区，避免在涨跌停板附近报单
-        buffer = price * self.price_limit_buffer
+        持仓优先取自缓存；未命中时，未传入账户则持仓合计以子查询方式随账户一并取出，
+        结果写入缓存。
 
-        if direction == DirectionType.LONG:
-            # 买入：检查是否超过涨停板 (允许一定的缓冲)
-            if price >= up_limit - buffer:
-                return RiskCheckResult(
-                    False,
-                    f"买入价格 {price} 接近或超过涨停板 {up_limit}",
-                    self.ERR_PRICE_LIMIT
-                )
-        else:  # SHORT
-            # 卖出：检查是否低于跌停板
-            if price <= down_limit + buffer:
-                return RiskCheckResult(
-                    False,
-                    f"卖出价格 {price} 接近或低于跌停板 {down_limit}",
-                    self.ERR_PRICE_LIMIT
-                )
-
-        return RiskCheckResult(True)
-
-    def _check_order_size(
-        self,
-        instrument: Instrument,
-        volume: int
-    ) -> RiskCheckResult:
+        Returns:
+            Tuple[Optional[Account], int]: (账户, 当前持仓手数)
         """
-        检查订单数量
+        key = (self.broker.pk if account is None else account.broker_id, instrument.pk, direction)
+        current_position = self._pos_cache.get(key)
+        positions = Position.objects.filter(instrument=instrument, direction=direction)
 
-        防止异常大单或错误的手数输入
+        if account is None:
+            accounts = Account.objects.filter(broker=self.broker).only('broker_id', 'balance', 'available')
+            if current_position is None:
+                position_total = positions.filter(
+                    broker_id=OuterRef('broker_id')
+                ).values('broker_id').annotate(total=Sum('position')).values('total')
+                accounts = accounts.annotate(current_position=Subquery(position_total))
+            account = accounts.first()
+            if account is None:
+                return None, 0
+            if current_position is None:
+                current_position = self._pos_cache[key] = account.current_position or 0
+        elif current_position is None:
+            current_position = positions.filter(
+                broker_id=account.broker_id
+            ).aggregate(total=Sum('position'))['total'] or 0
+            self._pos_cache[key] = current_position
+
+        return account, current_position
+
+    def register_fill(self, account_id: int, instrument_id: int, direction: DirectionType, delta: int) -> None:
         """
-        if volume <= 0:
-            return RiskCheckResult(False, f"订单数量必须大于0，当前: {volume}", self.ERR_ORDER_SIZE)
+        根据成交回报更新持仓缓存
 
-        # 检查是否超过合约单笔最大手数
-        max_volume = instrument.max_market_order_volume if hasattr(instrument, 'max_market_order_volume') else 500
-        if volume > max_volume:
-            return RiskCheckResult(
-                False,
-                f"订单数量 {volume} 超过合约最大限制 {max_volume}",
-                self.ERR_ORDER_SIZE
-            )
+        未缓存的持仓不做处理，下次检查时从数据库加载；平仓至零时移除缓存。
 
-        return RiskCheckResult(True)
+        Args:
+            account_id: 账户ID (即券商ID)
+            instrument_id: 合约ID
+            direction: 持仓方向
+            delta: 持仓变化手数 (开仓为正，平仓为负)
+        """
+        key = (account_id, instrument_id, direction)
+        current_position = self._pos_cache.get(key)
+        if current_position is None:
+            return
+        current_position += delta
+        if current_position > 0:
+            self._pos_cache[key] = current_position
+        else:
+            del self._pos_cache[key]
+
+    def invalidate_positions(self) -> None:
+        """清空持仓缓存 (持仓与柜台重新同步后调用)"""
+        self._pos_cache.clear()
 
     def _check_position_limit(
         self,
-        account: Account,
-        instrument: Instrument,
-        direction: DirectionType,
+        instrument: _InstrumentView,
         volume: int,
-        price: Decimal
+        current_position: int
     ) -> RiskCheckResult:
         """
         检查持仓限额
 
-        防止持仓超过限额
+        防止持仓超过限额 (资金是否足够由 _check_margin_sufficient 负责)
         """
-        # 获取当前持仓
-        current_position = Position.objects.filter(
-            account=account,
-            instrument=instrument,
-            direction=direction
-        ).aggregate(total=Sum('position'))['total'] or 0
-
         # 计算新持仓
         new_position = current_position + volume
 
         # 检查是否超过合约最大持仓限额
-        if hasattr(instrument, 'max_position'):
-            max_pos = instrument.max_position
-            if new_position > max_pos:
-                return RiskCheckResult(
-                    False,
-                    f"持仓 {new_position} 将超过合约最大持仓限额 {max_pos}",
-                    self.ERR_POSITION_LIMIT
-                )
-
-        # 检查持仓比例
-        available_margin = account.available - (volume * instrument.margin_per_hand)
-        if available_margin < 0:
+        max_pos = instrument.max_position
+        if max_pos is not None and new_position > max_pos:
             return RiskCheckResult(
                 False,
-                f"可用资金不足开仓 {volume} 手",
-                self.ERR_MARGIN_INSUFFICIENT
+                f"持仓 {new_position} 将超过合约最大持仓限额 {max_pos}",
+                self.ERR_POSITION_LIMIT
             )
 
-        return RiskCheckResult(True)
+        return _OK
 
     def _check_margin_sufficient(
         self,
         account: Account,
-        instrument: Instrument,
         volume: int,
-        price: Decimal
+        margin_per_hand: Decimal
     ) -> RiskCheckResult:
         """
         检查保证金充足性
@@ -321,7 +487,7 @@ class RiskEngine:
         确保账户有足够的可用保证金
         """
         # 计算所需保证金
-        required_margin = volume * instrument.margin_per_hand
+        required_margin = volume * margin_per_hand
 
         available = account.available
 
@@ -342,65 +508,34 @@ class RiskEngine:
                     self.ERR_MARGIN_INSUFFICIENT
                 )
 
-        return RiskCheckResult(True)
+        return _OK
 
-    def _check_rate_limit(self, instrument_code: str) -> RiskCheckResult:
-        """
-        检查频率限制
-
-        防止过度交易
-        """
-        now = timezone.localtime()
-
-        # 清理过期的订单记录
-        self._cleanup_old_orders(now)
-
-        # 获取当前合约的订单计数
-        if instrument_code not in self._order_count:
-            self._order_count[instrument_code] = []
-
-        # 检查最近一分钟内的订单数
-        recent_count = len(self._order_count[instrument_code])
-        if recent_count >= self.max_order_per_minute:
-            return RiskCheckResult(
-                False,
-                f"下单频率过高: 最近一分钟内已下单 {recent_count} 次",
-                self.ERR_RATE_LIMIT
-            )
-
-        # 记录本次下单
-        self._order_count[instrument_code].append(now)
-
-        return RiskCheckResult(True)
-
-    def _cleanup_old_orders(self, now: datetime.datetime) -> None:
-        """
-        清理过期的订单记录 (超过1分钟)
-        """
-        cutoff = now - datetime.timedelta(minutes=1)
-        for code in list(self._order_count.keys()):
-            self._order_count[code] = [
-                t for t in self._order_count[code]
-                if t > cutoff
-            ]
-            # 如果没有订单了，删除该合约的计数器
-            if not self._order_count[code]:
-                del self._order_count[code]
-
-    def reset_rate_limit(self) -> None:
+    async def reset_rate_limit(self) -> None:
         """重置频率限制计数器"""
-        self._order_count.clear()
+        if self._shared_buckets:
+            await self._buckets.clear()
+        else:
+            self._buckets.clear()
         logger.info("风控频率限制计数器已重置")
 
 
-def create_risk_engine(broker: Broker) -> RiskEngine:
+# 常用检查结果单例，通过路径不再分配对象
+_OK = RiskCheckResult(True, "风控检查通过")
+_FAIL_NO_INSTRUMENT = RiskCheckResult(False, "合约不存在", RiskEngine.ERR_INSTRUMENT_STATUS)
+_FAIL_NO_ACCOUNT = RiskCheckResult(False, "未找到账户信息", RiskEngine.ERR_MARGIN_INSUFFICIENT)
+_FAIL_WEEKEND = RiskCheckResult(False, "周末非交易时间", RiskEngine.ERR_TRADING_TIME)
+_FAIL_TRADING_HOURS = RiskCheckResult(False, "非交易时间段", RiskEngine.ERR_TRADING_TIME)
+
+
+def create_risk_engine(broker: Broker, redis_client: Optional[aioredis.Redis] = None) -> RiskEngine:
     """
     创建风控引擎的工厂函数
 
     Args:
         broker: 券商/账户对象
+        redis_client: 共用的 Redis 客户端 (可选)
 
     Returns:
         RiskEngine: 风控引擎实例
     """
-    return RiskEngine(broker)
+    return RiskEngine(broker, redis_client)
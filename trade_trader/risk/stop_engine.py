@@ -9,12 +9,17 @@
 - ATR止损
 - 时间止损
 """
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterable, Callable
 from decimal import Decimal
+import asyncio
+import json
 import logging
 from datetime import datetime
 from enum import Enum
 
+import numpy as np
+import redis.asyncio as aioredis
+
 from django.utils import timezone
 
 from panel.models import (
@@ -26,6 +31,63 @@ from trade_trader.utils.read_config import config
 
 logger = logging.getLogger('StopEngine')
 
+# _StopBook 中止损单的比较方式
+_KIND_LEVEL = 0       # 固定价格/百分比: 与 stop 比较
+_KIND_TRAIL_ABS = 1   # 移动止损，绝对距离
+_KIND_TRAIL_PCT = 2   # 移动止损，百分比系数
+_KIND_NONE = 3        # 不触发 (ATR 等)
+
+try:
+    from numba import njit
+
+    @njit(cache=True)
+    def _evaluate_stops(prices, kinds, is_long, stops, trails, extremes, moved):
+        """
+        逐个比较止损价 (编译为机器码)
+
+        移动止损的最高价(多)/最低价(空)就地更新到 extremes，更新过的位置在 moved 中置位。
+
+        Returns:
+            np.ndarray: 触发止损的布尔掩码
+        """
+        n = prices.shape[0]
+        hit = np.zeros(n, dtype=np.bool_)
+        for i in range(n):
+            kind = kinds[i]
+            if kind == _KIND_NONE:
+                continue
+            p = prices[i]
+            if kind == _KIND_LEVEL:
+                stop = stops[i]
+            else:
+                e = extremes[i]
+                if np.isnan(e) or (p > e if is_long[i] else p < e):
+                    e = p
+                    extremes[i] = p
+                    moved[i] = True
+                if kind == _KIND_TRAIL_ABS:
+                    stop = e - trails[i] if is_long[i] else e + trails[i]
+                else:
+                    stop = e * trails[i]
+            hit[i] = p <= stop if is_long[i] else p >= stop
+        return hit
+except ImportError:
+    def _evaluate_stops(prices, kinds, is_long, stops, trails, extremes, moved):
+        """
+        比较止损价 (NumPy 向量化实现，未安装 numba 时使用)
+
+        移动止损的最高价(多)/最低价(空)就地更新到 extremes，更新过的位置在 moved 中置位。
+
+        Returns:
+            np.ndarray: 触发止损的布尔掩码
+        """
+        trailing = (kinds == _KIND_TRAIL_ABS) | (kinds == _KIND_TRAIL_PCT)
+        moved |= trailing & (np.isnan(extremes) | np.where(is_long, prices > extremes, prices < extremes))
+        extremes[moved] = prices[moved]
+        stop = np.where(kinds == _KIND_TRAIL_ABS, np.where(is_long, extremes - trails, extremes + trails), stops)
+        stop = np.where(kinds == _KIND_TRAIL_PCT, extremes * trails, stop)
+        return (kinds != _KIND_NONE) & np.where(is_long, prices <= stop, prices >= stop)
+
 
 class StopType(Enum):
     """止损类型"""
@@ -39,6 +101,14 @@ class StopType(Enum):
 class StopOrder:
     """止损单"""
 
+    __slots__ = (
+        'position_id', 'stop_type', 'stop_price', 'stop_percentage', 'atr_multiple',
+        'trailing_distance', 'exit_time', 'direction', 'code', 'created_at', 'updated_at',
+        'triggered', 'highest_price', 'lowest_price', 'percentage_stop_price',
+        'percentage_base_price', '_trail_factor', '_stop_price_f', '_trail_distance_f',
+        '_trail_factor_f', '_extreme_f', '_check_fn',
+    )
+
     def __init__(
         self,
         position_id: int,
@@ -58,11 +128,85 @@ class StopOrder:
         self.trailing_distance = trailing_distance
         self.exit_time = exit_time
         self.direction = direction
+        self.code: Optional[str] = None  # 持仓合约代码，注册时填入
         self.created_at = timezone.now()
         self.updated_at = timezone.now()
         self.triggered = False
         self.highest_price: Optional[Decimal] = None  # 用于移动止损
         self.lowest_price: Optional[Decimal] = None   # 用于空头移动止损
+        # 注册时预先计算，避免每个tick重复构造Decimal
+        self.percentage_stop_price: Optional[Decimal] = None  # 百分比止损价
+        self.percentage_base_price: Optional[Decimal] = None  # 计算百分比止损价时的开仓均价
+        self._trail_factor: Optional[Decimal] = None          # 百分比移动止损系数
+        # 浮点比较路径使用的缓存
+        self._stop_price_f: Optional[float] = None   # 固定/百分比止损价
+        self._trail_distance_f: Optional[float] = None  # 移动止损绝对距离
+        self._trail_factor_f: Optional[float] = None    # 移动止损百分比系数
+        self._extreme_f: Optional[float] = None         # 移动止损最高价(多)/最低价(空)
+        # 按类型和方向绑定的浮点检查函数 (stop_order, position, price) -> (是否触发, 止损价)
+        self._check_fn: Optional[Callable] = None
+
+
+class _StopBook:
+    """
+    止损单的列式 (SoA) 镜像
+
+    止损单较多时 check_and_trigger 用它一次性比较全部止损价。
+    由 stop_orders 构建，注册止损单后失效重建；取消只做墓碑标记。
+    """
+    KIND_LEVEL = _KIND_LEVEL
+    KIND_TRAIL_ABS = _KIND_TRAIL_ABS
+    KIND_TRAIL_PCT = _KIND_TRAIL_PCT
+    KIND_NONE = _KIND_NONE
+
+    def __init__(self, stop_orders: Iterable[StopOrder]):
+        self.orders: List[StopOrder] = []
+        self.codes: List[Optional[str]] = []
+        self.rows: Dict[int, int] = {}
+        code_index: Dict[Optional[str], int] = {}
+        code_idx, kinds, is_long, stops, trails, extremes = [], [], [], [], [], []
+        nan = float('nan')
+
+        for stop_order in stop_orders:
+            if stop_order.triggered:
+                continue
+            ci = code_index.get(stop_order.code)
+            if ci is None:
+                ci = code_index[stop_order.code] = len(self.codes)
+                self.codes.append(stop_order.code)
+
+            kind, stop, trail = self.KIND_NONE, nan, nan
+            if stop_order.stop_type in (StopType.FIXED_PRICE, StopType.PERCENTAGE):
+                if stop_order._stop_price_f is not None:
+                    kind, stop = self.KIND_LEVEL, stop_order._stop_price_f
+            elif stop_order.stop_type == StopType.TRAILING:
+                if stop_order._trail_factor_f is not None:
+                    kind, trail = self.KIND_TRAIL_PCT, stop_order._trail_factor_f
+                elif stop_order._trail_distance_f is not None:
+                    kind, trail = self.KIND_TRAIL_ABS, stop_order._trail_distance_f
+
+            self.rows[stop_order.position_id] = len(self.orders)
+            self.orders.append(stop_order)
+            code_idx.append(ci)
+            kinds.append(kind)
+            is_long.append(stop_order.direction == DirectionType.LONG)
+            stops.append(stop)
+            trails.append(trail)
+            extremes.append(nan if stop_order._extreme_f is None else stop_order._extreme_f)
+
+        self.code_idx = np.array(code_idx, dtype=np.intp)
+        self.kind = np.array(kinds, dtype=np.int8)
+        self.is_long = np.array(is_long, dtype=bool)
+        self.stop = np.array(stops, dtype=np.float64)
+        self.trail = np.array(trails, dtype=np.float64)
+        self.extreme = np.array(extremes, dtype=np.float64)
+        self.alive = np.ones(len(self.orders), dtype=bool)
+
+    def discard(self, position_id: int) -> None:
+        """标记止损单失效"""
+        row = self.rows.pop(position_id, None)
+        if row is not None:
+            self.alive[row] = False
 
 
 class StopEngine:
@@ -76,17 +220,23 @@ class StopEngine:
     4. 管理移动止损
     """
 
-    def __init__(self, strategy: Strategy, broker: Broker):
+    # 止损单数量达到该值时使用 NumPy 向量化检查
+    VECTORIZE_MIN_STOPS = 1000
+
+    def __init__(self, strategy: Strategy, broker: Broker, redis_client: Optional[aioredis.Redis] = None):
         """
         初始化止损引擎
 
         Args:
             strategy: 策略对象
             broker: 券商对象
+            redis_client: 共用的 Redis 客户端 (可选，开启持久化时使用，默认按配置新建)
         """
         self.strategy = strategy
         self.broker = broker
         self.stop_orders: Dict[int, StopOrder] = {}  # position_id -> StopOrder
+        self._book: Optional[_StopBook] = None  # 向量化检查用的列式镜像
+        self._by_code: Dict[str, set[int]] = {}  # code -> position_id 集合，只检查有行情的止损单
 
         # 从配置读取默认参数
         self.default_stop_loss_pct = config.getfloat(
@@ -98,6 +248,25 @@ class StopEngine:
         self.check_interval = config.getint(
             'STOP', 'check_interval', fallback=1
         )  # 检查间隔 (秒)
+        self.float_compare = config.getboolean(
+            'STOP', 'float_compare', fallback=True
+        )  # 止损比较使用浮点数 (关闭则全程Decimal精确比较)
+
+        # 止损单保存到 Redis 哈希 STOP:{策略ID}，供其他进程或重启后恢复
+        self._redis: Optional[aioredis.Redis] = None
+        self._redis_key = f"STOP:{strategy.id}"
+        if config.getboolean('STOP', 'redis_persist', fallback=False):
+            self._redis = redis_client or aioredis.Redis(
+                host=config.get('REDIS', 'host', fallback='localhost'),
+                port=config.getint('REDIS', 'port', fallback=6379),
+                db=config.getint('REDIS', 'db', fallback=0),
+                decode_responses=True
+            )
+        # 待写入 Redis 的改动，由后台任务合并成一个 pipeline 写出，不阻塞行情处理
+        self._pending_set: Dict[int, str] = {}
+        self._pending_del: set[int] = set()
+        self._pending_clear = False
+        self._flush_task: Optional[asyncio.Task] = None
 
         logger.info(f"止损止盈引擎初始化完成: 策略={strategy.name}")
 
@@ -124,37 +293,44 @@ class StopEngine:
         Returns:
             bool: 注册是否成功
         """
-        position = Position.objects.filter(id=position_id).first()
-        if position is None:
-            logger.error(f"持仓不存在: {position_id}")
-            return False
+        return self.register_bulk_stop_loss([{
+            'position_id': position_id,
+            'stop_type': stop_type,
+            'stop_price': stop_price,
+            'stop_percentage': stop_percentage,
+            'atr_multiple': atr_multiple,
+            'trailing_distance': trailing_distance,
+        }]) == 1
+
+    def register_bulk_stop_loss(self, specs: List[Dict]) -> int:
+        """
+        批量注册止损单
 
-        if stop_percentage is None:
-            stop_percentage = Decimal(str(self.default_stop_loss_pct))
-
-        stop_order = StopOrder(
-            position_id=position_id,
-            stop_type=stop_type,
-            stop_price=stop_price,
-            stop_percentage=stop_percentage,
-            atr_multiple=atr_multiple,
-            trailing_distance=trailing_distance,
-            direction=position.direction
-        )
+        所有持仓一次查询加载，适合为一批新成交同时设置止损。
 
-        # 初始化移动止损的价格
-        if stop_type == StopType.TRAILING:
-            if position.direction == DirectionType.LONG:
-                stop_order.highest_price = position.avg_open_price
-            else:
-                stop_order.lowest_price = position.avg_open_price
+        Args:
+            specs: 止损参数列表，每项字段同 register_stop_loss 的参数，
+                   stop_type 默认百分比止损，stop_percentage 默认取配置
 
-        self.stop_orders[position_id] = stop_order
-        logger.info(
-            f"注册止损单: position={position_id}, type={stop_type.value}, "
-            f"price={stop_price}, pct={stop_percentage}"
-        )
-        return True
+        Returns:
+            int: 注册成功的数量
+        """
+        default_pct = Decimal(str(self.default_stop_loss_pct))
+        stop_specs = []
+        for spec in specs:
+            stop_spec = dict(spec)
+            stop_spec.setdefault('stop_type', StopType.PERCENTAGE)
+            if stop_spec.get('stop_percentage') is None:
+                stop_spec['stop_percentage'] = default_pct
+            stop_specs.append(stop_spec)
+
+        registered = self._register_stop_orders(stop_specs)
+        for stop_order in registered:
+            logger.info(
+                f"注册止损单: position={stop_order.position_id}, type={stop_order.stop_type.value}, "
+                f"price={stop_order.stop_price}, pct={stop_order.stop_percentage}"
+            )
+        return len(registered)
 
     def register_take_profit(
         self,
@@ -173,21 +349,14 @@ class StopEngine:
         Returns:
             bool: 注册是否成功
         """
-        position = Position.objects.filter(id=position_id).first()
-        if position is None:
-            logger.error(f"持仓不存在: {position_id}")
-            return False
-
         # 止盈使用固定价格止损
-        stop_order = StopOrder(
-            position_id=position_id,
-            stop_type=StopType.FIXED_PRICE,
-            stop_price=take_profit_price,
-            stop_percentage=take_profit_percentage,
-            direction=position.direction
-        )
-
-        self.stop_orders[position_id] = stop_order
+        if not self._register_stop_orders([{
+            'position_id': position_id,
+            'stop_type': StopType.FIXED_PRICE,
+            'stop_price': take_profit_price,
+            'stop_percentage': take_profit_percentage,
+        }]):
+            return False
         logger.info(f"注册止盈单: position={position_id}, price={take_profit_price}")
         return True
 
@@ -208,26 +377,231 @@ class StopEngine:
         Returns:
             bool: 注册是否成功
         """
-        position = Position.objects.filter(id=position_id).first()
-        if position is None:
-            logger.error(f"持仓不存在: {position_id}")
+        if not self._register_stop_orders([{
+            'position_id': position_id,
+            'stop_type': StopType.TRAILING,
+            'trailing_distance': distance if distance else distance_pct,
+        }]):
             return False
+        logger.info(f"注册移动止损: position={position_id}, distance={distance}")
+        return True
 
-        stop_order = StopOrder(
-            position_id=position_id,
-            stop_type=StopType.TRAILING,
-            trailing_distance=distance if distance else distance_pct,
-            direction=position.direction
-        )
+    def _register_stop_orders(self, specs: List[Dict]) -> List[StopOrder]:
+        """
+        按参数创建并登记止损单
 
-        if position.direction == DirectionType.LONG:
-            stop_order.highest_price = position.avg_open_price
-        else:
-            stop_order.lowest_price = position.avg_open_price
+        Args:
+            specs: StopOrder 构造参数列表 (不含 direction)
 
-        self.stop_orders[position_id] = stop_order
-        logger.info(f"注册移动止损: position={position_id}, distance={distance}")
-        return True
+        Returns:
+            List[StopOrder]: 登记成功的止损单
+        """
+        positions = {
+            row['id']: row for row in Position.objects.filter(
+                id__in=[spec['position_id'] for spec in specs]
+            ).values('id', 'code', 'direction', 'avg_open_price')
+        }
+
+        registered = []
+        for spec in specs:
+            position = positions.get(spec['position_id'])
+            if position is None:
+                logger.error(f"持仓不存在: {spec['position_id']}")
+                continue
+
+            stop_order = StopOrder(direction=position['direction'], **spec)
+
+            # 初始化移动止损的价格
+            if stop_order.stop_type == StopType.TRAILING:
+                if position['direction'] == DirectionType.LONG:
+                    stop_order.highest_price = position['avg_open_price']
+                else:
+                    stop_order.lowest_price = position['avg_open_price']
+
+            self._precompute(stop_order, position)
+            previous = self.stop_orders.get(stop_order.position_id)
+            if previous is not None:
+                self._unindex(previous)
+            self.stop_orders[stop_order.position_id] = stop_order
+            self._by_code.setdefault(stop_order.code, set()).add(stop_order.position_id)
+            registered.append(stop_order)
+
+        if registered:
+            self._book = None
+            self._persist(registered)
+        return registered
+
+    async def load_persisted(self) -> int:
+        """
+        从 Redis 恢复止损单
+
+        进程重启或其他进程接管同一策略时调用；持仓已不存在的止损单不恢复。
+
+        Returns:
+            int: 恢复的止损单数量
+        """
+        if self._redis is None:
+            return 0
+
+        saved = {int(pid): json.loads(packed) for pid, packed in (await self._redis.hgetall(self._redis_key)).items()}
+        restored = self._register_stop_orders([self._unpack(pid, data) for pid, data in saved.items()])
+        for stop_order in restored:
+            data = saved[stop_order.position_id]
+            stop_order.created_at = datetime.fromisoformat(data['created_at'])
+            stop_order.triggered = data['triggered']
+            if data['highest_price'] is not None:
+                stop_order.highest_price = Decimal(data['highest_price'])
+            if data['lowest_price'] is not None:
+                stop_order.lowest_price = Decimal(data['lowest_price'])
+            if stop_order.stop_type == StopType.TRAILING:
+                extreme = stop_order.highest_price if stop_order.direction == DirectionType.LONG else stop_order.lowest_price
+                stop_order._extreme_f = None if extreme is None else float(extreme)
+        self._persist(restored)
+
+        logger.info(f"从Redis恢复止损单: {len(restored)}/{len(saved)} 个")
+        return len(restored)
+
+    def _persist(self, stop_orders: Iterable[StopOrder]) -> None:
+        """把止损单加入待写队列 (未开启持久化时忽略)"""
+        if self._redis is None:
+            return
+        for stop_order in stop_orders:
+            self._pending_del.discard(stop_order.position_id)
+            self._pending_set[stop_order.position_id] = self._pack(stop_order)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """有待写改动且没有进行中的写任务时，在当前事件循环上启动一个"""
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        if not (self._pending_set or self._pending_del or self._pending_clear):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 不在事件循环中 (如初始化阶段)，留到下次改动或 flush() 时写出
+            return
+        self._flush_task = loop.create_task(self.flush())
+
+    async def flush(self) -> None:
+        """把待写改动一次写入 Redis，写入期间产生的新改动继续写出"""
+        if self._redis is None:
+            return
+        while self._pending_set or self._pending_del or self._pending_clear:
+            clear, deleted, mapping = self._pending_clear, self._pending_del, self._pending_set
+            self._pending_clear, self._pending_del, self._pending_set = False, set(), {}
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    if clear:
+                        pipe.delete(self._redis_key)
+                    if deleted:
+                        pipe.hdel(self._redis_key, *deleted)
+                    if mapping:
+                        pipe.hset(self._redis_key, mapping=mapping)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f'止损单写入Redis失败: {repr(e)}', exc_info=True)
+                # 失败的改动放回队列等下次重试，期间产生的较新改动优先
+                if not self._pending_clear:
+                    self._pending_clear = clear
+                    self._pending_del.update(pid for pid in deleted if pid not in self._pending_set)
+                    for pid, packed in mapping.items():
+                        if pid not in self._pending_del:
+                            self._pending_set.setdefault(pid, packed)
+                return
+
+    @staticmethod
+    def _pack(stop_order: StopOrder) -> str:
+        """止损单序列化为 JSON，Decimal 保存为字符串"""
+        def dec(value) -> Optional[str]:
+            return None if value is None else str(value)
+
+        distance = stop_order.trailing_distance
+        return json.dumps({
+            'stop_type': stop_order.stop_type.value,
+            'stop_price': dec(stop_order.stop_price),
+            'stop_percentage': dec(stop_order.stop_percentage),
+            'atr_multiple': dec(stop_order.atr_multiple),
+            'trailing_distance': dec(distance),
+            # 移动止损距离为 Decimal 时是绝对距离，否则是百分比
+            'trailing_pct': distance is not None and not isinstance(distance, Decimal),
+            'exit_time': None if stop_order.exit_time is None else stop_order.exit_time.isoformat(),
+            'created_at': stop_order.created_at.isoformat(),
+            'triggered': stop_order.triggered,
+            'highest_price': dec(stop_order.highest_price),
+            'lowest_price': dec(stop_order.lowest_price),
+        })
+
+    @staticmethod
+    def _unpack(position_id: int, data: Dict) -> Dict:
+        """由 _pack 的结果还原 StopOrder 构造参数"""
+        def dec(value) -> Optional[Decimal]:
+            return None if value is None else Decimal(value)
+
+        distance = data['trailing_distance']
+        if distance is not None:
+            distance = float(distance) if data['trailing_pct'] else Decimal(distance)
+        return {
+            'position_id': position_id,
+            'stop_type': StopType(data['stop_type']),
+            'stop_price': dec(data['stop_price']),
+            'stop_percentage': dec(data['stop_percentage']),
+            'atr_multiple': dec(data['atr_multiple']),
+            'trailing_distance': distance,
+            'exit_time': None if data['exit_time'] is None else datetime.fromisoformat(data['exit_time']),
+        }
+
+    @staticmethod
+    def _precompute(stop_order: StopOrder, position: Dict) -> None:
+        """
+        预先计算止损检查用到的常量
+
+        百分比止损价按开仓均价计算一次；百分比移动止损缓存 (1 ± 距离) 系数；
+        按类型和方向绑定浮点检查函数，检查时不再逐个分支判断。
+        """
+        stop_order.code = position['code']
+        is_long = position['direction'] == DirectionType.LONG
+        if stop_order.stop_type == StopType.FIXED_PRICE:
+            if stop_order.stop_price is not None:
+                stop_order._stop_price_f = float(stop_order.stop_price)
+                stop_order._check_fn = StopEngine._fixed_long if is_long else StopEngine._fixed_short
+        elif stop_order.stop_type == StopType.PERCENTAGE:
+            StopEngine._update_percentage_stop(stop_order, position['avg_open_price'])
+            stop_order._check_fn = StopEngine._pct_long if is_long else StopEngine._pct_short
+        elif stop_order.stop_type == StopType.TRAILING and stop_order.trailing_distance is not None:
+            if isinstance(stop_order.trailing_distance, Decimal):
+                stop_order._trail_distance_f = float(stop_order.trailing_distance)
+                stop_order._check_fn = StopEngine._trail_long_abs if is_long else StopEngine._trail_short_abs
+            else:
+                distance = Decimal(str(stop_order.trailing_distance))
+                if is_long:
+                    stop_order._trail_factor = Decimal('1') - distance
+                else:
+                    stop_order._trail_factor = Decimal('1') + distance
+                stop_order._trail_factor_f = float(stop_order._trail_factor)
+                stop_order._check_fn = StopEngine._trail_long_pct if is_long else StopEngine._trail_short_pct
+            extreme = stop_order.highest_price if is_long else stop_order.lowest_price
+            if extreme is not None:
+                stop_order._extreme_f = float(extreme)
+
+    @staticmethod
+    def _update_percentage_stop(stop_order: StopOrder, avg_open_price: Decimal) -> None:
+        """按持仓当前开仓均价计算百分比止损价"""
+        if stop_order.direction == DirectionType.SHORT:
+            factor = Decimal('1') + stop_order.stop_percentage
+        else:
+            factor = Decimal('1') - stop_order.stop_percentage
+        stop_order.percentage_base_price = avg_open_price
+        stop_order.percentage_stop_price = avg_open_price * factor
+        stop_order._stop_price_f = float(stop_order.percentage_stop_price)
+
+    def _unindex(self, stop_order: StopOrder) -> None:
+        """从合约索引中移除止损单"""
+        position_ids = self._by_code.get(stop_order.code)
+        if position_ids is not None:
+            position_ids.discard(stop_order.position_id)
+            if not position_ids:
+                del self._by_code[stop_order.code]
 
     def cancel_stop_order(self, position_id: int) -> bool:
         """
@@ -239,65 +613,227 @@ class StopEngine:
         Returns:
             bool: 取消是否成功
         """
-        if position_id in self.stop_orders:
-            del self.stop_orders[position_id]
+        return self._cancel_stop_orders([position_id]) == 1
+
+    def _cancel_stop_orders(self, position_ids: List[int]) -> int:
+        """
+        批量取消止损单，Redis 中的记录一次删除
+
+        Args:
+            position_ids: 持仓ID列表
+
+        Returns:
+            int: 取消的数量
+        """
+        cancelled = []
+        for position_id in position_ids:
+            stop_order = self.stop_orders.pop(position_id, None)
+            if stop_order is None:
+                continue
+            self._unindex(stop_order)
+            if self._book is not None:
+                self._book.discard(position_id)
+            cancelled.append(position_id)
             logger.info(f"取消止损单: position={position_id}")
-            return True
-        return False
+
+        if cancelled and self._redis is not None:
+            for position_id in cancelled:
+                self._pending_set.pop(position_id, None)
+            self._pending_del.update(cancelled)
+            self._schedule_flush()
+        return len(cancelled)
 
     def check_and_trigger(self, current_prices: Dict[str, Decimal]) -> List[Dict]:
         """
         检查并触发止损
 
+        只检查 current_prices 中有行情的合约，已平仓的止损单在其合约有行情时移除。
+
         Args:
             current_prices: 当前价格字典 {code: price}
 
         Returns:
             List[Dict]: 触发的止损单列表
         """
-        triggered_stops = []
+        if self.float_compare and len(self.stop_orders) >= self.VECTORIZE_MIN_STOPS:
+            return self._check_and_trigger_vectorized(current_prices)
+
+        # 只检查有行情的合约上未触发的止损单
+        position_ids = [
+            position_id
+            for code in current_prices
+            for position_id in self._by_code.get(code, ())
+            if not self.stop_orders[position_id].triggered
+        ]
+        if not position_ids:
+            return []
 
-        for position_id, stop_order in list(self.stop_orders.items()):
-            if stop_order.triggered:
-                continue
+        # 逐个检查会修改止损单状态，列式镜像需重建
+        self._book = None
+        triggered_stops = []
+        changed = []  # 触发或移动止损价格更新过的止损单
+        to_cancel = []  # 已平仓的持仓，检查完成后统一移除止损单
+        positions = {
+            row['id']: row for row in Position.objects.filter(id__in=position_ids).values(
+                'id', 'code', 'direction', 'position', 'avg_open_price'
+            )
+        }
 
-            position = Position.objects.filter(id=position_id).first()
-            if position is None or position.position == 0:
+        for position_id in position_ids:
+            stop_order = self.stop_orders[position_id]
+            position = positions.get(position_id)
+            if position is None or position['position'] == 0:
                 # 持仓已平仓，移除止损单
-                self.cancel_stop_order(position_id)
+                to_cancel.append(position_id)
                 continue
 
             # 获取当前价格
-            current_price = current_prices.get(position.code)
+            current_price = current_prices.get(position['code'])
             if current_price is None:
                 continue
 
-            # 检查止损条件
-            should_trigger, stop_price = self._check_stop_condition(
-                position, stop_order, current_price
-            )
+            # 检查止损条件 (ATR 等未绑定检查函数的类型按 Decimal 路径处理)
+            updated_at = stop_order.updated_at
+            check_fn = stop_order._check_fn if self.float_compare else None
+            if check_fn is not None:
+                should_trigger, stop_price = check_fn(stop_order, position, current_price)
+            else:
+                should_trigger, stop_price = self._check_stop_condition(
+                    position, stop_order, current_price
+                )
+            if should_trigger or stop_order.updated_at is not updated_at:
+                changed.append(stop_order)
 
             if should_trigger:
                 stop_order.triggered = True
                 trigger_info = {
                     'position_id': position_id,
-                    'code': position.code,
-                    'direction': position.direction,
+                    'code': position['code'],
+                    'direction': position['direction'],
                     'current_price': current_price,
                     'stop_price': stop_price,
                     'stop_type': stop_order.stop_type.value,
                 }
                 triggered_stops.append(trigger_info)
                 logger.warning(
-                    f"止损触发: {position.code} {position.direction.label} "
+                    f"止损触发: {position['code']} {DirectionType.values.get(position['direction'], position['direction'])} "
                     f"@{current_price} (止损价: {stop_price})"
                 )
 
+        self._cancel_stop_orders(to_cancel)
+        self._persist(changed)
+        return triggered_stops
+
+    def _check_and_trigger_vectorized(self, current_prices: Dict[str, Decimal]) -> List[Dict]:
+        """
+        向量化检查并触发止损
+
+        与逐个检查结果一致，只是比较在 NumPy 数组上一次完成；
+        只加载有行情的止损单对应的持仓，已平仓的在其合约有行情时移除。
+
+        Args:
+            current_prices: 当前价格字典 {code: price}
+
+        Returns:
+            List[Dict]: 触发的止损单列表
+        """
+        book = self._book
+        if book is None:
+            book = self._book = _StopBook(self.stop_orders.values())
+
+        nan = float('nan')
+        code_prices = np.array(
+            [float(current_prices[code]) if code in current_prices else nan for code in book.codes],
+            dtype=np.float64
+        )
+        prices = code_prices[book.code_idx] if len(book.codes) else np.empty(0)
+        rows = np.flatnonzero(book.alive & ~np.isnan(prices))
+        if rows.size == 0:
+            return []
+
+        position_ids = [book.orders[row].position_id for row in rows]
+        positions = {
+            values['id']: values for values in Position.objects.filter(id__in=position_ids).values(
+                'id', 'code', 'direction', 'position', 'avg_open_price'
+            )
+        }
+
+        # 移除已平仓的止损单；开仓均价变化的百分比止损重新计算
+        valid = np.ones(rows.size, dtype=bool)
+        to_cancel = []
+        for i, row in enumerate(rows):
+            stop_order = book.orders[row]
+            position = positions.get(stop_order.position_id)
+            if position is None or position['position'] == 0:
+                to_cancel.append(stop_order.position_id)
+                valid[i] = False
+            elif (stop_order.stop_type == StopType.PERCENTAGE
+                  and stop_order.percentage_base_price != position['avg_open_price']):
+                self._update_percentage_stop(stop_order, position['avg_open_price'])
+                book.stop[row] = stop_order._stop_price_f
+        self._cancel_stop_orders(to_cancel)
+        rows = rows[valid]
+
+        # 比较止损价，移动止损同时更新最高价(多头)/最低价(空头)
+        extreme = book.extreme[rows]
+        moved = np.zeros(rows.size, dtype=bool)
+        hit = _evaluate_stops(
+            prices[rows], book.kind[rows], book.is_long[rows],
+            book.stop[rows], book.trail[rows], extreme, moved
+        )
+        if moved.any():
+            book.extreme[rows] = extreme
+            now = timezone.now()
+            for row in rows[moved]:
+                stop_order = book.orders[row]
+                price = current_prices[stop_order.code]
+                if book.is_long[row]:
+                    stop_order.highest_price = price
+                else:
+                    stop_order.lowest_price = price
+                stop_order._extreme_f = book.extreme[row]
+                stop_order.updated_at = now
+
+        triggered_stops = []
+        for row in rows[hit]:
+            stop_order = book.orders[row]
+            position = positions[stop_order.position_id]
+            current_price = current_prices[position['code']]
+            if stop_order.stop_type == StopType.FIXED_PRICE:
+                stop_price = stop_order.stop_price
+            elif stop_order.stop_type == StopType.PERCENTAGE:
+                stop_price = stop_order.percentage_stop_price
+            elif book.is_long[row]:
+                stop_price = (stop_order.highest_price - stop_order.trailing_distance
+                              if stop_order._trail_factor is None
+                              else stop_order.highest_price * stop_order._trail_factor)
+            else:
+                stop_price = (stop_order.lowest_price + stop_order.trailing_distance
+                              if stop_order._trail_factor is None
+                              else stop_order.lowest_price * stop_order._trail_factor)
+
+            stop_order.triggered = True
+            book.alive[row] = False
+            trigger_info = {
+                'position_id': stop_order.position_id,
+                'code': position['code'],
+                'direction': position['direction'],
+                'current_price': current_price,
+                'stop_price': stop_price,
+                'stop_type': stop_order.stop_type.value,
+            }
+            triggered_stops.append(trigger_info)
+            logger.warning(
+                f"止损触发: {position['code']} {DirectionType.values.get(position['direction'], position['direction'])} "
+                f"@{current_price} (止损价: {stop_price})"
+            )
+
+        self._persist(book.orders[row] for row in rows[moved | hit])
         return triggered_stops
 
     def _check_stop_condition(
         self,
-        position: Position,
+        position: Dict,
         stop_order: StopOrder,
         current_price: Decimal
     ) -> tuple[bool, Optional[Decimal]]:
@@ -312,25 +848,25 @@ class StopEngine:
         if stop_order.stop_type == StopType.FIXED_PRICE:
             # 固定价格止损
             stop_price = stop_order.stop_price
-            if position.direction == DirectionType.LONG:
+            if position['direction'] == DirectionType.LONG:
                 return current_price <= stop_price, stop_price
             else:
                 return current_price >= stop_price, stop_price
 
         elif stop_order.stop_type == StopType.PERCENTAGE:
-            # 百分比止损
-            stop_price = position.avg_open_price * (Decimal('1') - stop_order.stop_percentage)
-            if position.direction == DirectionType.SHORT:
-                stop_price = position.avg_open_price * (Decimal('1') + stop_order.stop_percentage)
+            # 百分比止损 (开仓均价变化时才重新计算)
+            if stop_order.percentage_base_price != position['avg_open_price']:
+                self._update_percentage_stop(stop_order, position['avg_open_price'])
+            stop_price = stop_order.percentage_stop_price
 
-            if position.direction == DirectionType.LONG:
+            if position['direction'] == DirectionType.LONG:
                 return current_price <= stop_price, stop_price
             else:
                 return current_price >= stop_price, stop_price
 
         elif stop_order.stop_type == StopType.TRAILING:
             # 移动止损
-            if position.direction == DirectionType.LONG:
+            if position['direction'] == DirectionType.LONG:
                 # 多头：更新最高价
                 if stop_order.highest_price is None or current_price > stop_order.highest_price:
                     stop_order.highest_price = current_price
@@ -342,7 +878,7 @@ class StopEngine:
                     stop_price = stop_order.highest_price - stop_order.trailing_distance
                 else:
                     # 百分比距离
-                    stop_price = stop_order.highest_price * (Decimal('1') - stop_order.trailing_distance)
+                    stop_price = stop_order.highest_price * stop_order._trail_factor
 
                 return current_price <= stop_price, stop_price
 
@@ -356,7 +892,7 @@ class StopEngine:
                 if isinstance(stop_order.trailing_distance, Decimal):
                     stop_price = stop_order.lowest_price + stop_order.trailing_distance
                 else:
-                    stop_price = stop_order.lowest_price * (Decimal('1') + stop_order.trailing_distance)
+                    stop_price = stop_order.lowest_price * stop_order._trail_factor
 
                 return current_price >= stop_price, stop_price
 
@@ -367,6 +903,81 @@ class StopEngine:
 
         return False, None
 
+    # 浮点检查函数：注册时按类型和方向绑定到 StopOrder._check_fn，
+    # 比较使用缓存的浮点值，仅在触发时返回 Decimal 止损价用于下游报单。
+
+    @staticmethod
+    def _fixed_long(stop_order: StopOrder, position: Dict, current_price: Decimal):
+        return float(current_price) <= stop_order._stop_price_f, stop_order.stop_price
+
+    @staticmethod
+    def _fixed_short(stop_order: StopOrder, position: Dict, current_price: Decimal):
+        return float(current_price) >= stop_order._stop_price_f, stop_order.stop_price
+
+    @staticmethod
+    def _pct_long(stop_order: StopOrder, position: Dict, current_price: Decimal):
+        if stop_order.percentage_base_price != position['avg_open_price']:
+            StopEngine._update_percentage_stop(stop_order, position['avg_open_price'])
+        return float(current_price) <= stop_order._stop_price_f, stop_order.percentage_stop_price
+
+    @staticmethod
+    def _pct_short(stop_order: StopOrder, position: Dict, current_price: Decimal):
+        if stop_order.percentage_base_price != position['avg_open_price']:
+            StopEngine._update_percentage_stop(stop_order, position['avg_open_price'])
+        return float(current_price) >= stop_order._stop_price_f, stop_order.percentage_stop_price
+
+    @staticmethod
+    def _raise_high(stop_order: StopOrder, current_price: Decimal, price_f: float) -> float:
+        """多头移动止损：更新最高价"""
+        extreme_f = stop_order._extreme_f
+        if extreme_f is None or price_f > extreme_f:
+            stop_order.highest_price = current_price
+            stop_order._extreme_f = extreme_f = price_f
+            stop_order.updated_at = timezone.now()
+        return extreme_f
+
+    @staticmethod
+    def _lower_low(stop_order: StopOrder, current_price: Decimal, price_f: float) -> float:
+        """空头移动止损：更新最低价"""
+        extreme_f = stop_order._extreme_f
+        if extreme_f is None or price_f < extreme_f:
+            stop_order.lowest_price = current_price
+            stop_order._extreme_f = extreme_f = price_f
+            stop_order.updated_at = timezone.now()
+        return extreme_f
+
+    @staticmethod
+    def _trail_long_abs(stop_order: StopOrder, position: Dict, current_price: Decimal):
+        price_f = float(current_price)
+        extreme_f = StopEngine._raise_high(stop_order, current_price, price_f)
+        if not price_f <= extreme_f - stop_order._trail_distance_f:
+            return False, None
+        return True, stop_order.highest_price - stop_order.trailing_distance
+
+    @staticmethod
+    def _trail_long_pct(stop_order: StopOrder, position: Dict, current_price: Decimal):
+        price_f = float(current_price)
+        extreme_f = StopEngine._raise_high(stop_order, current_price, price_f)
+        if not price_f <= extreme_f * stop_order._trail_factor_f:
+            return False, None
+        return True, stop_order.highest_price * stop_order._trail_factor
+
+    @staticmethod
+    def _trail_short_abs(stop_order: StopOrder, position: Dict, current_price: Decimal):
+        price_f = float(current_price)
+        extreme_f = StopEngine._lower_low(stop_order, current_price, price_f)
+        if not price_f >= extreme_f + stop_order._trail_distance_f:
+            return False, None
+        return True, stop_order.lowest_price + stop_order.trailing_distance
+
+    @staticmethod
+    def _trail_short_pct(stop_order: StopOrder, position: Dict, current_price: Decimal):
+        price_f = float(current_price)
+        extreme_f = StopEngine._lower_low(stop_order, current_price, price_f)
+        if not price_f >= extreme_f * stop_order._trail_factor_f:
+            return False, None
+        return True, stop_order.lowest_price * stop_order._trail_factor
+
     def get_stop_order_status(self, position_id: int) -> Optional[Dict]:
         """
         获取止损单状态
@@ -381,12 +992,43 @@ class StopEngine:
         if stop_order is None:
             return None
 
-        position = Position.objects.filter(id=position_id).first()
+        position = Position.objects.filter(id=position_id).values('id', 'direction').first()
         if position is None:
             return None
 
+        return self._status_from(stop_order, position)
+
+    def get_all_stop_orders(self) -> List[Dict]:
+        """
+        获取所有止损单状态
+
+        Returns:
+            List[Dict]: 所有止损单状态列表
+        """
+        positions = {
+            row['id']: row for row in Position.objects.filter(id__in=list(self.stop_orders)).values(
+                'id', 'direction'
+            )
+        }
+        return [
+            self._status_from(stop_order, positions[pid]) if pid in positions else None
+            for pid, stop_order in self.stop_orders.items()
+        ]
+
+    @staticmethod
+    def _status_from(stop_order: StopOrder, position: Dict) -> Dict:
+        """
+        根据止损单和已加载的持仓生成状态信息
+
+        Args:
+            stop_order: 止损单
+            position: 持仓字段字典
+
+        Returns:
+            Dict: 止损单状态信息
+        """
         status = {
-            'position_id': position_id,
+            'position_id': stop_order.position_id,
             'stop_type': stop_order.stop_type.value,
             'triggered': stop_order.triggered,
             'created_at': stop_order.created_at,
@@ -401,41 +1043,37 @@ class StopEngine:
             status['trailing_distance'] = stop_order.trailing_distance
 
         if stop_order.stop_type == StopType.TRAILING:
-            if position.direction == DirectionType.LONG:
+            if position['direction'] == DirectionType.LONG:
                 status['highest_price'] = stop_order.highest_price
             else:
                 status['lowest_price'] = stop_order.lowest_price
 
         return status
 
-    def get_all_stop_orders(self) -> List[Dict]:
-        """
-        获取所有止损单状态
-
-        Returns:
-            List[Dict]: 所有止损单状态列表
-        """
-        return [
-            self.get_stop_order_status(pid)
-            for pid in self.stop_orders.keys()
-        ]
-
     def clear_all(self) -> None:
         """清空所有止损单"""
         count = len(self.stop_orders)
         self.stop_orders.clear()
+        self._by_code.clear()
+        self._book = None
+        if self._redis is not None:
+            self._pending_set.clear()
+            self._pending_del.clear()
+            self._pending_clear = True
+            self._schedule_flush()
         logger.info(f"已清空所有止损单: {count} 个")
 
 
-def create_stop_engine(strategy: Strategy, broker: Broker) -> StopEngine:
+def create_stop_engine(strategy: Strategy, broker: Broker, redis_client: Optional[aioredis.Redis] = None) -> StopEngine:
     """
     创建止损引擎的工厂函数
 
     Args:
         strategy: 策略对象
         broker: 券商对象
+        redis_client: 共用的 Redis 客户端 (可选)
 
     Returns:
         StopEngine: 止损引擎实例
     """
-    return StopEngine(strategy, broker)
+    return StopEngine(strategy, broker, redis_client)
@@ -16,14 +16,14 @@
 from __future__ import annotations
 
 from typing import Any, Callable
-import redis
 import redis.asyncio as aioredis
-import ujson as json
+import orjson
+import numpy as np
 
 import time
 import datetime
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 from django.utils import timezone
 from croniter import croniter
 import asyncio
@@ -34,46 +34,105 @@ from trade_trader.utils.read_config import config
 
 logger = logging.getLogger('BaseModule')
 
+# pub/sub 消息体解析，模块级绑定省去循环内的属性查找
+_loads = orjson.loads
+
+_REDIS_URL = (f"redis://{config.get('REDIS', 'host', fallback='localhost')}:"
+              f"{config.getint('REDIS', 'port', fallback=6379)}/{config.getint('REDIS', 'db', fallback=0)}")
+# 所有模块共用的命令连接池，连接用尽时等待归还而不是报错；订阅连接仍由各模块独占。
+# 在事件循环中首次使用时创建，见 _get_shared_pool()
+_shared_pool: aioredis.BlockingConnectionPool | None = None
+
+# 本线程内各模块共用的事件循环
+_io_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _module_loop() -> asyncio.AbstractEventLoop:
+    """Return the running loop, or one loop shared by every module created outside a loop."""
+    global _io_loop
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    if _io_loop is None or _io_loop.is_closed():
+        _io_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_io_loop)
+    return _io_loop
+
+
+def _get_shared_pool() -> aioredis.BlockingConnectionPool:
+    """Return the shared command pool, creating it on first use from inside the running loop."""
+    global _shared_pool
+    if _shared_pool is None:
+        asyncio.get_running_loop()  # 不在事件循环中调用时抛出 RuntimeError
+        _shared_pool = aioredis.BlockingConnectionPool.from_url(
+            _REDIS_URL, max_connections=config.getint('REDIS', 'max_connections', fallback=32), decode_responses=True)
+    return _shared_pool
+
+
+# 待分发的消息: (处理函数, 频道, 消息体)
+_Dispatch = tuple[Callable[[str, Any], Any], bytes, bytes]
+
 
 class BaseModule(CallbackFunctionContainer, metaclass=ABCMeta):
     """Base module for trading strategies with Redis pub/sub and crontab support."""
 
     io_loop: asyncio.AbstractEventLoop
-    redis_client: aioredis.Redis
-    raw_redis: redis.Redis[bytes]
+    _redis_client: aioredis.Redis | None
     sub_client: aioredis.Redis.pubsub
     initialized: bool
     sub_tasks: list[asyncio.Task[Any]]
+    handler_concurrency: int
     sub_channels: list[str]
     channel_router: dict[str, Callable[[str, dict[str, Any]], Any]]
     crontab_router: dict[str, dict[str, Any]]
+    _route_table: dict[bytes, Callable[[str, Any], Any]]
+    _cron_keys: list[str]
+    _cron_funcs: list[Callable[[], Any]]
+    _cron_next: np.ndarray
+    _cron_handle: asyncio.TimerHandle | None
+    _clock_handle: asyncio.TimerHandle | None
     datetime: datetime.datetime | None
     time: float | None
     loop_time: float | None
 
+    # 定时器可能比预定时间略早触发，此误差内的任务视为到期
+    CRON_EPSILON = 0.001
+    # 每个定时任务预先计算的触发时间个数，用完后再批量补充
+    CRON_PREFETCH = 64
+    # 重新对齐墙上时钟与事件循环时钟的间隔 (秒)
+    CLOCK_RECALIBRATE = 3600
+
     def __init__(self) -> None:
         super().__init__()
-        self.io_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.io_loop)
-        self.redis_client = aioredis.from_url(
-            f"redis://{config.get('REDIS', 'host', fallback='localhost')}:"
-            f"{config.getint('REDIS', 'port', fallback=6379)}/{config.getint('REDIS', 'db', fallback=0)}",
-            decode_responses=True)
-        self.raw_redis = redis.Redis(
-            host=config.get('REDIS', 'host', fallback='localhost'),
-            port=config.getint('REDIS', 'port', fallback=6379),
-            db=config.getint('REDIS', 'db', fallback=0),
-            decode_responses=True)
-        self.sub_client = self.redis_client.pubsub()
+        self.io_loop = _module_loop()
+        self._redis_client = None
+        # 订阅连接不解码，消息体以 bytes 直接交给 orjson
+        self.sub_client = aioredis.from_url(_REDIS_URL, decode_responses=False).pubsub()
         self.initialized = False
         self.sub_tasks: list[asyncio.Task[Any]] = []
+        self.handler_concurrency = config.getint('TRADE', 'handler_concurrency', fallback=256)
         self.sub_channels: list[str] = []
         self.channel_router: dict[str, Callable[[str, dict[str, Any]], Any]] = {}
         self.crontab_router: dict[str, dict[str, Any]] = defaultdict(dict)
+        self._route_table: dict[bytes, Callable[[str, Any], Any]] = {}
+        # 定时任务按下标平铺成并列数组，_cron_next 保存各任务下次触发的事件循环时间
+        self._cron_keys: list[str] = []
+        self._cron_funcs: list[Callable[[], Any]] = []
+        self._cron_next: np.ndarray = np.empty(0, dtype=np.float64)
+        self._cron_handle: asyncio.TimerHandle | None = None
+        self._clock_handle: asyncio.TimerHandle | None = None
         self.datetime: datetime.datetime | None = None
         self.time: float | None = None
         self.loop_time: float | None = None
 
+    @property
+    def redis_client(self) -> aioredis.Redis:
+        """Command client on the shared pool, created on first use inside the running loop."""
+        if self._redis_client is None:
+            self._redis_client = aioredis.Redis(connection_pool=_get_shared_pool())
+        return self._redis_client
+
     def _register_callback(self) -> None:
         """Register callback functions for channels and crontabs."""
         self.datetime = timezone.localtime()
@@ -84,33 +143,81 @@ class BaseModule(CallbackFunctionContainer, metaclass=ABCMeta):
                 key = args['crontab']
                 self.crontab_router[key]['func'] = getattr(self, fun_name)
                 self.crontab_router[key]['iter'] = croniter(args['crontab'], self.datetime)
-                self.crontab_router[key]['handle'] = None
+                self._refill_cron(key)
             elif 'channel' in args:
                 self.channel_router[args['channel']] = getattr(self, fun_name)
 
+    def _build_routes(self) -> dict[bytes, Callable[[str, Any], Any]]:
+        """Key channel handlers by the raw pattern bytes Redis echoes in each pmessage."""
+        self._route_table = {pattern.encode(): handler for pattern, handler in self.channel_router.items()}
+        return self._route_table
+
     def _get_next(self, key: str) -> float:
         """Calculate next scheduled time for crontab job."""
-        return self.loop_time + (self.crontab_router[key]['iter'].get_next() - self.time)
-
-    def _call_next(self, key: str) -> None:
-        """Schedule next execution of crontab job."""
-        if self.crontab_router[key]['handle'] is not None:
-            self.crontab_router[key]['handle'].cancel()
-        self.crontab_router[key]['handle'] = self.io_loop.call_at(
-            self._get_next(key), self._call_next, key)
-        self.io_loop.create_task(self.crontab_router[key]['func']())
+        pending = self.crontab_router[key].get('pending')
+        if not pending:
+            pending = self._refill_cron(key)
+        return pending.popleft()
+
+    def _refill_cron(self, key: str) -> deque[float]:
+        """Precompute the next CRON_PREFETCH fire times of a crontab job in loop time."""
+        cron_dict = self.crontab_router[key]
+        get_next = cron_dict['iter'].get_next
+        offset = self.loop_time - self.time
+        cron_dict['pending'] = deque(offset + get_next() for _ in range(self.CRON_PREFETCH))
+        return cron_dict['pending']
+
+    def _build_cron_table(self) -> None:
+        """Lay out registered crontab jobs as parallel arrays indexed by job."""
+        self._cron_keys = list(self.crontab_router)
+        self._cron_funcs = [self.crontab_router[key]['func'] for key in self._cron_keys]
+        self._cron_next = np.fromiter((self._get_next(key) for key in self._cron_keys),
+                                      dtype=np.float64, count=len(self._cron_keys))
+
+    def _recalibrate_clock(self) -> None:
+        """Re-sample the wall and loop clocks and shift already scheduled fire times by the drift."""
+        old_offset = self.loop_time - self.time
+        self.time = time.time()
+        self.loop_time = self.io_loop.time()
+        # 预取的触发时间已换算成事件循环时间，墙上时钟漂移后需要整体平移
+        delta = (self.loop_time - self.time) - old_offset
+        if delta:
+            for cron_dict in self.crontab_router.values():
+                pending = cron_dict.get('pending')
+                if pending:
+                    cron_dict['pending'] = deque(t + delta for t in pending)
+            self._cron_next += delta
+            self._arm_cron()
+        self._clock_handle = self.io_loop.call_later(self.CLOCK_RECALIBRATE, self._recalibrate_clock)
+
+    def _arm_cron(self) -> None:
+        """Set the single crontab timer to fire at the earliest scheduled job."""
+        if self._cron_handle is not None:
+            self._cron_handle.cancel()
+            self._cron_handle = None
+        if self._cron_next.size:
+            self._cron_handle = self.io_loop.call_at(float(self._cron_next.min()), self._run_due)
+
+    def _run_due(self) -> None:
+        """Start every crontab job that is due and reschedule it."""
+        self._cron_handle = None
+        deadline = self.io_loop.time() + self.CRON_EPSILON
+        for i in np.flatnonzero(self._cron_next <= deadline).tolist():
+            self.io_loop.create_task(self._cron_funcs[i]())
+            self._cron_next[i] = self._get_next(self._cron_keys[i])
+        self._arm_cron()
 
     async def install(self) -> None:
         """Install the module, subscribing to channels and scheduling crontabs."""
         try:
             self._register_callback()
+            self._build_routes()
             await self.sub_client.psubscribe(*self.channel_router.keys())
             asyncio.run_coroutine_threadsafe(self._msg_reader(), self.io_loop)
-            for key, cron_dict in self.crontab_router.items():
-                if cron_dict['handle'] is not None:
-                    cron_dict['handle'].cancel()
-                cron_dict['handle'] = self.io_loop.call_at(
-                    self._get_next(key), self._call_next, key)
+            self._build_cron_table()
+            self._arm_cron()
+            if self._cron_keys:
+                self._clock_handle = self.io_loop.call_later(self.CLOCK_RECALIBRATE, self._recalibrate_clock)
             self.initialized = True
             logger.debug('%s plugin installed', type(self).__name__)
         except Exception as e:
@@ -122,27 +229,66 @@ class BaseModule(CallbackFunctionContainer, metaclass=ABCMeta):
             await self.sub_client.punsubscribe()
             self.sub_tasks.clear()
             await self.sub_client.close()
-            for key, cron_dict in self.crontab_router.items():
-                if cron_dict['handle'] is not None:
-                    cron_dict['handle'].cancel()
-                    cron_dict['handle'] = None
+            self._cron_next = np.empty(0, dtype=np.float64)
+            self._arm_cron()
+            if self._clock_handle is not None:
+                self._clock_handle.cancel()
+                self._clock_handle = None
             self.initialized = False
             logger.debug('%s plugin uninstalled', type(self).__name__)
         except Exception as e:
             logger.error('%s plugin uninstall failed: %s', type(self).__name__, repr(e), exc_info=True)
 
     async def _msg_reader(self) -> None:
-        """Read messages from Redis pub/sub and dispatch to handlers."""
-        async for msg in self.sub_client.listen():
-            if msg['type'] == 'pmessage':
-                channel = msg['channel']
-                pattern = msg['pattern']
-                data = json.loads(msg['data'])
-                self.io_loop.create_task(self.channel_router[pattern](channel, data))
-            elif msg['type'] == 'punsubscribe':
-                break
+        """Read messages from Redis pub/sub and dispatch to handlers.
+
+        Blocks for the first message, then drains whatever is already buffered
+        without waiting and queues the whole batch. A fixed pool of
+        ``handler_concurrency`` workers runs the handlers, so a burst of
+        messages neither spawns one task per message nor runs unbounded.
+        """
+        queue: asyncio.Queue[_Dispatch] = asyncio.Queue(maxsize=self.handler_concurrency)
+        # 订阅连接不解码，按 bytes 形式的 pattern 直接取到处理函数
+        router = self._route_table or self._build_routes()
+        get_message = self.sub_client.get_message
+        put = queue.put
+        workers = [asyncio.create_task(self._dispatch_worker(queue)) for _ in range(self.handler_concurrency)]
+        try:
+            running = True
+            while running:
+                batch: list[_Dispatch] = []
+                append = batch.append
+                msg = await get_message(timeout=None)
+                while msg is not None:
+                    mtype = msg['type']
+                    if mtype == 'pmessage':
+                        append((router[msg['pattern']], msg['channel'], msg['data']))
+                    elif mtype == 'punsubscribe':
+                        running = False
+                        break
+                    msg = await get_message(timeout=0)
+                for item in batch:
+                    await put(item)
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
         logger.debug('%s quit _msg_reader!', type(self).__name__)
 
+    async def _dispatch_worker(self, queue: asyncio.Queue[_Dispatch]) -> None:
+        """Run channel handlers for queued messages one at a time."""
+        get, task_done = queue.get, queue.task_done
+        loads = _loads
+        while True:
+            handler, channel, data = await get()
+            try:
+                await handler(channel.decode(), loads(data))
+            except Exception as e:
+                logger.error('%s handler failed on %s: %s', type(self).__name__, channel, repr(e), exc_info=True)
+            finally:
+                task_done()
+
     async def start(self) -> None:
         """Start the module."""
         await self.install()
@@ -241,6 +387,51 @@ class MultiStrategyManager:
             logger.error("停止策略失败 %s: %s", name, repr(e), exc_info=True)
             return False
 
+    async def _start_one(self, name: str) -> bool:
+        """
+        启动策略并等待其安装完成
+
+        Args:
+            name: 策略名称
+
+        Returns:
+            bool: 是否成功启动
+        """
+        if self.strategy_status.get(name, False):
+            logger.warning("策略已在运行: %s", name)
+            return False
+
+        try:
+            await self.strategies[name].start()
+            self.strategy_status[name] = True
+            logger.info("启动策略: %s", name)
+            return True
+        except Exception as e:
+            logger.error("启动策略失败 %s: %s", name, repr(e), exc_info=True)
+            return False
+
+    async def _stop_one(self, name: str) -> bool:
+        """
+        停止策略并等待其卸载完成
+
+        Args:
+            name: 策略名称
+
+        Returns:
+            bool: 是否成功停止
+        """
+        if not self.strategy_status.get(name, False):
+            return True
+
+        try:
+            await self.strategies[name].stop()
+            self.strategy_status[name] = False
+            logger.info("停止策略: %s", name)
+            return True
+        except Exception as e:
+            logger.error("停止策略失败 %s: %s", name, repr(e), exc_info=True)
+            return False
+
     def start_all(self) -> None:
         """启动所有策略"""
         for name in self.strategies.keys():
@@ -251,6 +442,14 @@ class MultiStrategyManager:
         for name in list(self.strategies.keys()):
             self.stop_strategy(name)
 
+    async def async_start_all(self) -> None:
+        """并发启动所有策略，等待全部启动完成"""
+        await asyncio.gather(*(self._start_one(name) for name in list(self.strategies)))
+
+    async def async_stop_all(self) -> None:
+        """并发停止所有策略，等待全部停止完成"""
+        await asyncio.gather(*(self._stop_one(name) for name in list(self.strategies)))
+
     def get_status(self, name: str | None = None) -> dict[str, bool]:
         """
         获取策略状态
@@ -81,26 +81,34 @@ class TradeStrategy(BaseModule):
         self.__cur_pos = dict()  # 持有头寸
         self.__re_extract_code = re.compile(r'([a-zA-Z]*)(\d+)')  # 提合约字母部分 IF1509 -> IF
         self.__re_extract_name = re.compile('(.*?)([0-9]+)(.*?)$')  # 提取合约文字部分
-        self.__trading_day = timezone.make_aware(datetime.datetime.strptime(self.raw_redis.get("TradingDay") + '08', '%Y%m%d%H'))
-        self.__last_trading_day = timezone.make_aware(datetime.datetime.strptime(self.raw_redis.get("LastTradingDay") + '08', '%Y%m%d%H'))
+        self.__trading_day: Optional[datetime.datetime] = None  # start() 时从 Redis 读取
+        self.__last_trading_day: Optional[datetime.datetime] = None
 
-        # 初始化风控引擎
+        # 风控引擎在 start() 中创建
         self._risk_engine: Optional[RiskEngine] = None
         self._stop_engine: Optional[StopEngine] = None
         self._risk_enabled = config.getboolean('RISK', 'enabled', fallback=True)
 
+    async def start(self):
+        trading_day, last_trading_day = await self.redis_client.mget('TradingDay', 'LastTradingDay')
+        self.__trading_day = timezone.make_aware(datetime.datetime.strptime(trading_day + '08', '%Y%m%d%H'))
+        self.__last_trading_day = timezone.make_aware(datetime.datetime.strptime(last_trading_day + '08', '%Y%m%d%H'))
+        # 风控引擎共用命令连接池，在事件循环中创建
         if self._risk_enabled:
             try:
-                self._risk_engine = create_risk_engine(self.__broker)
-                self._stop_engine = create_stop_engine(self.__strategy, self.__broker)
+                self._risk_engine = create_risk_engine(self.__broker, self.redis_client)
+                self._stop_engine = create_stop_engine(self.__strategy, self.__broker, self.redis_client)
                 logger.info(f"风控引擎已启用: RiskEngine={self._risk_engine is not None}, StopEngine={self._stop_engine is not None}")
             except Exception as e:
                 logger.warning(f'风控引擎初始化失败: {repr(e)}', exc_info=True)
                 self._risk_enabled = False
-
-    async def start(self):
+        if self._stop_engine:
+            try:
+                await self._stop_engine.load_persisted()
+            except Exception as e:
+                logger.warning(f'恢复止损单失败: {repr(e)}', exc_info=True)
         await self.install()
-        self.raw_redis.set('HEARTBEAT:TRADER', 1, ex=61)
+        await self.redis_client.set('HEARTBEAT:TRADER', 1, ex=61)
         today = timezone.localtime()
         now = int(today.strftime('%H%M'))
         if today.isoweekday() < 6 and (820 <= now <= 1550 or 2010 <= now <= 2359):  # 非交易时间查不到数据
@@ -116,7 +124,7 @@ class TradeStrategy(BaseModule):
                 elif order['OrderSubmitStatus'] == ApiStruct.OSS_Accepted:
                     self.save_order(order)
             await self.refresh_position()
-        # today = timezone.make_aware(datetime.datetime.strptime(self.raw_redis.get('LastTradingDay'), '%Y%m%d'))
+        # today = timezone.make_aware(datetime.datetime.strptime(await self.redis_client.get('LastTradingDay'), '%Y%m%d'))
         # self.calculate(today, create_main_bar=False)
         # await self.processing_signal3()
 
@@ -186,6 +194,8 @@ class TradeStrategy(BaseModule):
                         direction=DirectionType.values[pos['Direction']], avg_entry_price=Decimal(pos['OpenPrice']), shares=pos['Volume'],
                         open_time=timezone.make_aware(datetime.datetime.strptime(pos['OpenDate'] + '08', '%Y%m%d%H')), frozen_margin=Decimal(pos['Margin']),
                         cost=pos['Volume'] * Decimal(pos['OpenPrice']) * inst.fee_money * inst.volume_multiple + pos['Volume'] * inst.fee_volume)
+            if self._risk_engine:
+                self._risk_engine.invalidate_positions()
             logger.debug('更新持仓完成!')
         except Exception as e:
             logger.warning(f'refresh_position 发生错误: {repr(e)}', exc_info=True)
@@ -254,10 +264,10 @@ class TradeStrategy(BaseModule):
         # 这个函数只能处理持有单一方向仓位的情况，若同时持有多空的头寸，返回结果不正确
         return self.__shares[inst_id][0]
 
-    def async_query(self, query_type: str, **kwargs):
+    async def async_query(self, query_type: str, **kwargs):
         request_id = get_next_id()
         kwargs['RequestID'] = request_id
-        self.raw_redis.publish(self.__request_format.format('ReqQry' + query_type), json.dumps(kwargs))
+        await self.redis_client.publish(self.__request_format.format('ReqQry' + query_type), json.dumps(kwargs))
 
     @staticmethod
     async def query_reader(pb: aioredis.client.PubSub):
@@ -281,7 +291,7 @@ class TradeStrategy(BaseModule):
             channel_rsp_err = self.__trade_response_format.format('OnRspError', request_id)
             await sub_client.psubscribe(channel_rsp_qry, channel_rsp_err)
             task = asyncio.create_task(self.query_reader(sub_client))
-            self.raw_redis.publish(self.__request_format.format('ReqQry' + query_type), json.dumps(kwargs))
+            await self.redis_client.publish(self.__request_format.format('ReqQry' + query_type), json.dumps(kwargs))
             await asyncio.wait_for(task, HANDLER_TIME_OUT)
             await sub_client.punsubscribe()
             await sub_client.close()
@@ -302,7 +312,7 @@ class TradeStrategy(BaseModule):
             channel_rsp_err = self.__market_response_format.format('OnRspError', 0)
             await sub_client.psubscribe(channel_rsp_dat, channel_rsp_err)
             task = asyncio.create_task(self.query_reader(sub_client))
-            self.raw_redis.publish(self.__request_format.format('SubscribeMarketData'), json.dumps(inst_ids))
+            await self.redis_client.publish(self.__request_format.format('SubscribeMarketData'), json.dumps(inst_ids))
             await asyncio.wait_for(task, HANDLER_TIME_OUT)
             await sub_client.punsubscribe()
             await sub_client.close()
@@ -323,7 +333,7 @@ class TradeStrategy(BaseModule):
             channel_rsp_err = self.__market_response_format.format('OnRspError', 0)
             await sub_client.psubscribe(channel_rsp_dat, channel_rsp_err)
             task = asyncio.create_task(self.query_reader(sub_client))
-            self.raw_redis.publish(self.__request_format.format('UnSubscribeMarketData'), json.dumps(inst_ids))
+            await self.redis_client.publish(self.__request_format.format('UnSubscribeMarketData'), json.dumps(inst_ids))
             await asyncio.wait_for(task, HANDLER_TIME_OUT)
             await sub_client.punsubscribe()
             await sub_client.close()
@@ -335,11 +345,11 @@ class TradeStrategy(BaseModule):
                 await sub_client.close()
             return None
 
-    def ReqOrderInsert(self, sig: Signal):
+    async def ReqOrderInsert(self, sig: Signal):
         try:
             # 风控检查
             if self._risk_enabled and self._risk_engine:
-                risk_check = self._check_order_risk(sig)
+                risk_check = await self._check_order_risk(sig)
                 if not risk_check.passed:
                     logger.warning(f"风控拒绝订单: {sig.instrument} {sig.type} {sig.volume}手 @{sig.price} - {risk_check.message}")
                     return
@@ -382,11 +392,11 @@ class TradeStrategy(BaseModule):
                         broker=self.__broker, strategy=self.__strategy, code=sig.instrument.last_main, shares=sig.volume).first()
                     param_dict['Direction'] = ApiStruct.D_Buy if pos.direction == DirectionType.values[DirectionType.LONG] else ApiStruct.D_Sell
                     logger.info(f'{pos.code}->{sig.code} {pos.direction}头换月开新{sig.volume}手 价格: {sig.price}')
-            self.raw_redis.publish(self.__request_format.format('ReqOrderInsert'), json.dumps(param_dict))
+            await self.redis_client.publish(self.__request_format.format('ReqOrderInsert'), json.dumps(param_dict))
         except Exception as e:
             logger.warning(f'ReqOrderInsert 发生错误: {repr(e)}', exc_info=True)
 
-    def _check_order_risk(self, sig: Signal):
+    async def _check_order_risk(self, sig: Signal):
         """
         报单前风控检查
 
@@ -456,7 +466,7 @@ class TradeStrategy(BaseModule):
                 return RiskCheckResult(True, "无账户记录，跳过风控检查")
 
             # 调用风控引擎检查
-            return self._risk_engine.check_order_before_submit(
+            return await self._risk_engine.check_order_before_submit(
                 instrument=inst,
                 direction=direction,
                 offset=offset,
@@ -482,7 +492,7 @@ class TradeStrategy(BaseModule):
             channel_rsp_err = self.__trade_response_format.format('OnRspError', request_id)
             await sub_client.psubscribe(channel_rtn_odr, channel_rsp_odr_act, channel_rsp_err)
             task = asyncio.create_task(self.query_reader(sub_client))
-            self.raw_redis.publish(self.__request_format.format('ReqOrderAction'), json.dumps(order))
+            await self.redis_client.publish(self.__request_format.format('ReqOrderAction'), json.dumps(order))
             await asyncio.wait_for(task, HANDLER_TIME_OUT)
             await sub_client.punsubscribe()
             await sub_client.close()
@@ -586,6 +596,12 @@ class TradeStrategy(BaseModule):
                             profit_point = last_trade.avg_entry_price - last_trade.avg_exit_price
                         last_trade.profit = profit_point * last_trade.shares * inst.volume_multiple
                     last_trade.save(force_update=True)
+            if self._risk_engine:
+                if trade['OffsetFlag'] == OffsetFlag.Open:
+                    self._risk_engine.register_fill(self.__broker.pk, inst.pk, trade['Direction'], trade['Volume'])
+                else:
+                    pos_direct = DirectionType.LONG if trade['Direction'] == DirectionType.SHORT else DirectionType.SHORT
+                    self._risk_engine.register_fill(self.__broker.pk, inst.pk, pos_direct, -trade['Volume'])
             logger.debug(f"new_trade:{new_trade} manual_trade:{manual_trade} trade_completed:{trade_completed} "
                          f"order:{order} signal: {signal}")
             if trade_completed and not manual_trade:
@@ -661,7 +677,7 @@ class TradeStrategy(BaseModule):
                             return
                         logger.info(f"{inst} 以价格 {price} 开多{volume}手 重新报单...")
                         signal.price = price
-                        self.io_loop.call_soon(self.ReqOrderInsert, signal)
+                        await self.ReqOrderInsert(signal)
                     else:
                         delta = (last_bar.settlement - price) * Decimal(0.5)
                         price = price_round(last_bar.settlement - delta, inst.price_tick)
@@ -670,7 +686,7 @@ class TradeStrategy(BaseModule):
                             return
                         logger.info(f"{inst} 以价格 {price} 开空{volume}手 重新报单...")
                         signal.price = price
-                        self.io_loop.call_soon(self.ReqOrderInsert, signal)
+                        await self.ReqOrderInsert(signal)
                 else:
                     if order['Direction'] == DirectionType.LONG:
                         delta = (price - last_bar.settlement) * Decimal(0.5)
@@ -680,7 +696,7 @@ class TradeStrategy(BaseModule):
                             return
                         logger.info(f"{inst} 以价格 {price} 买平{volume}手 重新报单...")
                         signal.price = price
-                        self.io_loop.call_soon(self.ReqOrderInsert, signal)
+                        await self.ReqOrderInsert(signal)
                     else:
                         delta = (last_bar.settlement - price) * Decimal(0.5)
                         price = price_round(last_bar.settlement - delta, inst.price_tick)
@@ -689,13 +705,13 @@ class TradeStrategy(BaseModule):
                             return
                         logger.info(f"{inst} 以价格 {price} 卖平{volume}手 重新报单...")
                         signal.price = price
-                        self.io_loop.call_soon(self.ReqOrderInsert, signal)
+                        await self.ReqOrderInsert(signal)
         except Exception as ee:
             logger.warning(f'OnRtnOrder 发生错误: {repr(ee)}', exc_info=True)
 
     @RegisterCallback(crontab='*/1 * * * *')
     async def heartbeat(self):
-        self.raw_redis.set('HEARTBEAT:TRADER', 1, ex=301)
+        await self.redis_client.set('HEARTBEAT:TRADER', 1, ex=301)
 
     @RegisterCallback(crontab='55 8 * * *')
     async def processing_signal1(self):
@@ -707,7 +723,7 @@ class TradeStrategy(BaseModule):
             for sig in Signal.objects.filter(~Q(instrument__exchange=ExchangeType.CFFEX), trigger_time__gte=self.__last_trading_day, strategy=self.__strategy,
                                              instrument__night_trade=False, processed=False).order_by('-priority'):
                 logger.info(f'发现日盘信号: {sig}')
-                self.io_loop.call_soon(self.ReqOrderInsert, sig)
+                await self.ReqOrderInsert(sig)
             if (self.__trading_day - self.__last_trading_day).days > 3:
                 logger.info('假期后第一天，处理节前未成交夜盘信号.')
                 self.io_loop.call_soon(asyncio.create_task, self.processing_signal3())
@@ -721,7 +737,7 @@ class TradeStrategy(BaseModule):
             for sig in Signal.objects.filter(~Q(instrument__exchange=ExchangeType.CFFEX), trigger_time__gte=self.__last_trading_day, strategy=self.__strategy,
                                              instrument__night_trade=False, processed=False).order_by('-priority'):
                 logger.info(f'发现遗漏信号: {sig}')
-                self.io_loop.call_soon(self.ReqOrderInsert, sig)
+                await self.ReqOrderInsert(sig)
 
     @RegisterCallback(crontab='25 9 * * *')
     async def processing_signal2(self):
@@ -733,7 +749,7 @@ class TradeStrategy(BaseModule):
             for sig in Signal.objects.filter(instrument__exchange=ExchangeType.CFFEX, trigger_time__gte=self.__last_trading_day, strategy=self.__strategy,
                                              instrument__night_trade=False, processed=False).order_by('-priority'):
                 logger.info(f'发现股指和国债信号: {sig}')
-                self.io_loop.call_soon(self.ReqOrderInsert, sig)
+                await self.ReqOrderInsert(sig)
 
     @RegisterCallback(crontab='31 9 * * *')
     async def check_signal2_processed(self):
@@ -744,7 +760,7 @@ class TradeStrategy(BaseModule):
             for sig in Signal.objects.filter(instrument__exchange=ExchangeType.CFFEX, trigger_time__gte=self.__last_trading_day, strategy=self.__strategy,
                                              instrument__night_trade=False, processed=False).order_by('-priority'):
                 logger.info(f'发现遗漏的股指和国债信号: {sig}')
-                self.io_loop.call_soon(self.ReqOrderInsert, sig)
+                await self.ReqOrderInsert(sig)
 
     @RegisterCallback(crontab='55 20 * * *')
     async def processing_signal3(self):
@@ -756,7 +772,7 @@ class TradeStrategy(BaseModule):
             for sig in Signal.objects.filter(
                     trigger_time__gte=self.__last_trading_day, strategy=self.__strategy, instrument__night_trade=True, processed=False).order_by('-priority'):
                 logger.info(f'发现夜盘信号: {sig}')
-                self.io_loop.call_soon(self.ReqOrderInsert, sig)
+                await self.ReqOrderInsert(sig)
 
     @RegisterCallback(crontab='1 21 * * *')
     async def check_signal3_processed(self):
@@ -767,7 +783,7 @@ class TradeStrategy(BaseModule):
             for sig in Signal.objects.filter(
                     trigger_time__gte=self.__last_trading_day, strategy=self.__strategy, instrument__night_trade=True, processed=False).order_by('-priority'):
                 logger.info(f'发现遗漏的夜盘信号: {sig}')
-                self.io_loop.call_soon(self.ReqOrderInsert, sig)
+                await self.ReqOrderInsert(sig)
 
     @RegisterCallback(crontab='20 15 * * *')
     async def refresh_all(self):
@@ -822,7 +838,7 @@ class TradeStrategy(BaseModule):
                 tasks = [update_from_shfe, update_from_dce, update_from_czce, update_from_cffex, update_from_gfex, get_contracts_argument]
             result = await asyncio.gather(*[func(day) for func in tasks], return_exceptions=True)
             if all(result):
-                self.io_loop.call_soon(self.calculate, day)
+                await self.calculate(day)
             else:
                 failed_tasks = [tasks[i] for i, rst in enumerate(result) if not rst]
                 self.io_loop.call_later(10 * 60, asyncio.create_task, self.collect_quote(failed_tasks))
@@ -830,7 +846,7 @@ class TradeStrategy(BaseModule):
             logger.warning(f'collect_quote 发生错误: {repr(e)}', exc_info=True)
         logger.debug('盘后计算完毕!')
 
-    def calculate(self, day, create_main_bar=True):
+    async def calculate(self, day, create_main_bar=True):
         try:
             p_code_set = set(self.__inst_ids)
             for code in self.__cur_pos.keys():
@@ -842,7 +858,7 @@ class TradeStrategy(BaseModule):
                     calc_main_inst(inst, day)
                 if inst.product_code in p_code_set:
                     logger.debug(f'计算交易信号: {inst.name}')
-                    sig, margin = self.calc_signal(inst, day)
+                    sig, margin = await self.calc_signal(inst, day)
                     all_margin += margin
             if (all_margin + self.__margin) / self.__current > 0.8:
                 logger.info(f"！！！风险提示！！！开仓保证金共计: {all_margin:.0f}({all_margin / 10000:.1f}万) "
@@ -850,7 +866,7 @@ class TradeStrategy(BaseModule):
         except Exception as e:
             logger.warning(f'calculate 发生错误: {repr(e)}', exc_info=True)
 
-    def calc_signal(self, inst: Instrument, day: datetime.datetime) -> (Signal, Decimal):
+    async def calc_signal(self, inst: Instrument, day: datetime.datetime) -> (Signal, Decimal):
         try:
             break_n = self.__strategy.param_set.get(code='BreakPeriod').int_value
             atr_n = self.__strategy.param_set.get(code='AtrPeriod').int_value
@@ -906,7 +922,7 @@ class TradeStrategy(BaseModule):
                         signal_code = pos.code
                         volume = pos.shares
                         last_bar = DailyBar.objects.filter(exchange=inst.exchange, code=pos.code, time=day.date()).first()
-                        price = self.calc_down_limit(inst, last_bar)
+                        price = await self.calc_down_limit(inst, last_bar)
                         priority = PriorityType.High
                     # 多头换月
                     elif roll_over:
@@ -914,11 +930,11 @@ class TradeStrategy(BaseModule):
                         volume = pos.shares
                         last_bar = DailyBar.objects.filter(exchange=inst.exchange, code=pos.code, time=day.date()).first()
                         new_bar = DailyBar.objects.filter(exchange=inst.exchange, code=inst.main_code, time=day.date()).first()
-                        price = self.calc_up_limit(inst, new_bar)
+                        price = await self.calc_up_limit(inst, new_bar)
                         priority = PriorityType.Normal
                         Signal.objects.update_or_create(
                             code=pos.code, strategy=self.__strategy, instrument=inst, type=SignalType.ROLL_CLOSE, trigger_time=day,
-                            defaults={'price': self.calc_down_limit(inst, last_bar), 'volume': volume, 'priority': priority, 'processed': False})
+                            defaults={'price': await self.calc_down_limit(inst, last_bar), 'volume': volume, 'priority': priority, 'processed': False})
                 # 空头持仓
                 else:
                     first_pos = pos
@@ -938,7 +954,7 @@ class TradeStrategy(BaseModule):
                         signal_code = pos.code
                         volume = pos.shares
                         last_bar = DailyBar.objects.filter(exchange=inst.exchange, code=pos.code, time=day.date()).first()
-                        price = self.calc_up_limit(inst, last_bar)
+                        price = await self.calc_up_limit(inst, last_bar)
                         priority = PriorityType.High
                     # 空头换月
                     elif roll_over:
@@ -946,11 +962,11 @@ class TradeStrategy(BaseModule):
                         volume = pos.shares
                         last_bar = DailyBar.objects.filter(exchange=inst.exchange, code=pos.code, time=day.date()).first()
                         new_bar = DailyBar.objects.filter(exchange=inst.exchange, code=inst.main_code, time=day.date()).first()
-                        price = self.calc_down_limit(inst, new_bar)
+                        price = await self.calc_down_limit(inst, new_bar)
                         priority = PriorityType.Normal
                         Signal.objects.update_or_create(
                             code=pos.code, strategy=self.__strategy, instrument=inst, type=SignalType.ROLL_CLOSE, trigger_time=day,
-                            defaults={'price': self.calc_up_limit(inst, last_bar), 'volume': volume, 'priority': priority, 'processed': False})
+                            defaults={'price': await self.calc_up_limit(inst, last_bar), 'volume': volume, 'priority': priority, 'processed': False})
             # 开新仓
             elif buy_sig or sell_sig:
                 start_cash = Performance.objects.last().unit_count
@@ -966,7 +982,7 @@ class TradeStrategy(BaseModule):
                     if new_bar is None:
                         logger.info(f"未找到新日线数据，{inst.exchange} {inst.main_code} {day.date()}")
                     use_margin = new_bar.settlement * inst.volume_multiple * inst.margin_rate * volume
-                    price = self.calc_up_limit(inst, new_bar) if buy_sig else self.calc_down_limit(inst, new_bar)
+                    price = await self.calc_up_limit(inst, new_bar) if buy_sig else await self.calc_down_limit(inst, new_bar)
                     signal = SignalType.BUY if buy_sig else SignalType.SELL_SHORT
                 else:
                     logger.info(f"做{'多' if buy_sig else '空'}{inst},单手风险:{risk_each:.0f},超出风控额度，放弃。")
@@ -983,16 +999,16 @@ class TradeStrategy(BaseModule):
             logger.warning(f'calc_signal 发生错误: {repr(e)}', exc_info=True)
         return None, 0
 
-    def calc_up_limit(self, inst: Instrument, bar: DailyBar):
+    async def calc_up_limit(self, inst: Instrument, bar: DailyBar):
         settlement = bar.settlement
-        limit_ratio = str_to_number(self.raw_redis.get(f"LIMITRATIO:{inst.exchange}:{inst.product_code}:{bar.code}"))
+        limit_ratio = str_to_number(await self.redis_client.get(f"LIMITRATIO:{inst.exchange}:{inst.product_code}:{bar.code}"))
         price_tick = inst.price_tick
         price = price_round(settlement * (Decimal(1) + Decimal(limit_ratio)), price_tick)
         return price - price_tick
 
-    def calc_down_limit(self, inst: Instrument, bar: DailyBar):
+    async def calc_down_limit(self, inst: Instrument, bar: DailyBar):
         settlement = bar.settlement
-        limit_ratio = str_to_number(self.raw_redis.get(f"LIMITRATIO:{inst.exchange}:{inst.product_code}:{bar.code}"))
+        limit_ratio = str_to_number(await self.redis_client.get(f"LIMITRATIO:{inst.exchange}:{inst.product_code}:{bar.code}"))
         price_tick = inst.price_tick
         price = price_round(settlement * (Decimal(1) - Decimal(limit_ratio)), price_tick)
         return price + price_tick
@@ -8,18 +8,19 @@
 - 资金分配
 - 策略隔离
 """
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from decimal import Decimal
 import logging
 import asyncio
 from datetime import datetime
 from dataclasses import dataclass, field
 
+from django.db import transaction
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Count, Prefetch, Sum
 
 from panel.models import (
-    Strategy, StrategyInstance, Broker, Account, Trade,
+    Strategy, StrategyInstance, Broker, Account, Trade, Instrument,
 )
 from trade_trader.strategy import BaseModule
 from trade_trader.strategy.brother2 import TradeStrategy
@@ -28,12 +29,26 @@ from trade_trader.strategy.brother2 import TradeStrategy
 logger = logging.getLogger('StrategyManager')
 
 
+def _to_cents(value: Decimal) -> int:
+    """
+    金额换算为整数分 (与数据库两位小数一致)
+
+    Args:
+        value: 金额
+
+    Returns:
+        int: 以分为单位的整数金额
+    """
+    return int((value * 100).to_integral_value())
+
+
 @dataclass
 class StrategyConfig:
     """策略配置"""
     strategy_id: int
     name: str
     broker_id: int
+    strategy_name: str = ''
     instruments: List[str] = field(default_factory=list)
     allocated_capital: Decimal = Decimal('0')
     capital_ratio: Decimal = Decimal('1')
@@ -68,6 +83,9 @@ class StrategyManager:
     5. 策略隔离
     """
 
+    # 数据库写入合并的延迟 (秒)
+    FLUSH_DELAY = 0.1
+
     def __init__(self, broker: Broker):
         """
         初始化策略管理器
@@ -80,25 +98,44 @@ class StrategyManager:
         self.configs: Dict[int, StrategyConfig] = {}  # instance_id -> config
         self.status: Dict[int, StrategyStatus] = {}  # instance_id -> status
         self.total_capital: Decimal = Decimal('0')
+        # 各实例已分配资金，以整数分记账，资金校验只做整数运算
+        self._allocated_cents: Dict[int, int] = {}
+        # 已分配资金合计 (分)，随分配增量维护，避免每次重新求和
+        self._total_allocated: int = 0
+
+        # 待写入数据库的字段变更: instance_id -> {字段: 值}，由 flush 合并写入
+        self._dirty: Dict[int, Dict[str, Any]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
 
         # 加载现有策略实例
         self._load_instances()
 
     def _load_instances(self):
         """从数据库加载现有策略实例"""
-        instances = StrategyInstance.objects.filter(broker=self.broker, is_active=True)
+        # 实例与账户余额在同一事务中读取，保证二者一致；策略模板与交易品种随实例一并取出
+        with transaction.atomic():
+            instances = list(StrategyInstance.objects.filter(
+                broker=self.broker, is_active=True
+            ).select_related('strategy').prefetch_related(
+                Prefetch('strategy__instruments', queryset=Instrument.objects.only('product_code'),
+                         to_attr='_prefetched_instruments')
+            ))
+            account = Account.objects.filter(broker=self.broker).only('balance').first()
         for inst in instances:
             config = StrategyConfig(
                 strategy_id=inst.strategy.id,
                 name=inst.name,
                 broker_id=self.broker.id,
-                instruments=list(inst.strategy.instruments.values_list('product_code', flat=True)),
+                strategy_name=inst.strategy.name,
+                instruments=[i.product_code for i in inst.strategy._prefetched_instruments],
                 allocated_capital=inst.allocated_capital,
                 capital_ratio=inst.capital_ratio,
                 parameters=inst.parameters or {},
                 enabled=True
             )
             self.configs[inst.id] = config
+            self._allocated_cents[inst.id] = _to_cents(inst.allocated_capital)
+            self._total_allocated += self._allocated_cents[inst.id]
 
             # 创建状态
             self.status[inst.id] = StrategyStatus(
@@ -113,7 +150,6 @@ class StrategyManager:
             )
 
         # 计算总资金
-        account = Account.objects.filter(broker=self.broker).first()
         if account:
             self.total_capital = account.balance
 
@@ -162,13 +198,16 @@ class StrategyManager:
             strategy_id=strategy.id,
             name=name,
             broker_id=self.broker.id,
-            instruments=list(strategy.instruments.values_list('product_code', flat=True)),
+            strategy_name=strategy.name,
+            instruments=self._instrument_codes(strategy),
             allocated_capital=allocated_capital,
             capital_ratio=capital_ratio or Decimal('0'),
             parameters=parameters or {},
             enabled=True
         )
         self.configs[instance.id] = config
+        self._allocated_cents[instance.id] = _to_cents(allocated_capital)
+        self._total_allocated += self._allocated_cents[instance.id]
 
         # 创建状态
         self.status[instance.id] = StrategyStatus(
@@ -184,6 +223,22 @@ class StrategyManager:
         logger.info(f"注册策略实例: {name} (ID={instance.id}), 资金={allocated_capital}")
         return instance
 
+    @staticmethod
+    def _instrument_codes(strategy: Strategy) -> List[str]:
+        """
+        获取策略模板的交易品种代码，优先使用预取结果
+
+        Args:
+            strategy: 策略模板对象
+
+        Returns:
+            List[str]: 品种代码列表
+        """
+        prefetched = getattr(strategy, '_prefetched_instruments', None)
+        if prefetched is not None:
+            return [i.product_code for i in prefetched]
+        return list(strategy.instruments.values_list('product_code', flat=True))
+
     def start_strategy(self, instance_id: int) -> bool:
         """
         启动策略
@@ -206,8 +261,8 @@ class StrategyManager:
 
         try:
             # 创建策略实例
-            strategy_template = Strategy.objects.get(id=config.strategy_id)
-            strategy_instance = TradeStrategy(name=strategy_template.name)
+            strategy_name = config.strategy_name or Strategy.objects.get(id=config.strategy_id).name
+            strategy_instance = TradeStrategy(name=strategy_name)
 
             # 应用参数覆盖
             if config.parameters:
@@ -219,14 +274,12 @@ class StrategyManager:
             self.strategies[instance_id] = strategy_instance
 
             # 更新状态
+            now = timezone.now()
             self.status[instance_id].status = 'running'
-            self.status[instance_id].start_time = timezone.now()
+            self.status[instance_id].start_time = now
 
             # 更新数据库
-            db_instance = StrategyInstance.objects.get(id=instance_id)
-            db_instance.status = 'running'
-            db_instance.start_time = timezone.now()
-            db_instance.save()
+            self._mark_dirty(instance_id, status='running', start_time=now)
 
             logger.info(f"启动策略实例: {config.name} (ID={instance_id})")
             return True
@@ -257,25 +310,48 @@ class StrategyManager:
         try:
             # 停止策略
             asyncio.create_task(strategy_instance.stop())
+            self._mark_stopped(instance_id)
+            return True
 
-            del self.strategies[instance_id]
+        except Exception as e:
+            logger.error(f"停止策略失败 {config.name}: {repr(e)}", exc_info=True)
+            return False
 
-            # 更新状态
-            self.status[instance_id].status = 'stopped'
+    async def _stop_one(self, instance_id: int) -> bool:
+        """
+        停止策略并等待其退出
 
-            # 更新数据库
-            db_instance = StrategyInstance.objects.get(id=instance_id)
-            db_instance.status = 'stopped'
-            db_instance.stop_time = timezone.now()
-            db_instance.save()
+        Args:
+            instance_id: 策略实例ID
 
-            logger.info(f"停止策略实例: {config.name} (ID={instance_id})")
+        Returns:
+            bool: 是否成功停止
+        """
+        try:
+            await self.strategies[instance_id].stop()
+            self._mark_stopped(instance_id)
             return True
-
         except Exception as e:
-            logger.error(f"停止策略失败 {config.name}: {repr(e)}", exc_info=True)
+            logger.error(f"停止策略失败 {self.configs[instance_id].name}: {repr(e)}", exc_info=True)
             return False
 
+    def _mark_stopped(self, instance_id: int):
+        """
+        记录策略已停止
+
+        Args:
+            instance_id: 策略实例ID
+        """
+        del self.strategies[instance_id]
+
+        # 更新状态
+        self.status[instance_id].status = 'stopped'
+
+        # 更新数据库
+        self._mark_dirty(instance_id, status='stopped', stop_time=timezone.now())
+
+        logger.info(f"停止策略实例: {self.configs[instance_id].name} (ID={instance_id})")
+
     def pause_strategy(self, instance_id: int) -> bool:
         """
         暂停策略
@@ -293,9 +369,7 @@ class StrategyManager:
         self.status[instance_id].status = 'paused'
 
         # 更新数据库
-        db_instance = StrategyInstance.objects.get(id=instance_id)
-        db_instance.status = 'paused'
-        db_instance.save()
+        self._mark_dirty(instance_id, status='paused')
 
         logger.info(f"暂停策略实例: {config.name} (ID={instance_id})")
         return True
@@ -317,9 +391,7 @@ class StrategyManager:
         self.status[instance_id].status = 'running'
 
         # 更新数据库
-        db_instance = StrategyInstance.objects.get(id=instance_id)
-        db_instance.status = 'running'
-        db_instance.save()
+        self._mark_dirty(instance_id, status='running')
 
         logger.info(f"恢复策略实例: {config.name} (ID={instance_id})")
         return True
@@ -339,10 +411,14 @@ class StrategyManager:
             return False
 
         # 检查可用资金
-        allocated = sum(c.allocated_capital for c in self.configs.values()) - self.configs[instance_id].allocated_capital
-        if allocated + amount > self.total_capital:
-            logger.warning(f"资金不足: 总资金={self.total_capital}, 已分配={allocated}, 请求={amount}")
+        amount_cents = _to_cents(amount)
+        delta = amount_cents - self._allocated_cents[instance_id]
+        if self._total_allocated + delta > _to_cents(self.total_capital):
+            allocated = self._total_allocated - self._allocated_cents[instance_id]
+            logger.warning(f"资金不足: 总资金={self.total_capital}, 已分配={Decimal(allocated).scaleb(-2)}, 请求={amount}")
             return False
+        self._allocated_cents[instance_id] = amount_cents
+        self._total_allocated += delta
 
         # 更新配置
         self.configs[instance_id].allocated_capital = amount
@@ -351,9 +427,7 @@ class StrategyManager:
         self.status[instance_id].allocated_capital = amount
 
         # 更新数据库
-        db_instance = StrategyInstance.objects.get(id=instance_id)
-        db_instance.allocated_capital = amount
-        db_instance.save()
+        self._mark_dirty(instance_id, allocated_capital=amount)
 
         logger.info(f"分配资金: {self.configs[instance_id].name} = {amount}")
         return True
@@ -421,28 +495,81 @@ class StrategyManager:
 
     def update_statistics(self):
         """更新策略统计信息"""
-        for instance_id, status in self.status.items():
-            if instance_id not in self.configs:
-                continue
+        tracked = {iid: self.configs[iid] for iid in self.status if iid in self.configs}
+        if not tracked:
+            return
+
+        # 一次分组聚合取出所有策略的交易统计
+        stats = {
+            row['strategy_id']: row
+            for row in Trade.objects.filter(
+                broker=self.broker,
+                strategy_id__in={c.strategy_id for c in tracked.values()}
+            ).values('strategy_id').annotate(cnt=Count('id'), profit=Sum('profit'))
+        }
+
+        for instance_id, config in tracked.items():
+            status = self.status[instance_id]
+            row = stats.get(config.strategy_id)
+            status.total_trades = row['cnt'] if row else 0
+            status.total_profit = (row['profit'] if row else None) or Decimal('0')
+
+            # 更新数据库
+            self._mark_dirty(instance_id, total_trades=status.total_trades, total_profit=status.total_profit)
 
-            config = self.configs[instance_id]
-            strategy_template = Strategy.objects.get(id=config.strategy_id)
+        self.flush()
 
-            # 从数据库查询交易统计
-            trades = Trade.objects.filter(
-                strategy=strategy_template,
-                broker=self.broker
-            )
+    def _mark_dirty(self, instance_id: int, **fields):
+        """
+        记录策略实例的字段变更
 
-            status.total_trades = trades.count()
-            status.total_profit = trades.aggregate(Sum('profit'))['profit__sum'] or Decimal('0')
+        事件循环运行时延迟 FLUSH_DELAY 秒合并写入，否则立即写入。
 
-            # 更新数据库
-            db_instance = StrategyInstance.objects.filter(id=instance_id).first()
-            if db_instance:
-                db_instance.total_trades = status.total_trades
-                db_instance.total_profit = status.total_profit
-                db_instance.save()
+        Args:
+            instance_id: 策略实例ID
+            **fields: 变更的字段
+        """
+        self._dirty.setdefault(instance_id, {}).update(fields)
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self.FLUSH_DELAY, self.flush)
+
+    def flush(self) -> int:
+        """
+        把缓存的字段变更写入数据库
+
+        单个实例用 update() 只写变更的列；多个实例按变更的字段分组 bulk_update。
+
+        Returns:
+            int: 写入的策略实例数量
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+
+        # update()/bulk_update() 不会自动刷新 auto_now 字段
+        now = timezone.now()
+        if len(dirty) == 1:
+            (instance_id, fields), = dirty.items()
+            StrategyInstance.objects.filter(id=instance_id).update(update_time=now, **fields)
+            return 1
+
+        groups: Dict[tuple, List[StrategyInstance]] = {}
+        for instance_id, fields in dirty.items():
+            groups.setdefault(tuple(sorted(fields)), []).append(
+                StrategyInstance(id=instance_id, update_time=now, **fields)
+            )
+        for field_names, objs in groups.items():
+            StrategyInstance.objects.bulk_update(objs, [*field_names, 'update_time'])
+        return len(dirty)
 
     def _apply_parameters(self, strategy: BaseModule, parameters: Dict):
         """应用参数到策略"""
@@ -461,20 +588,29 @@ class StrategyManager:
             if s.status == 'running'
         ]
 
-    def stop_all(self) -> int:
+    async def stop_all(self) -> int:
         """
-        停止所有策略
+        停止所有策略，各策略并发停止
 
         Returns:
             int: 成功停止的策略数量
         """
-        count = 0
-        for instance_id in list(self.strategies.keys()):
-            if self.stop_strategy(instance_id):
-                count += 1
+        results = await asyncio.gather(*(self._stop_one(i) for i in list(self.strategies)))
+        count = sum(results)
+        # 调用方随后通常会停止事件循环，延迟写入的停止状态必须在此落库
+        self.flush()
         logger.info(f"停止了 {count} 个策略实例")
         return count
 
+    async def shutdown(self) -> int:
+        """
+        关闭策略管理器: 停止所有策略并写入全部缓存的字段变更 (由 stop_all 完成)，停止事件循环前调用
+
+        Returns:
+            int: 成功停止的策略数量
+        """
+        return await self.stop_all()
+
 
 def create_strategy_manager(broker: Broker) -> StrategyManager:
     """
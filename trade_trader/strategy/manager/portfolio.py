@@ -8,15 +8,20 @@
 - 等权重分配
 - 动态权重调整
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+from collections import defaultdict
 from decimal import Decimal
+from functools import lru_cache
+from itertools import chain, groupby, islice
+from operator import itemgetter
 import logging
 from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
 
 import numpy as np
-from django.db.models import Sum
+from django.db.models import Count, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
 
 from panel.models import (
     StrategyInstance, Trade, Position
@@ -25,6 +30,18 @@ from panel.models import (
 
 logger = logging.getLogger('StrategyPortfolio')
 
+# 看多 / 看空的信号类型
+_BUY_TYPES = frozenset({'BUY', 'ROLL_OPEN'})
+_SELL_TYPES = frozenset({'SELL', 'BUY_COVER', 'ROLL_CLOSE'})
+
+# 常用 Decimal 常量，避免反复解析字符串
+_D_ZERO = Decimal(0)
+_D_ONE = Decimal(1)
+_D_TOL = Decimal('0.01')  # 权重总和允许的偏差
+
+# 合约代码为空时取品种代码
+_CONTRACT_CODE = Coalesce(NullIf('code', Value('')), 'instrument__product_code')
+
 
 class WeightMethod(Enum):
     """权重分配方法"""
@@ -65,9 +82,17 @@ class StrategyPortfolio:
         """
         self.instances = instances
         self.instance_ids = [inst.id for inst in instances]
+        self._inst_index = {inst_id: i for i, inst_id in enumerate(self.instance_ids)}
+        self._instances_by_id = {inst.id: inst for inst in instances}
         self.weights: Dict[int, Decimal] = {}  # instance_id -> weight
+        self._weight_by_id: Dict[int, float] = {}  # weights 的 float 副本
+        self._weight_vec = np.zeros(len(self.instance_ids))  # 按 instance_ids 顺序排列的 float 权重
+        self._priority_inst_id: Optional[int] = None  # 权重最高的策略实例
+        self._priority_weight_float = 0.0
         self.weight_method = WeightMethod.EQUAL_WEIGHT
         self.signals_cache: Dict[str, PortfolioSignal] = {}
+        # 风险平价权重缓存: (实例ID, lookback) -> ((最新平仓时间, 平仓笔数), 权重)
+        self._stats_cache: Dict[Tuple[Tuple[int, ...], int], Tuple[Tuple, Dict[int, Decimal]]] = {}
 
         # 初始化等权重
         self._init_equal_weights()
@@ -75,9 +100,24 @@ class StrategyPortfolio:
     def _init_equal_weights(self):
         """初始化等权重分配"""
         if self.instances:
-            weight = Decimal('1') / len(self.instances)
+            weight = _D_ONE / len(self.instances)
             for inst in self.instances:
                 self.weights[inst.id] = weight
+        self._refresh_weight_cache()
+
+    def _refresh_weight_cache(self):
+        """权重变化后重建 float 权重及优先级策略，读路径不再逐次转换 Decimal"""
+        self._weight_by_id = {k: float(v) for k, v in self.weights.items()}
+        self._weight_vec = np.fromiter(
+            (self._weight_by_id.get(inst_id, 0.0) for inst_id in self.instance_ids),
+            dtype=np.float64, count=len(self.instance_ids)
+        )
+        if self.weights:
+            self._priority_inst_id = max(self.weights, key=self.weights.get)
+            self._priority_weight_float = self._weight_by_id[self._priority_inst_id]
+        else:
+            self._priority_inst_id = None
+            self._priority_weight_float = 0.0
 
     def set_weights(self, weights: Dict[int, Decimal], method: WeightMethod = WeightMethod.CUSTOM):
         """
@@ -88,12 +128,13 @@ class StrategyPortfolio:
             method: 权重方法
         """
         total = sum(weights.values())
-        if abs(total - Decimal('1')) > Decimal('0.01'):
+        if abs(total - _D_ONE) > _D_TOL:
             logger.warning(f"权重总和不为1: {total}, 进行归一化")
             weights = {k: v / total for k, v in weights.items()}
 
         self.weights = weights
         self.weight_method = method
+        self._refresh_weight_cache()
         logger.info(f"设置权重: method={method.value}, weights={weights}")
 
     def calculate_equal_weights(self) -> Dict[int, Decimal]:
@@ -106,7 +147,7 @@ class StrategyPortfolio:
         n = len(self.instances)
         if n == 0:
             return {}
-        weight = Decimal('1') / n
+        weight = _D_ONE / n
         return {inst.id: weight for inst in self.instances}
 
     def calculate_risk_parity_weights(
@@ -122,40 +163,78 @@ class StrategyPortfolio:
         Returns:
             Dict[int, Decimal]: {instance_id: weight}
         """
+        # 没有新的平仓交易时直接复用上次的计算结果
+        version = tuple(Trade.objects.filter(
+            strategy_id__in={inst.strategy_id for inst in self.instances},
+            close_time__isnull=False
+        ).aggregate(latest=Max('close_time'), n=Count('id')).values())
+        key = (tuple(sorted(self.instance_ids)), lookback)
+        cached = self._stats_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return dict(cached[1])
+
         # 获取各策略的历史收益率
-        returns = {}
+        windows = self._recent_closed_profits(lookback)
+        returns = []
         for inst in self.instances:
-            trades = Trade.objects.filter(
-                strategy=inst.strategy,
-                close_time__isnull=False
-            ).order_by('-close_time')[:lookback]
+            window = windows.get(inst.strategy_id, [])
 
-            if trades.count() < 10:
+            if len(window) < 10:
                 logger.warning(f"策略 {inst.name} 历史数据不足")
-                returns[inst.id] = np.array([])
+                returns.append([])
                 continue
 
             # 计算日收益率
-            profits = [float(t.profit) for t in trades if t.profit]
-            returns[inst.id] = np.array(profits)
+            returns.append([float(p) for p in window if p])
 
-        # 计算波动率
-        volatilities = {}
-        for inst_id, ret in returns.items():
-            if len(ret) > 0:
-                volatilities[inst_id] = np.std(ret) if np.std(ret) > 0 else 1
-            else:
-                volatilities[inst_id] = 1
+        # 相同的收益窗口 (如回放同一段历史) 直接命中纯计算缓存
+        pairs = _inv_vol_weights(tuple(map(tuple, returns)), tuple(self.instance_ids))
+        if not pairs:
+            return self.calculate_equal_weights()
 
-        # 反比权重
-        inv_vols = {k: 1 / v for k, v in volatilities.items()}
-        total_inv_vol = sum(inv_vols.values())
+        weights = {inst_id: Decimal(v) for inst_id, v in pairs}
+        self._stats_cache[key] = (version, weights)
+        return dict(weights)
 
-        if total_inv_vol == 0:
-            return self.calculate_equal_weights()
+    def _recent_closed_profits(self, lookback: int) -> Dict[int, List[Optional[Decimal]]]:
+        """
+        一次查询取出组合内各策略最近的已平仓交易盈亏
+
+        Args:
+            lookback: 每个策略保留的交易笔数
 
-        weights = {k: Decimal(str(v / total_inv_vol)) for k, v in inv_vols.items()}
-        return weights
+        Returns:
+            Dict[int, List[Optional[Decimal]]]: {strategy_id: [profit, ...]}，按平仓时间倒序
+        """
+        # 流式读取，不在查询集里缓存全部成交行
+        rows = Trade.objects.filter(
+            strategy_id__in={inst.strategy_id for inst in self.instances},
+            close_time__isnull=False
+        ).order_by('strategy_id', '-close_time').values_list('strategy_id', 'profit').iterator(chunk_size=1000)
+        return {
+            strategy_id: [profit for _, profit in islice(group, lookback)]
+            for strategy_id, group in groupby(rows, key=itemgetter(0))
+        }
+
+    @staticmethod
+    def _group_std(samples: Sequence[Sequence[float]]) -> np.ndarray:
+        """
+        一次向量化计算多组样本的标准差
+
+        Args:
+            samples: 各组样本
+
+        Returns:
+            np.ndarray: 各组的总体标准差，空组为0
+        """
+        n_groups = len(samples)
+        counts = np.fromiter(map(len, samples), dtype=np.intp, count=n_groups)
+        values = np.fromiter(chain.from_iterable(samples), dtype=np.float64, count=int(counts.sum()))
+        group_ids = np.repeat(np.arange(n_groups), counts)
+        sizes = np.maximum(counts, 1)
+        means = np.bincount(group_ids, values, minlength=n_groups) / sizes
+        deviations = values - means[group_ids]
+        return np.sqrt(np.bincount(group_ids, deviations * deviations, minlength=n_groups) / sizes)
 
     def calculate_inverse_volatility_weights(
         self,
@@ -219,17 +298,40 @@ class StrategyPortfolio:
         combined = {}
 
         # 按合约分组
-        by_code = {}
+        by_code: Dict[str, Dict[int, Dict]] = defaultdict(dict)
         for inst_id, sig in signals.items():
             code = sig.get('code', '')
             if code:
-                if code not in by_code:
-                    by_code[code] = {}
                 by_code[code][inst_id] = sig
 
+        # 所有合约的投票一次算出: 行为合约、列为策略实例，不在组合内的实例权重为0
+        columns = dict(self._inst_index)
+        weight_vec = self._weight_vec
+        extra = {inst_id for sigs in by_code.values() for inst_id in sigs if inst_id not in columns}
+        if extra:
+            for inst_id in extra:
+                columns[inst_id] = len(columns)
+            weight_vec = np.concatenate([weight_vec, np.zeros(len(extra))])
+
+        buy_mask = np.zeros((len(by_code), len(columns)), dtype=np.int8)
+        sell_mask = np.zeros_like(buy_mask)
+        for row, sigs in enumerate(by_code.values()):
+            for inst_id, sig in sigs.items():
+                sig_type = sig.get('type')
+                if sig_type in _BUY_TYPES:
+                    buy_mask[row, columns[inst_id]] = 1
+                elif sig_type in _SELL_TYPES:
+                    sell_mask[row, columns[inst_id]] = 1
+
+        buy_votes = buy_mask.sum(axis=1).tolist()
+        sell_votes = sell_mask.sum(axis=1).tolist()
+        weighted_buy = (buy_mask @ weight_vec).tolist()
+        weighted_sell = (sell_mask @ weight_vec).tolist()
+
         # 对每个合约组合信号
-        for code, sigs in by_code.items():
-            portfolio_signal = self._combine_single_code(sigs, method)
+        for row, (code, sigs) in enumerate(by_code.items()):
+            portfolio_signal = self._combine_single_code(
+                sigs, method, buy_votes[row], sell_votes[row], weighted_buy[row], weighted_sell[row])
             combined[code] = portfolio_signal
 
         self.signals_cache = combined
@@ -238,25 +340,26 @@ class StrategyPortfolio:
     def _combine_single_code(
         self,
         signals: Dict[int, Dict],
-        method: str
+        method: str,
+        buy_votes: int,
+        sell_votes: int,
+        weighted_buy: float,
+        weighted_sell: float
     ) -> PortfolioSignal:
-        """组合单个合约的信号"""
-        buy_votes = 0
-        sell_votes = 0
-        weighted_buy = Decimal('0')
-        weighted_sell = Decimal('0')
-
-        for inst_id, sig in signals.items():
-            weight = self.weights.get(inst_id, Decimal('0'))
-            sig_type = sig.get('type')
+        """
+        根据已统计的票数组合单个合约的信号
 
-            if sig_type in ['BUY', 'ROLL_OPEN']:
-                buy_votes += 1
-                weighted_buy += weight
-            elif sig_type in ['SELL', 'BUY_COVER', 'ROLL_CLOSE']:
-                sell_votes += 1
-                weighted_sell += weight
+        Args:
+            signals: 该合约的 {instance_id: signal_dict}
+            method: 组合方法
+            buy_votes: 看多票数
+            sell_votes: 看空票数
+            weighted_buy: 看多权重之和
+            weighted_sell: 看空权重之和
 
+        Returns:
+            PortfolioSignal: 组合信号
+        """
         # 投票结果
         voting_result = {'buy': buy_votes, 'sell': sell_votes}
 
@@ -275,10 +378,10 @@ class StrategyPortfolio:
             # 加权投票
             if weighted_buy > weighted_sell:
                 combined = 1
-                confidence = float(weighted_buy / (weighted_buy + weighted_sell)) if (weighted_buy + weighted_sell) > 0 else 0
+                confidence = weighted_buy / (weighted_buy + weighted_sell) if (weighted_buy + weighted_sell) > 0 else 0
             elif weighted_sell > weighted_buy:
                 combined = -1
-                confidence = float(weighted_sell / (weighted_buy + weighted_sell)) if (weighted_buy + weighted_sell) > 0 else 0
+                confidence = weighted_sell / (weighted_buy + weighted_sell) if (weighted_buy + weighted_sell) > 0 else 0
             else:
                 combined = 0
                 confidence = 0
@@ -299,16 +402,15 @@ class StrategyPortfolio:
 
         elif method == "priority":
             # 按权重最高的策略决定
-            max_weight_inst = max(self.weights.items(), key=lambda x: x[1])[0]
-            max_weight_sig = signals.get(max_weight_inst, {})
+            max_weight_sig = signals.get(self._priority_inst_id, {})
             sig_type = max_weight_sig.get('type')
 
-            if sig_type in ['BUY', 'ROLL_OPEN']:
+            if sig_type in _BUY_TYPES:
                 combined = 1
-                confidence = float(self.weights.get(max_weight_inst, 0))
-            elif sig_type in ['SELL', 'BUY_COVER', 'ROLL_CLOSE']:
+                confidence = self._priority_weight_float
+            elif sig_type in _SELL_TYPES:
                 combined = -1
-                confidence = float(self.weights.get(max_weight_inst, 0))
+                confidence = self._priority_weight_float
             else:
                 combined = 0
                 confidence = 0
@@ -340,34 +442,44 @@ class StrategyPortfolio:
         Returns:
             Dict: 组合盈亏统计
         """
-        total_profit = Decimal('0')
+        total_profit = _D_ZERO
         total_volume = 0
         profit_by_strategy = {}
         profit_by_code = {}
 
-        for inst in self.instances:
-            trades = Trade.objects.filter(
-                strategy=inst.strategy,
-                broker__id=inst.broker.id
-            )
+        # 一次分组聚合: 按 (策略, 账户, 合约) 汇总盈亏与手数，合约代码为空时取品种代码
+        groups = defaultdict(list)
+        pairs = {(inst.strategy_id, inst.broker_id) for inst in self.instances}
+        if pairs:
+            condition = Q()
+            for strategy_id, broker_id in pairs:
+                condition |= Q(strategy_id=strategy_id, broker_id=broker_id)
+            trades = Trade.objects.filter(condition)
 
             if start_date:
                 trades = trades.filter(close_time__date__gte=start_date)
             if end_date:
                 trades = trades.filter(close_time__date__lte=end_date)
 
-            strategy_profit = trades.aggregate(Sum('profit'))['profit__sum'] or Decimal('0')
-            total_profit += strategy_profit
-            profit_by_strategy[inst.name] = float(strategy_profit)
+            rows = trades.values(
+                'strategy_id', 'broker_id',
+                trade_code=_CONTRACT_CODE
+            ).annotate(profit=Sum('profit'), volume=Sum('shares'))
+            for row in rows:
+                groups[row['strategy_id'], row['broker_id']].append(row)
 
-            # 按合约统计
-            for trade in trades:
-                code = trade.code or trade.instrument.product_code
+        for inst in self.instances:
+            strategy_profit = _D_ZERO
+            for row in groups.get((inst.strategy_id, inst.broker_id), ()):
+                code = row['trade_code']
                 if code not in profit_by_code:
-                    profit_by_code[code] = Decimal('0')
-                if trade.profit:
-                    profit_by_code[code] += trade.profit
-                total_volume += trade.shares or 0
+                    profit_by_code[code] = _D_ZERO
+                if row['profit']:
+                    profit_by_code[code] += row['profit']
+                    strategy_profit += row['profit']
+                total_volume += row['volume'] or 0
+            total_profit += strategy_profit
+            profit_by_strategy[inst.name] = float(strategy_profit)
 
         return {
             'total_profit': float(total_profit),
@@ -385,26 +497,20 @@ class StrategyPortfolio:
             Dict: 风险指标
         """
         # 计算各策略的波动率
+        windows = self._recent_closed_profits(60)
+        returns = [[float(p) for p in windows.get(inst.strategy_id, []) if p] for inst in self.instances]
+        stds = self._group_std(returns).tolist()
         volatilities = {}
-        for inst in self.instances:
-            trades = Trade.objects.filter(
-                strategy=inst.strategy,
-                close_time__isnull=False
-            ).order_by('-close_time')[:60]
-
-            profits = [float(t.profit) for t in trades if t.profit]
-            if len(profits) > 10:
-                volatilities[inst.name] = np.std(profits)
-            else:
-                volatilities[inst.name] = 0
+        for inst, profits, std in zip(self.instances, returns, stds):
+            volatilities[inst.name] = std if len(profits) > 10 else 0
 
         # 计算加权波动率
         weighted_vol = 0
-        for inst_id, weight in self.weights.items():
-            inst = next((i for i in self.instances if i.id == inst_id), None)
-            if inst:
+        for inst_id, weight in self._weight_by_id.items():
+            inst = self._instances_by_id.get(inst_id)
+            if inst is not None:
                 vol = volatilities.get(inst.name, 0)
-                weighted_vol += (float(weight) * vol) ** 2
+                weighted_vol += (weight * vol) ** 2
 
         portfolio_vol = np.sqrt(weighted_vol) if weighted_vol > 0 else 0
 
@@ -425,14 +531,22 @@ class StrategyPortfolio:
         total_long = 0
         total_short = 0
 
-        for inst in self.instances:
-            strategy_positions = Position.objects.filter(
-                strategy=inst.strategy,
+        # 一次分组聚合: 按 (策略, 合约, 方向) 汇总持仓，cnt 保留原始持仓记录数
+        groups = defaultdict(list)
+        strategy_ids = {inst.strategy_id for inst in self.instances}
+        if strategy_ids:
+            rows = Position.objects.filter(
+                strategy_id__in=strategy_ids,
                 position__gt=0
-            )
+            ).values('strategy_id', 'direction', pos_code=_CONTRACT_CODE).annotate(
+                total=Sum('position'), cnt=Count('id'))
+            for row in rows:
+                groups[row['strategy_id']].append(row)
 
-            for pos in strategy_positions:
-                code = pos.code or pos.instrument.product_code
+        for inst in self.instances:
+            weight = self._weight_by_id.get(inst.id, 0.0)
+            for row in groups.get(inst.strategy_id, ()):
+                code = row['pos_code']
                 if code not in positions:
                     positions[code] = {
                         'long': 0,
@@ -441,16 +555,15 @@ class StrategyPortfolio:
                         'strategies': []
                     }
 
-                weight = self.weights.get(inst.id, Decimal('0'))
-                if pos.direction == '0':  # LONG
-                    positions[code]['long'] += pos.position
-                    total_long += pos.position * float(weight)
+                if row['direction'] == '0':  # LONG
+                    positions[code]['long'] += row['total']
+                    total_long += row['total'] * weight
                 else:  # SHORT
-                    positions[code]['short'] += pos.position
-                    total_short += pos.position * float(weight)
+                    positions[code]['short'] += row['total']
+                    total_short += row['total'] * weight
 
                 positions[code]['net'] = positions[code]['long'] - positions[code]['short']
-                positions[code]['strategies'].append(inst.name)
+                positions[code]['strategies'].extend([inst.name] * row['cnt'])
 
         return {
             'positions': positions,
@@ -460,6 +573,33 @@ class StrategyPortfolio:
         }
 
 
+@lru_cache(maxsize=128)
+def _inv_vol_weights(
+    returns_key: Tuple[Tuple[float, ...], ...],
+    ids_key: Tuple[int, ...]
+) -> Tuple[Tuple[int, str], ...]:
+    """
+    按波动率倒数计算权重
+
+    Args:
+        returns_key: 各策略的收益序列
+        ids_key: 与收益序列对应的实例ID
+
+    Returns:
+        Tuple: ((instance_id, 权重字符串), ...)，无法计算时为空
+    """
+    # 计算波动率，无数据或波动为0时按1处理
+    stds = StrategyPortfolio._group_std(returns_key)
+    inv_vols = 1.0 / np.where(stds > 0, stds, 1.0)
+    total_inv_vol = inv_vols.sum()
+
+    if total_inv_vol == 0:
+        return ()
+
+    # 反比权重
+    return tuple(zip(ids_key, map(str, (inv_vols / total_inv_vol).tolist())))
+
+
 def create_portfolio(instances: List[StrategyInstance]) -> StrategyPortfolio:
     """
     创建策略组合的工厂函数
@@ -7,18 +7,21 @@
 - VWAP (Volume Weighted Average Price)
 - 跟单算法 (Implementation Shortfall)
 """
-from typing import Optional, Dict, Callable
+from typing import Optional, Dict, Callable, Iterable, List, Tuple
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from enum import Enum
 import logging
+import time
 from dataclasses import dataclass
 import asyncio
 
+import numpy as np
+from django.db.models import OuterRef, Q, Subquery
 from django.utils import timezone
 
 from panel.models import (
-    Instrument, Broker, DirectionType
+    Instrument, Broker, DirectionType, DailyBar
 )
 
 
@@ -71,6 +74,9 @@ class AlgoEngine:
     3. 执行监控
     """
 
+    # 最新价缓存有效期 (秒)
+    PRICE_TTL = 2.0
+
     def __init__(self, broker: Broker):
         """
         初始化算法交易引擎
@@ -81,6 +87,12 @@ class AlgoEngine:
         self.broker = broker
         self.active_orders: Dict[str, AlgoOrder] = {}
         self.order_func: Optional[Callable] = None
+        # 最新价缓存: instrument_id -> (缓存时刻, 价格)
+        self._price_cache: Dict[int, Tuple[float, Decimal]] = {}
+        # 成交量分布缓存: (instrument_id, 日期, 起始分钟, lookback) -> 分布
+        self._profile_cache: Dict[Tuple[int, date, int, int], Dict[str, float]] = {}
+        # 执行中订单的取消事件: id(order) -> Event，取消时立即唤醒等待中的切片
+        self._cancel_events: Dict[int, asyncio.Event] = {}
 
     def set_order_function(self, func: Callable):
         """
@@ -116,20 +128,51 @@ class AlgoEngine:
             logger.error("TWAP订单时间范围无效")
             return False
 
-        # 计算切片数量和每次数量
-        num_slices = max(1, int(total_duration / 60))  # 每分钟一个切片
-        volume_per_slice = order.total_volume / num_slices
+        # 计算切片数量和每次数量: 每分钟一个切片，余数摊到前面的切片，每片至少1手
+        num_slices = min(max(1, int(total_duration // 60)), order.total_volume)
+        slice_sizes = []
+        if num_slices > 0:
+            q, r = divmod(order.total_volume, num_slices)
+            slice_sizes = [q + 1] * r + [q] * (num_slices - r)
 
-        # 确保每次数量是整数
-        volume_per_slice = max(1, round(volume_per_slice))
+        order.status = "running"
+        time_per_slice = total_duration / num_slices if num_slices else total_duration
+        cancel_event = self._cancel_events.setdefault(id(order), asyncio.Event())
 
-        # 调整切片数量
-        num_slices = int(order.total_volume / volume_per_slice)
+        try:
+            await self._run_twap_slices(order, cancel_event, slice_sizes, time_per_slice)
+        finally:
+            self._cancel_events.pop(id(order), None)
 
-        order.status = "running"
+        # 完成状态
+        if order.filled_volume >= order.total_volume:
+            order.status = "completed"
+        else:
+            order.status = "partial"
+
+        logger.info(f"TWAP算法完成: {order.instrument.code} "
+                   f"已成交:{order.filled_volume}/{order.total_volume}")
 
-        # 执行TWAP
-        for i in range(num_slices):
+        return order.status == "completed"
+
+    async def _run_twap_slices(
+        self,
+        order: AlgoOrder,
+        cancel_event: asyncio.Event,
+        slice_sizes: List[int],
+        time_per_slice: float
+    ):
+        """
+        按计划时间点逐片下单，取消后立即返回
+
+        Args:
+            order: 算法订单
+            cancel_event: 取消事件
+            slice_sizes: 各切片数量
+            time_per_slice: 每片间隔(秒)
+        """
+        num_slices = len(slice_sizes)
+        for i, volume_per_slice in enumerate(slice_sizes):
             if order.status != "running":
                 break
 
@@ -137,7 +180,8 @@ class AlgoEngine:
             now = timezone.now()
 
             if now < order.start_time:
-                await asyncio.sleep((order.start_time - now).total_seconds())
+                if await self._wait_cancel(cancel_event, (order.start_time - now).total_seconds()):
+                    break
                 now = timezone.now()
 
             if now >= order.end_time:
@@ -172,20 +216,29 @@ class AlgoEngine:
                 logger.info(f"TWAP执行 [{i+1}/{num_slices}]: "
                            f"{order.instrument.code} {slice_volume}手 @{price}")
 
-            # 等待下一个切片
-            time_per_slice = total_duration / num_slices
-            await asyncio.sleep(time_per_slice)
+            # 等待下一个切片: 对齐到计划时间点，取价和下单的耗时不再累积到节奏上
+            if i + 1 < num_slices:
+                target = order.start_time + timedelta(seconds=(i + 1) * time_per_slice)
+                if await self._wait_cancel(cancel_event, (target - timezone.now()).total_seconds()):
+                    break
 
-        # 完成状态
-        if order.filled_volume >= order.total_volume:
-            order.status = "completed"
-        else:
-            order.status = "partial"
+    @staticmethod
+    async def _wait_cancel(event: asyncio.Event, timeout: float) -> bool:
+        """
+        等待到超时或被取消
 
-        logger.info(f"TWAP算法完成: {order.instrument.code} "
-                   f"已成交:{order.filled_volume}/{order.total_volume}")
+        Args:
+            event: 取消事件
+            timeout: 最长等待时间(秒)
 
-        return order.status == "completed"
+        Returns:
+            bool: 是否被取消
+        """
+        try:
+            await asyncio.wait_for(event.wait(), timeout=max(0.0, timeout))
+            return True
+        except asyncio.TimeoutError:
+            return False
 
     async def execute_vwap(self, order: AlgoOrder) -> bool:
         """
@@ -343,20 +396,54 @@ class AlgoEngine:
         Returns:
             Decimal: 当前价格
         """
-        # TODO: 从tick数据或Redis获取最新价格
-        # 这里先从DailyBar获取最新收盘价
-        from panel.models import DailyBar
+        cached = self._price_cache.get(instrument.id)
+        if cached and time.monotonic() - cached[0] < self.PRICE_TTL:
+            return cached[1]
+
+        # 查询是同步的，期间不会切换协程，无需加锁
+        # 顺带刷新其他执行中算法单的合约，多个算法单同时运行时共用一次查询
+        basket = {instrument.id: instrument}
+        for active in self.active_orders.values():
+            if active.status == "running":
+                basket.setdefault(active.instrument.id, active.instrument)
+        return self.refresh_prices(basket.values())[instrument.id]
+
+    def refresh_prices(self, instruments: Iterable[Instrument]) -> Dict[int, Decimal]:
+        """
+        一次查询刷新多个合约的最新价格缓存
 
-        bar = DailyBar.objects.filter(
-            instrument=instrument,
-            exchange=instrument.exchange
-        ).order_by('-time').first()
+        TODO: 从tick数据或Redis获取最新价格，这里先取主力合约最新日K线收盘价，没有数据时为0
+
+        Args:
+            instruments: 合约列表
 
-        if bar:
-            return bar.close
+        Returns:
+            Dict: {instrument_id: 价格}
+        """
+        instruments = list(instruments)
+        if not instruments:
+            return {}
+
+        # 每个 (交易所, 合约) 只取最新一根日K线
+        pairs = Q()
+        for inst in instruments:
+            pairs |= Q(exchange=inst.exchange, code=inst.main_code)
+        latest = DailyBar.objects.filter(
+            exchange=OuterRef('exchange'), code=OuterRef('code')
+        ).order_by('-time').values('time')[:1]
+        closes = {
+            (exchange, code): close
+            for exchange, code, close in DailyBar.objects.filter(pairs, time=Subquery(latest)).values_list(
+                'exchange', 'code', 'close')
+        }
 
-        # 返回默认价格
-        return Decimal('0')
+        now = time.monotonic()
+        prices = {}
+        for inst in instruments:
+            price = closes.get((inst.exchange, inst.main_code), Decimal('0'))
+            self._price_cache[inst.id] = (now, price)
+            prices[inst.id] = price
+        return prices
 
     async def _get_order_book(self, instrument: Instrument) -> tuple:
         """
@@ -392,14 +479,23 @@ class AlgoEngine:
             Dict: 时间段成交量
         """
         # TODO: 从历史数据获取成交量分布
-        # 这里简化处理，假设均匀分布
+        # 这里简化处理，假设均匀分布；时间段从当前分钟起算，按 (合约, 日期, 起始分钟, 回看) 缓存
         now = timezone.now()
-        profile = {}
-
-        for i in range(lookback):
-            time_key = (now - timedelta(minutes=i)).strftime('%H:%M')
-            profile[time_key] = 1.0 / lookback
-
+        start_minute = now.hour * 60 + now.minute
+        key = (instrument.id, now.date(), start_minute, lookback)
+        profile = self._profile_cache.get(key)
+        if profile is not None:
+            return profile
+
+        # 跨日后丢弃旧缓存
+        if any(k[1] != key[1] for k in self._profile_cache):
+            self._profile_cache = {k: v for k, v in self._profile_cache.items() if k[1] == key[1]}
+
+        minutes = (start_minute - np.arange(lookback)) % 1440
+        hours, mins = np.divmod(minutes, 60)
+        weight = 1.0 / lookback
+        profile = {f'{h:02d}:{m:02d}': weight for h, m in zip(hours.tolist(), mins.tolist())}
+        self._profile_cache[key] = profile
         return profile
 
     def get_order_status(self, order_id: str) -> Optional[Dict]:
@@ -444,6 +540,9 @@ class AlgoEngine:
         if order_id in self.active_orders:
             order = self.active_orders[order_id]
             order.status = "cancelled"
+            event = self._cancel_events.get(id(order))
+            if event is not None:
+                event.set()
             logger.info(f"取消算法订单: {order_id}")
             return True
         return False
@@ -8,18 +8,26 @@
 - 时间条件单
 - 价格条件单
 """
-from typing import Optional, Dict, List, Callable, Any
+from typing import Optional, Dict, Iterable, List, Callable, Any, Awaitable, Set, Tuple
+from collections import defaultdict
 from decimal import Decimal
 from datetime import datetime
 from enum import Enum
+from itertools import groupby, islice
+import operator
+from operator import itemgetter
 import logging
+import time
 from dataclasses import dataclass, field
+from functools import partial
 import asyncio
 
+import numpy as np
+from django.db.models.signals import post_delete, post_save
 from django.utils import timezone
 
 from panel.models import (
-    Instrument, Broker, DirectionType, OffsetFlag
+    Instrument, Broker, DirectionType, OffsetFlag, Position, Trade
 )
 from trade_trader.utils.read_config import config
 
@@ -49,16 +57,65 @@ class OrderType(Enum):
     STOP_LIMIT = "stop_limit"       # 止损限价单
 
 
-@dataclass
+# 价格类 / 盈亏类条件，阈值在构造时预先转换
+_PRICE_TYPES = frozenset({
+    ConditionType.PRICE_GT, ConditionType.PRICE_LT, ConditionType.PRICE_GE, ConditionType.PRICE_LE,
+})
+_FLOAT_TYPES = frozenset({
+    ConditionType.PROFIT_GT, ConditionType.PROFIT_LT, ConditionType.DRAWDOWN_GT,
+})
+# 价格向上 / 向下穿越阈值时满足的条件
+_PRICE_UP_TYPES = frozenset({ConditionType.PRICE_GT, ConditionType.PRICE_GE})
+_PRICE_COMPARE = {
+    ConditionType.PRICE_GT: operator.gt,
+    ConditionType.PRICE_LT: operator.lt,
+    ConditionType.PRICE_GE: operator.ge,
+    ConditionType.PRICE_LE: operator.le,
+}
+
+# 条件检查开销从低到高，AND/OR 短路时先查便宜的
+_CONDITION_COST = {
+    **dict.fromkeys(_PRICE_TYPES, 0),
+    ConditionType.TIME_GT: 1,
+    ConditionType.TIME_LT: 1,
+    ConditionType.PROFIT_GT: 2,
+    ConditionType.PROFIT_LT: 2,
+    ConditionType.DRAWDOWN_GT: 3,
+}
+
+_threshold_key = itemgetter(0)
+
+# 定时器按单调时钟触发，略微推后以免早于墙上时间的截止点
+_TIMER_SLACK = 0.001
+# 同一条件反复检查失败时，错误日志的最小间隔(秒)
+_ERROR_LOG_INTERVAL = 60
+
+
+@dataclass(slots=True)
 class Condition:
-    """条件"""
+    """条件，构造后如修改 value 需重新调用 __post_init__ 刷新阈值缓存"""
     type: ConditionType
     value: Any
     instrument: Optional[str] = None  # 合约代码
     params: Dict[str, Any] = field(default_factory=dict)
-
-
-@dataclass
+    _threshold: Optional[Decimal] = field(default=None, init=False, repr=False, compare=False)
+    _threshold_float: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    _tick_threshold: Optional[int] = field(default=None, init=False, repr=False, compare=False)  # 阈值的最小变动价位数
+    _check: Optional[Callable[['ConditionalOrderEngine', 'Condition'], bool]] = field(
+        default=None, init=False, repr=False, compare=False)  # 按类型绑定的检查函数
+    _error_logged_at: float = field(
+        default=float('-inf'), init=False, repr=False, compare=False)  # 上次记录检查失败的时间(单调时钟)
+
+    def __post_init__(self):
+        self._check = _CHECKERS.get(self.type, _check_unsupported)
+        if self.type in _PRICE_TYPES:
+            self._threshold = Decimal(str(self.value))
+            self._threshold_float = float(self._threshold)
+        elif self.type in _FLOAT_TYPES:
+            self._threshold_float = float(self.value)
+
+
+@dataclass(slots=True)
 class ConditionalOrder:
     """条件单"""
     order_id: str
@@ -101,6 +158,48 @@ class ConditionalOrder:
     all_or_none: bool = False    # 全部成交或撤
     immediate_or_cancel: bool = False  # 立即成交或撤
 
+    # 注册时按订单参数生成的执行函数，修改数量参数后需重新注册
+    _executor: Optional[Callable[[Callable], Awaitable[bool]]] = field(
+        default=None, init=False, repr=False, compare=False)
+
+
+@dataclass(slots=True)
+class _ThresholdIndex:
+    """单个合约的价格阈值索引，增删后在下次查询时重建有序数组"""
+    entries: List[Tuple[float, str]] = field(default_factory=list)  # (阈值, order_id)
+    thresholds: np.ndarray = field(default_factory=lambda: np.empty(0))
+    order_ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    dirty: bool = False
+
+    def add(self, threshold: float, order_id: str):
+        self.entries.append((threshold, order_id))
+        self.dirty = True
+
+    def remove(self, threshold: float, order_id: str):
+        try:
+            self.entries.remove((threshold, order_id))
+            self.dirty = True
+        except ValueError:
+            pass
+
+    def _rebuild(self):
+        self.entries.sort(key=_threshold_key)
+        self.thresholds = np.fromiter(map(_threshold_key, self.entries), dtype=np.float64, count=len(self.entries))
+        self.order_ids = np.array([order_id for _, order_id in self.entries], dtype=object)
+        self.dirty = False
+
+    def at_or_below(self, price: float) -> np.ndarray:
+        """阈值不高于 price 的 order_id"""
+        if self.dirty:
+            self._rebuild()
+        return self.order_ids[:np.searchsorted(self.thresholds, price, side='right')]
+
+    def at_or_above(self, price: float) -> np.ndarray:
+        """阈值不低于 price 的 order_id"""
+        if self.dirty:
+            self._rebuild()
+        return self.order_ids[np.searchsorted(self.thresholds, price, side='left'):]
+
 
 class ConditionalOrderEngine:
     """
@@ -121,11 +220,39 @@ class ConditionalOrderEngine:
             broker: 券商/账户对象
         """
         self.broker = broker
-        self.orders: Dict[str, ConditionalOrder] = {}  # order_id -> ConditionalOrder
+        # order_id -> ConditionalOrder，待触发的订单和已触发执行的订单分开存放
+        self._active: Dict[str, ConditionalOrder] = {}
+        self._archived: Dict[str, ConditionalOrder] = {}
         self.price_cache: Dict[str, Decimal] = {}  # code -> latest_price
-
-        # 从配置读取参数
-        self.check_interval = config.getint('CONDITIONAL_ORDER', 'check_interval', fallback=1)
+        # 最新价折算成最小变动价位的整数倍，仅对已知 price_tick 且价格恰好对齐的合约有值
+        self.price_cache_ticks: Dict[str, int] = {}
+        self._price_ticks: Dict[str, Decimal] = {}  # code -> price_tick
+
+        # 价格条件索引: code -> 浮点阈值有序数组，只用于粗筛，精确比较仍在条件检查中进行
+        self._watchers_up: Dict[str, _ThresholdIndex] = defaultdict(_ThresholdIndex)    # GT/GE
+        self._watchers_down: Dict[str, _ThresholdIndex] = defaultdict(_ThresholdIndex)  # LT/LE
+        # 盈亏/回撤条件索引: 合约代码前缀 -> {order_id}，该合约行情变化时检查
+        self._position_watchers: Dict[str, Set[str]] = defaultdict(set)
+        # 注册时的首次检查和时间条件、生效时间到点的定时器: order_id -> [handle]
+        self._time_handles: Dict[str, List[asyncio.Handle]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 单批检查内共享的持仓查询，批次结束即失效
+        self._tick_active = False
+        self._tick_position_cache: Optional[List[Position]] = None
+        # 各品种近期平仓统计: instrument_id -> (近20笔平仓数, 其中最高盈利)，有交易写入时失效
+        self._profit_peak_cache: Dict[int, Tuple[int, float]] = {}
+        # 绑定方法按弱引用注册会随临时对象失效，改为强引用并在 close() 中注销
+        self._dispatch_uid = f"conditional_order_engine_{id(self)}"
+        post_save.connect(self._on_trade_changed, sender=Trade, weak=False, dispatch_uid=self._dispatch_uid)
+        post_delete.connect(self._on_trade_changed, sender=Trade, weak=False, dispatch_uid=self._dispatch_uid)
+
+        # 从配置读取参数，触发由行情和定时器驱动，定时清理只负责移除过期订单
+        self.sweep_interval = config.getint('CONDITIONAL_ORDER', 'sweep_interval', fallback=60)
+
+    @property
+    def orders(self) -> Dict[str, ConditionalOrder]:
+        """待触发的条件单"""
+        return self._active
 
     def register_order(self, order: ConditionalOrder) -> bool:
         """
@@ -145,11 +272,89 @@ class ConditionalOrderEngine:
         if not order.order_id:
             order.order_id = f"CO_{timezone.now().strftime('%Y%m%d%H%M%S')}_{order.instrument.product_code}"
 
-        self.orders[order.order_id] = order
-        logger.info(f"注册条件单: {order.order_id}")
+        if order.order_id in self._active:
+            self._unindex_order(self._active[order.order_id])
+        order.conditions.sort(key=lambda c: _CONDITION_COST.get(c.type, 0))
+        order._executor = self._make_executor(order)
+        self._active[order.order_id] = order
+        self._index_order(order)
+        logger.info("注册条件单: %s", order.order_id)
 
         return True
 
+    def _index_order(self, order: ConditionalOrder):
+        """
+        把条件单登记到价格/持仓索引并安排定时检查
+
+        Args:
+            order: 条件单
+        """
+        if not order.conditions:
+            return
+
+        price_tick = getattr(order.instrument, 'price_tick', None)
+        for condition in order.conditions:
+            if condition.type in _PRICE_TYPES:
+                if price_tick and condition.instrument:
+                    tick = self._price_ticks.setdefault(condition.instrument, price_tick)
+                    condition._tick_threshold = _to_ticks(condition._threshold, tick)
+                watchers = self._watchers_up if condition.type in _PRICE_UP_TYPES else self._watchers_down
+                watchers[condition.instrument].add(condition._threshold_float, order.order_id)
+            elif condition.type in _FLOAT_TYPES and condition.instrument:
+                self._position_watchers[condition.instrument].add(order.order_id)
+
+        self._schedule_order(order)
+
+    def _schedule_order(self, order: ConditionalOrder):
+        """
+        安排条件单的首次检查，以及时间条件和生效时间到点时的检查
+
+        监控循环启动前注册的订单由 monitoring_loop 统一安排
+
+        Args:
+            order: 条件单
+        """
+        loop = self._loop
+        if loop is None or not order.conditions:
+            return
+
+        order_ids = (order.order_id,)
+        # 注册前已有行情或条件已满足时立即检查一次
+        handles = [loop.call_soon(self._check_orders, order_ids)]
+        deadlines = [c.value for c in order.conditions if c.type == ConditionType.TIME_GT]
+        if order.start_time:
+            deadlines.append(order.start_time)
+        now = timezone.now()
+        for deadline in deadlines:
+            delay = (deadline - now).total_seconds()
+            if delay > 0:
+                handles.append(loop.call_later(delay + _TIMER_SLACK, self._check_orders, order_ids))
+        self._time_handles[order.order_id] = handles
+
+    def _unindex_order(self, order: ConditionalOrder):
+        """
+        从价格/持仓索引中移除条件单并取消定时检查
+
+        Args:
+            order: 条件单
+        """
+        for condition in order.conditions:
+            if condition.type in _PRICE_TYPES:
+                watchers = self._watchers_up if condition.type in _PRICE_UP_TYPES else self._watchers_down
+                index = watchers.get(condition.instrument)
+                if index is not None:
+                    index.remove(condition._threshold_float, order.order_id)
+                    if not index.entries:
+                        del watchers[condition.instrument]
+            elif condition.type in _FLOAT_TYPES:
+                order_ids = self._position_watchers.get(condition.instrument)
+                if order_ids is not None:
+                    order_ids.discard(order.order_id)
+                    if not order_ids:
+                        del self._position_watchers[condition.instrument]
+        for handle in self._time_handles.pop(order.order_id, ()):
+            handle.cancel()
+
     def cancel_order(self, order_id: str) -> bool:
         """
         取消条件单
@@ -160,21 +365,46 @@ class ConditionalOrderEngine:
         Returns:
             bool: 是否成功取消
         """
-        if order_id in self.orders:
-            del self.orders[order_id]
-            logger.info(f"取消条件单: {order_id}")
+        if order_id in self._active:
+            self._unindex_order(self._active.pop(order_id))
+            logger.info("取消条件单: %s", order_id)
             return True
         return False
 
     def update_price(self, code: str, price: Decimal):
         """
-        更新价格缓存
+        更新价格缓存，并立即检查受该价格影响的条件单
+
+        需在监控循环所在线程调用
 
         Args:
             code: 合约代码
             price: 最新价格
         """
+        price = price if isinstance(price, Decimal) else Decimal(str(price))
         self.price_cache[code] = price
+        tick = self._price_ticks.get(code)
+        if tick is not None:
+            ticks = _to_ticks(price, tick)
+            if ticks is None:
+                self.price_cache_ticks.pop(code, None)
+            else:
+                self.price_cache_ticks[code] = ticks
+
+        # 只检查价格条件已满足的订单，以及盈亏随该合约价格变化的订单
+        pending = set()
+        price_float = float(price)
+        up = self._watchers_up.get(code)
+        if up is not None:
+            pending.update(up.at_or_below(price_float))
+        down = self._watchers_down.get(code)
+        if down is not None:
+            pending.update(down.at_or_above(price_float))
+        for prefix, order_ids in self._position_watchers.items():
+            if code.startswith(prefix):
+                pending |= order_ids
+        if pending:
+            self._check_orders(pending)
 
     def check_conditions(self, order: ConditionalOrder) -> bool:
         """
@@ -196,20 +426,15 @@ class ConditionalOrderEngine:
             return False
 
         if order.end_time and now > order.end_time:
-            logger.info(f"条件单已过期: {order.order_id}")
+            logger.info("条件单已过期: %s", order.order_id)
             return False
 
-        results = []
-
-        for condition in order.conditions:
-            result = self._check_single_condition(condition)
-            results.append(result)
-
-        # 逻辑判断
+        # 逻辑判断，结果确定后不再检查后续条件
+        checks = (self._check_single_condition(condition) for condition in order.conditions)
         if order.condition_logic == "AND":
-            return all(results)
+            return all(checks)
         else:  # OR
-            return any(results)
+            return any(checks)
 
     def _check_single_condition(self, condition: Condition) -> bool:
         """
@@ -222,58 +447,53 @@ class ConditionalOrderEngine:
             bool: 是否满足
         """
         try:
-            if condition.type == ConditionType.PRICE_GT:
-                code = condition.instrument
-                if code not in self.price_cache:
-                    return False
-                return self.price_cache[code] > Decimal(str(condition.value))
-
-            elif condition.type == ConditionType.PRICE_LT:
-                code = condition.instrument
-                if code not in self.price_cache:
-                    return False
-                return self.price_cache[code] < Decimal(str(condition.value))
-
-            elif condition.type == ConditionType.PRICE_GE:
-                code = condition.instrument
-                if code not in self.price_cache:
-                    return False
-                return self.price_cache[code] >= Decimal(str(condition.value))
-
-            elif condition.type == ConditionType.PRICE_LE:
-                code = condition.instrument
-                if code not in self.price_cache:
-                    return False
-                return self.price_cache[code] <= Decimal(str(condition.value))
-
-            elif condition.type == ConditionType.TIME_GT:
-                return timezone.now() > condition.value
-
-            elif condition.type == ConditionType.TIME_LT:
-                return timezone.now() < condition.value
-
-            elif condition.type == ConditionType.PROFIT_GT:
-                # 检查持仓盈利
-                return self._check_position_profit(condition.instrument, float(condition.value), '>')
-
-            elif condition.type == ConditionType.PROFIT_LT:
-                # 检查持仓盈利
-                return self._check_position_profit(condition.instrument, float(condition.value), '<')
-
-            elif condition.type == ConditionType.DRAWDOWN_GT:
-                # 检查回撤
-                return self._check_position_drawdown(condition.instrument, float(condition.value), '>')
+            return condition._check(self, condition)
 
+        except Exception as e:
+            # 配置错误的条件每次行情都会失败，限制日志频率
+            now = time.monotonic()
+            if logger.isEnabledFor(logging.ERROR) and now - condition._error_logged_at >= _ERROR_LOG_INTERVAL:
+                condition._error_logged_at = now
+                logger.error("检查条件失败: %r", e, exc_info=True)
             return False
 
-        except Exception as e:
-            logger.error(f"检查条件失败: {repr(e)}", exc_info=True)
+    def _check_price(self, condition: Condition) -> bool:
+        """检查价格条件"""
+        code = condition.instrument
+        if code not in self.price_cache:
             return False
+        # 价格和阈值都能整除最小变动价位时按整数比较，否则退回 Decimal
+        ticks = self.price_cache_ticks.get(code)
+        if ticks is not None and condition._tick_threshold is not None:
+            return _PRICE_COMPARE[condition.type](ticks, condition._tick_threshold)
+        return _PRICE_COMPARE[condition.type](self.price_cache[code], condition._threshold)
+
+    def _check_time_gt(self, condition: Condition) -> bool:
+        """检查时间晚于"""
+        return timezone.now() > condition.value
+
+    def _check_time_lt(self, condition: Condition) -> bool:
+        """检查时间早于"""
+        return timezone.now() < condition.value
+
+    def _check_profit_gt(self, condition: Condition) -> bool:
+        """检查持仓盈利大于"""
+        return self._check_position_profit(condition.instrument, condition._threshold_float, '>')
+
+    def _check_profit_lt(self, condition: Condition) -> bool:
+        """检查持仓盈利小于"""
+        return self._check_position_profit(condition.instrument, condition._threshold_float, '<')
+
+    def _check_drawdown_gt(self, condition: Condition) -> bool:
+        """检查回撤大于"""
+        return self._check_position_drawdown(condition.instrument, condition._threshold_float, '>')
 
     def _check_position_profit(self, code: str, threshold: float, op: str) -> bool:
         """
         检查持仓盈利
 
+        查询失败时直接抛出，由 _check_single_condition 限频记录错误
+
         Args:
             code: 合约代码
             threshold: 阈值
@@ -282,38 +502,28 @@ class ConditionalOrderEngine:
         Returns:
             bool: 是否满足条件
         """
-        try:
-            from panel.models import Position
-            positions = Position.objects.filter(
-                broker=self.broker,
-                code__contains=code,
-                position__gt=0
-            )
-
-            total_profit = Decimal('0')
-            for pos in positions:
-                if pos.position_profit:
-                    total_profit += pos.position_profit
-
-            if op == '>':
-                return float(total_profit) > threshold
-            elif op == '<':
-                return float(total_profit) < threshold
-            elif op == '>=':
-                return float(total_profit) >= threshold
-            elif op == '<=':
-                return float(total_profit) <= threshold
+        total_profit = Decimal('0')
+        for pos in self._positions_matching(code):
+            if pos.position_profit:
+                total_profit += pos.position_profit
+
+        if op == '>':
+            return float(total_profit) > threshold
+        elif op == '<':
+            return float(total_profit) < threshold
+        elif op == '>=':
+            return float(total_profit) >= threshold
+        elif op == '<=':
+            return float(total_profit) <= threshold
 
-            return False
-
-        except Exception as e:
-            logger.error(f"检查持仓盈利失败: {repr(e)}")
-            return False
+        return False
 
     def _check_position_drawdown(self, code: str, threshold: float, op: str) -> bool:
         """
         检查持仓回撤
 
+        查询失败时直接抛出，由 _check_single_condition 限频记录错误
+
         Args:
             code: 合约代码
             threshold: 阈值
@@ -322,60 +532,86 @@ class ConditionalOrderEngine:
         Returns:
             bool: 是否满足条件
         """
-        try:
-            from panel.models import Position, Trade
+        peaks = self._profit_peaks()
 
-            positions = Position.objects.filter(
-                broker=self.broker,
-                code__contains=code,
-                position__gt=0
-            )
-
-            for pos in positions:
-                trades = Trade.objects.filter(
-                    broker=self.broker,
-                    instrument=pos.instrument,
-                    close_time__isnull=False
-                ).order_by('-close_time')[:20]
-
-                if trades.count() < 2:
-                    continue
+        for pos in self._positions_matching(code):
+            count, max_profit = peaks.get(pos.instrument_id, (0, 0.0))
 
-                # 计算最高盈利
-                max_profit = 0
-                # peak_price = Decimal('0')  # TODO: implement peak price tracking
+            if count < 2:
+                continue
 
-                if pos.direction == '0':  # LONG
-                    for t in trades:
-                        if t.profit:
-                            max_profit = max(max_profit, float(t.profit))
+            # 多空计算相同，不需要读取持仓方向: 回撤 = 近期最高盈利 - 当前盈利
+            # peak_price = Decimal('0')  # TODO: implement peak price tracking
+            current_profit = float(pos.position_profit or 0)
+            drawdown = max_profit - current_profit if max_profit > 0 else 0
 
-                    current_profit = float(pos.position_profit or 0)
-                    drawdown = max_profit - current_profit if max_profit > 0 else 0
+            if op == '>':
+                return drawdown > threshold
+            elif op == '<':
+                return drawdown < threshold
+            elif op == '>=':
+                return drawdown >= threshold
+            elif op == '<=':
+                return drawdown <= threshold
 
-                else:  # SHORT
-                    for t in trades:
-                        if t.profit:
-                            max_profit = max(max_profit, float(t.profit))
+        return False
 
-                    current_profit = float(pos.position_profit or 0)
-                    # 空头回撤 = 最高盈利 - 当前盈利
-                    drawdown = max_profit - current_profit if max_profit > 0 else 0
+    def _open_positions(self) -> List[Position]:
+        """
+        获取当前持仓，同一批检查内只查询一次
 
-                if op == '>':
-                    return drawdown > threshold
-                elif op == '<':
-                    return drawdown < threshold
-                elif op == '>=':
-                    return drawdown >= threshold
-                elif op == '<=':
-                    return drawdown <= threshold
+        Returns:
+            List[Position]: 持仓量大于0的持仓
+        """
+        positions = self._tick_position_cache
+        if positions is None:
+            # 只取条件检查用到的列
+            positions = list(Position.objects.filter(broker=self.broker, position__gt=0).only(
+                'code', 'instrument', 'position_profit'))
+            if self._tick_active:
+                self._tick_position_cache = positions
+        return positions
+
+    def _positions_matching(self, code: str) -> List[Position]:
+        """
+        按合约代码筛选当前持仓
 
-            return False
+        Args:
+            code: 合约代码或品种前缀
 
-        except Exception as e:
-            logger.error(f"检查持仓回撤失败: {repr(e)}")
-            return False
+        Returns:
+            List[Position]: 合约代码以 code 开头的持仓
+        """
+        return [pos for pos in self._open_positions() if pos.code and pos.code.startswith(code)]
+
+    def _profit_peaks(self, limit: int = 20) -> Dict[int, Tuple[int, float]]:
+        """
+        获取各持仓品种最近平仓交易的笔数和最高盈利，缺失的品种一次查询补齐
+
+        Args:
+            limit: 每个品种统计的交易笔数
+
+        Returns:
+            Dict: {instrument_id: (交易笔数, 最高盈利)}，最高盈利不低于0
+        """
+        peaks = self._profit_peak_cache
+        missing = {pos.instrument_id for pos in self._open_positions()} - peaks.keys()
+        if missing:
+            rows = Trade.objects.filter(
+                broker=self.broker,
+                instrument_id__in=missing,
+                close_time__isnull=False
+            ).order_by('instrument_id', '-close_time').values_list('instrument_id', 'profit')
+            for instrument_id in missing:
+                peaks[instrument_id] = (0, 0.0)
+            for instrument_id, group in groupby(rows, key=itemgetter(0)):
+                window = [profit for _, profit in islice(group, limit)]
+                peaks[instrument_id] = (len(window), max([0.0] + [float(p) for p in window if p]))
+        return peaks
+
+    def _on_trade_changed(self, sender, instance: Trade, **kwargs):
+        """交易记录写入或删除后，使该品种的平仓统计失效"""
+        self._profit_peak_cache.pop(instance.instrument_id, None)
 
     async def execute_order(self, order: ConditionalOrder, order_func: Callable) -> bool:
         """
@@ -392,85 +628,184 @@ class ConditionalOrderEngine:
             order.is_triggered = True
             order.triggered_time = timezone.now()
 
-            # 冰山单特殊处理
-            if order.is_iceberg:
-                return await self._execute_iceberg_order(order, order_func)
-            else:
-                # 普通订单
-                return await self._execute_normal_order(order, order_func)
+            executor = order._executor or self._make_executor(order)
+            success = await executor(order_func)
+            if success:
+                self._archive_order(order)
+            return success
 
         except Exception as e:
-            logger.error(f"执行条件单失败 {order.order_id}: {repr(e)}", exc_info=True)
+            logger.error("执行条件单失败 %s: %r", order.order_id, e, exc_info=True)
             return False
 
     async def _execute_normal_order(self, order: ConditionalOrder, order_func: Callable) -> bool:
         """执行普通订单"""
         # TODO: 调用实际的下单接口
-        logger.info(f"执行条件单: {order.order_id} {order.instrument.code} "
-                   f"{order.direction.label} {order.volume}手 @{order.price}")
+        logger.info("执行条件单: %s %s %s %s手 @%s", order.order_id, order.instrument.code,
+                    order.direction.label, order.volume, order.price)
 
         # 这里应该调用实际的CTP下单接口
         # order_func(order)
         return True
 
-    async def _execute_iceberg_order(self, order: ConditionalOrder, order_func: Callable) -> bool:
-        """执行冰山单"""
-        logger.info(f"执行冰山单: {order.order_id} 总量:{order.total_volume} "
-                   f"显示:{order.display_volume}")
+    def _make_executor(self, order: ConditionalOrder) -> Callable[[Callable], Awaitable[bool]]:
+        """
+        按订单类型生成执行函数，触发时无需再判断订单类型
+
+        Args:
+            order: 条件单
 
-        remaining = order.total_volume
+        Returns:
+            Callable: 接收下单函数的协程函数
+        """
+        if not order.is_iceberg:
+            return partial(self._execute_normal_order, order)
+
+        # 冰山单的分批数量在注册时就已确定
+        display_volume = order.display_volume if order.display_volume > 0 else order.total_volume
+        slices = []
+        if display_volume > 0:
+            n_slices, remainder = divmod(order.total_volume, display_volume)
+            slices = [display_volume] * n_slices
+            if remainder:
+                slices.append(remainder)
+
+        async def execute_iceberg(order_func: Callable) -> bool:
+            """执行冰山单"""
+            logger.info("执行冰山单: %s 总量:%s 显示:%s", order.order_id, order.total_volume, order.display_volume)
+
+            for volume in slices:
+                if not order.is_active:
+                    break
+                # TODO: 下单
+
+                # 等待一段时间再下单下一批
+                await asyncio.sleep(1)
 
-        while remaining > 0 and order.is_active:
-            volume = min(order.display_volume, remaining)
-            # TODO: 下单
-            remaining -= volume
+            return True
 
-            # 等待一段时间再下单下一批
-            await asyncio.sleep(1)
+        return execute_iceberg
 
-        return True
+    def _check_orders(self, order_ids: Iterable[str]):
+        """
+        检查一批条件单，批内共享持仓查询
 
-    async def monitoring_loop(self):
-        """条件单监控循环"""
-        while True:
-            try:
-                # 检查所有激活的条件单
-                for order_id, order in list(self.orders.items()):
-                    if not order.is_active or order.is_triggered:
-                        continue
+        Args:
+            order_ids: 订单ID
+        """
+        self._tick_active = True
+        try:
+            for order_id in order_ids:
+                order = self._active.get(order_id)
+                if order is None or not order.is_active or order.is_triggered:
+                    continue
 
-                    if self.check_conditions(order):
-                        logger.info(f"条件单触发: {order_id}")
-                        # TODO: 获取下单函数并执行
-                        # await self.execute_order(order, order_func)
+                if self.check_conditions(order):
+                    logger.info("条件单触发: %s", order_id)
+                    # TODO: 获取下单函数并执行
+                    # await self.execute_order(order, order_func)
 
-                # 清理已过期或已触发的订单
-                self._cleanup_orders()
+        except Exception as e:
+            logger.error("检查条件单错误: %r", e, exc_info=True)
+        finally:
+            self._tick_active = False
+            self._tick_position_cache = None
 
-            except Exception as e:
-                logger.error(f"条件单监控循环错误: {repr(e)}", exc_info=True)
+    async def monitoring_loop(self):
+        """条件单监控循环，触发检查由行情和定时器驱动，这里只定时清理过期订单"""
+        self._loop = asyncio.get_running_loop()
+        for order in self._active.values():
+            if order.order_id not in self._time_handles:
+                self._schedule_order(order)
+        try:
+            while True:
+                try:
+                    # 清理已过期或已触发的订单
+                    self._cleanup_orders()
+                except Exception as e:
+                    logger.error("条件单监控循环错误: %r", e, exc_info=True)
+
+                await asyncio.sleep(self.sweep_interval)
+        finally:
+            for handles in self._time_handles.values():
+                for handle in handles:
+                    handle.cancel()
+            self._time_handles.clear()
+            self._loop = None
+
+    def close(self):
+        """注销交易记录信号并取消所有定时检查，引擎不再使用时调用"""
+        post_save.disconnect(sender=Trade, dispatch_uid=self._dispatch_uid)
+        post_delete.disconnect(sender=Trade, dispatch_uid=self._dispatch_uid)
+        for handles in self._time_handles.values():
+            for handle in handles:
+                handle.cancel()
+        self._time_handles.clear()
+
+    def _archive_order(self, order: ConditionalOrder):
+        """
+        把已触发的条件单移出待触发集合
 
-            await asyncio.sleep(self.check_interval)
+        Args:
+            order: 条件单
+        """
+        if self._active.get(order.order_id) is order:
+            self._unindex_order(self._active.pop(order.order_id))
+        self._archived[order.order_id] = order
 
     def _cleanup_orders(self):
         """清理无效订单"""
         now = timezone.now()
-        to_remove = []
+        triggered = []
+        expired = []
 
-        for order_id, order in self.orders.items():
-            # 移除已触发的订单
+        for order_id, order in self._active.items():
+            # 归档已触发的订单
             if order.is_triggered:
-                to_remove.append(order_id)
+                triggered.append(order)
                 continue
 
             # 移除已过期的订单
             if order.end_time and now > order.end_time:
-                logger.info(f"条件单过期: {order_id}")
-                to_remove.append(order_id)
+                logger.info("条件单过期: %s", order_id)
+                expired.append(order_id)
                 continue
 
-        for order_id in to_remove:
-            del self.orders[order_id]
+        for order in triggered:
+            self._archive_order(order)
+        for order_id in expired:
+            self._unindex_order(self._active.pop(order_id))
+
+
+def _check_unsupported(engine: ConditionalOrderEngine, condition: Condition) -> bool:
+    """未实现的条件类型始终不满足"""
+    return False
+
+
+# 条件类型 -> 检查函数，Condition 构造时据此绑定
+_CHECKERS: Dict[ConditionType, Callable[[ConditionalOrderEngine, Condition], bool]] = {
+    **dict.fromkeys(_PRICE_TYPES, ConditionalOrderEngine._check_price),
+    ConditionType.TIME_GT: ConditionalOrderEngine._check_time_gt,
+    ConditionType.TIME_LT: ConditionalOrderEngine._check_time_lt,
+    ConditionType.PROFIT_GT: ConditionalOrderEngine._check_profit_gt,
+    ConditionType.PROFIT_LT: ConditionalOrderEngine._check_profit_lt,
+    ConditionType.DRAWDOWN_GT: ConditionalOrderEngine._check_drawdown_gt,
+}
+
+
+def _to_ticks(price: Decimal, tick: Decimal) -> Optional[int]:
+    """
+    把价格折算成最小变动价位的整数倍
+
+    Args:
+        price: 价格
+        tick: 最小变动价位
+
+    Returns:
+        Optional[int]: 整数倍，不能整除时为 None
+    """
+    ticks, rem = divmod(price, tick)
+    return int(ticks) if not rem else None
 
 
 def create_conditional_order_engine(broker: Broker) -> ConditionalOrderEngine:
@@ -3,58 +3,66 @@ import os
 import datetime
 import asyncio
 import logging
+from typing import Final
 
-from tqdm import tqdm
+from tqdm.asyncio import tqdm_asyncio
 import django
 
 logger = logging.getLogger(__name__)
 
-from trade_trader.utils.read_config import get_dashboard_path  # noqa: E402
+# Run as a script: bootstrap Django here; importers are expected to have set it up already
+if __name__ == '__main__':
+    from trade_trader.utils.read_config import get_dashboard_path
 
-sys.path.append(get_dashboard_path())
-os.environ["DJANGO_SETTINGS_MODULE"] = "dashboard.settings"
-os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
-django.setup()
+    sys.path.append(get_dashboard_path())
+    os.environ["DJANGO_SETTINGS_MODULE"] = "dashboard.settings"
+    os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
+    django.setup()
 from trade_trader.utils import (  # noqa: E402
     update_from_shfe, update_from_dce, update_from_czce, update_from_cffex,
     update_from_gfex, create_main_all, check_trading_day
 )
 from django.utils import timezone  # noqa: E402
 
+# Upper bound on in-flight exchange requests, so a year of history does not flood the servers
+FETCH_CONCURRENCY = 16
+# Daily bar fetchers, one per exchange
+EXCHANGES: Final = (update_from_shfe, update_from_dce, update_from_czce, update_from_cffex, update_from_gfex)
 
-async def fetch_bar(days=365):
+
+async def _bounded(sem, coro):
+    """Run coro once a slot in sem is free."""
+    async with sem:
+        return await coro
+
+
+async def fetch_bar(days=365, concurrency=FETCH_CONCURRENCY):
     """
     Fetch historical bar data from all exchanges.
 
     Args:
         days: Number of days to look back from today (default: 365)
+        concurrency: Maximum number of requests in flight (default: FETCH_CONCURRENCY)
     """
+    sem = asyncio.Semaphore(concurrency)
     day_end = timezone.localtime()
     day_start = day_end - datetime.timedelta(days=days)
-    tasks = []
+    all_days = []
     while day_start <= day_end:
-        tasks.append(check_trading_day(day_start))
+        all_days.append(day_start)
         day_start += datetime.timedelta(days=1)
-    trading_days = []
-    for f in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
-        rst = await f
-        trading_days.append(rst)
-    tasks.clear()
-    for day, trading in trading_days:
-        if trading:
-            tasks += [
-                asyncio.create_task(update_from_shfe(day)),
-                asyncio.create_task(update_from_dce(day)),
-                asyncio.create_task(update_from_czce(day)),
-                asyncio.create_task(update_from_cffex(day)),
-                asyncio.create_task(update_from_gfex(day)),
-            ]
-    logger.info('task count: %d', len(tasks))
-    for f in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
-        await f
-
-
-# Initialize main contract data
-create_main_all()
-# Uncomment to fetch historical data:
-# asyncio.get_event_loop().run_until_complete(fetch_bar())
+    trading_days = await tqdm_asyncio.gather(*(_bounded(sem, check_trading_day(day)) for day in all_days))
+    tasks = [
+        _bounded(sem, update(day))
+        for day, trading in trading_days if trading
+        for update in EXCHANGES
+    ]
+    logger.debug('task count: %d', len(tasks))
+    await tqdm_asyncio.gather(*tasks)
+
+
+if __name__ == '__main__':
+    # Initialize main contract data
+    create_main_all()
+    # Uncomment to fetch historical data:
+    # asyncio.get_event_loop().run_until_complete(fetch_bar())
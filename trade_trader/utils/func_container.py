@@ -17,7 +17,7 @@ from __future__ import annotations
 
 from abc import ABCMeta
 from functools import wraps
-from typing import Any, Callable, TypeVar, cast
+from typing import Any, Callable, ClassVar, TypeVar, cast
 
 F = TypeVar('F', bound=Callable[..., Any])
 
@@ -37,9 +37,8 @@ def RegisterCallback(**out_kwargs: Any) -> Callable[[F], F]:
         def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
             return func(self, *args, **kwargs)
 
-        for key, value in out_kwargs.items():
-            setattr(wrapper, f'arg_{key}', value)
-        setattr(wrapper, 'is_callback_function', True)
+        # One dict both marks the callback and carries its arguments; stacked decorators merge
+        wrapper._callback_args = {**getattr(func, '_callback_args', {}), **out_kwargs}  # type: ignore[attr-defined]
         return cast(F, wrapper)
 
     return _callback_handler
@@ -49,18 +48,27 @@ class CallbackFunctionContainer(metaclass=ABCMeta):
     """Base class for containers that manage callback function registration."""
 
     callback_fun_args: dict[str, dict[str, Any]]
+    _class_callback_args: ClassVar[dict[str, dict[str, Any]] | None] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._class_callback_args = None
 
     def __init__(self) -> None:
-        self.callback_fun_args = {}
-        self._collect_all()
+        self.callback_fun_args = dict(type(self)._build_callback_args())
 
-    def _collect_all(self) -> None:
-        """Collect all callback functions and their arguments from this instance."""
-        for fun_name in dir(self):
-            fun = getattr(self, fun_name)
-            if hasattr(fun, 'is_callback_function'):
-                params: dict[str, Any] = {}
-                for arg in dir(fun):
-                    if arg.startswith('arg_'):
-                        params[arg[4:]] = getattr(fun, arg)
-                self.callback_fun_args[fun_name] = params
+    @classmethod
+    def _build_callback_args(cls) -> dict[str, dict[str, Any]]:
+        """Collect callback functions and their arguments once per class by walking the MRO."""
+        if cls._class_callback_args is None:
+            resolved: dict[str, Any] = {}
+            for base in cls.__mro__:
+                for name, attr in vars(base).items():
+                    resolved.setdefault(name, attr)
+            # Only look at the marker in the function's own __dict__, never through descriptors
+            cls._class_callback_args = {
+                name: args
+                for name, fun in sorted(resolved.items())
+                if callable(fun) and (args := getattr(fun, '__dict__', {}).get('_callback_args')) is not None
+            }
+        return cls._class_callback_args
@@ -18,7 +18,11 @@ from __future__ import annotations
 import sys
 import os
 import logging
-from typing import Final
+import pickle
+import tempfile
+from functools import cache
+from types import MappingProxyType
+from typing import Final, Mapping
 import xml.etree.ElementTree as ET
 import configparser
 from appdirs import AppDirs
@@ -37,6 +41,8 @@ weixin_log = MSG:LOG:WEIXIN
 
 [TRADE]
 command_timeout = 5
+# 订阅消息处理协程数 (同时运行的频道回调上限)
+handler_concurrency = 256
 ignore_inst = WH,bb,JR,RI,RS,LR,PM,im
 
 [REDIS]
@@ -44,6 +50,8 @@ host = 127.0.0.1
 port = 6379
 db = 0
 encoding = utf-8
+# 各策略模块共用的命令连接池大小
+max_connections = 32
 
 [MYSQL]
 host = 127.0.0.1
@@ -77,6 +85,8 @@ max_single_order_ratio = 0.1
 max_order_per_minute = 30
 # 涨跌停板缓冲比例 (0.001 = 0.1%)
 price_limit_buffer = 0.001
+# 频率限制计数位置 (local: 进程内; redis: 多进程共享)
+rate_limit_backend = local
 
 [STOP]
 # 默认止损百分比 (0.02 = 2%)
@@ -85,6 +95,14 @@ default_stop_loss_pct = 0.02
 default_take_profit_pct = 0.05
 # 止损检查间隔 (秒)
 check_interval = 1
+# 止损比较使用浮点数 (true/false)，需要精确比较时设为 false
+float_compare = true
+# 止损单同步保存到 Redis，供其他进程或重启后恢复 (true/false)
+redis_persist = false
+
+[CONDITIONAL_ORDER]
+# 过期条件单清理间隔 (秒)，条件触发由行情和定时器驱动
+sweep_interval = 60
 
 [LOG]
 # Root logger level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
@@ -115,6 +133,7 @@ config: Final[configparser.ConfigParser] = configparser.ConfigParser(interpolati
 config.read(config_file)
 
 
+@cache
 def get_dashboard_path() -> str:
     """
     Get dashboard path from config, with fallback to platform-specific defaults.
@@ -150,6 +169,67 @@ def get_error_xml_path() -> str:
     return os.path.join(os.path.dirname(__file__), 'error.xml')
 
 
-ctp_errors: dict[int, str] = {}
-for error in ET.parse(get_error_xml_path()).getroot():
-    ctp_errors[int(error.attrib['value'])] = error.attrib['prompt']
+def _load_ctp_errors() -> dict[int, str]:
+    """Load the CTP error table, reusing a pickled copy keyed by error.xml's mtime.
+
+    Returns:
+        Mapping of CTP error id to its prompt text.
+    """
+    xml_path = get_error_xml_path()
+    cache_path = os.path.join(app_dir.user_cache_dir, f'ctp-errors-{os.stat(xml_path).st_mtime_ns}.pkl')
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning('ignore broken error cache %s: %r', cache_path, e)
+
+    errors: dict[int, str] = {}
+    for _, elem in ET.iterparse(xml_path, events=('end',)):
+        if elem.tag == 'error':
+            errors[int(elem.attrib['value'])] = elem.attrib['prompt']
+            elem.clear()
+
+    # 先写临时文件再改名，多个进程同时启动也不会读到半个文件
+    tmp_path = None
+    try:
+        os.makedirs(app_dir.user_cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=app_dir.user_cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(errors, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+    except Exception as e:
+        logger.warning('cannot write error cache %s: %r', cache_path, e)
+    finally:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    _remove_stale_error_caches(cache_path)
+    return errors
+
+
+def _remove_stale_error_caches(current_path: str) -> None:
+    """Delete error caches built from older error.xml versions.
+
+    Args:
+        current_path: The cache file for the current error.xml, which is kept.
+    """
+    cache_dir = os.path.dirname(current_path)
+    current = os.path.basename(current_path)
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith('ctp-errors-') and name.endswith('.pkl') and name != current:
+            try:
+                os.unlink(os.path.join(cache_dir, name))
+            except OSError as e:
+                logger.warning('cannot remove stale error cache %s: %r', name, e)
+
+
+ctp_errors: Final[Mapping[int, str]] = MappingProxyType(_load_ctp_errors())